@@ -0,0 +1,66 @@
+"""Превращение моделей в словари для JSON.
+
+У каждой модели - таблица полей: имя -> функция от объекта. Параметр
+``fields=`` выбирает подмножество, так что клиент может не тянуть,
+например, полный текст. Функции читают только поля объекта и связи из
+``select_related``, поэтому сериализация не делает запросов к базе.
+"""
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _image(post):
+    if not post.image:
+        return None
+    return post.image_variants.get('src') or post.image.url
+
+
+POST_FIELDS = {
+    'id': lambda post: post.pk,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: _isoformat(post.pub_date),
+    'updated_at': lambda post: _isoformat(post.updated_at),
+    'author': lambda post: post.author.username,
+    'group': lambda post: post.group.slug if post.group_id else None,
+    'image': _image,
+    'image_variants': lambda post: post.image_variants or None,
+}
+GROUP_FIELDS = {
+    'id': lambda group: group.pk,
+    'title': lambda group: group.title,
+    'slug': lambda group: group.slug,
+    'description': lambda group: group.description,
+}
+COMMENT_FIELDS = {
+    'id': lambda comment: comment.pk,
+    'post': lambda comment: comment.post_id,
+    'author': lambda comment: comment.author.username,
+    'text': lambda comment: comment.text,
+    'pub_date': lambda comment: _isoformat(comment.pub_date),
+}
+FOLLOW_FIELDS = {
+    'id': lambda follow: follow.pk,
+    'author': lambda follow: follow.author.username,
+    'user': lambda follow: follow.user.username,
+}
+
+
+def select_fields(table, requested):
+    """Поля из параметра ``fields=``; без него - все."""
+    if not requested:
+        return table
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in names if name not in table]
+    if unknown:
+        raise FieldsError(f'Неизвестные поля: {", ".join(unknown)}')
+    return {name: table[name] for name in names}
+
+
+def serialize(obj, fields):
+    return {name: getter(obj) for name, getter in fields.items()}
@@ -0,0 +1,118 @@
+from http import HTTPStatus
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+    """Тесты JSON API."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.reader = User.objects.create_user(username='tiger')
+        cls.group = Group.objects.create(title='Группа', slug='slug',
+                                         description='Описание')
+        cls.posts = [Post.objects.create(text=f'Пост {number}',
+                                         author=cls.author, group=cls.group)
+                     for number in range(3)]
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ApiTests.author)
+
+    def test_cursor_pages_and_fields(self):
+        """Тест страниц по курсору и выбора полей."""
+        url = reverse('api:posts')
+        with self.assertNumQueries(1):
+            first = self.guest_client.get(
+                url, {'limit': 2, 'fields': 'id,author,group'}).json()
+        self.assertEqual(first['results'][0], {
+            'id': ApiTests.posts[2].pk, 'author': 'leo', 'group': 'slug'})
+        second = self.guest_client.get(
+            url, {'limit': 2, 'cursor': first['next']}).json()
+        self.assertEqual([post['id'] for post in second['results']],
+                         [ApiTests.posts[0].pk])
+        self.assertIsNone(second['next'])
+        response = self.guest_client.get(url, {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_batched_ids(self):
+        """Тест выборки нескольких объектов одним запросом."""
+        ids = [ApiTests.posts[1].pk, 0, ApiTests.posts[0].pk]
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(
+                reverse('api:posts'),
+                {'ids': ','.join(map(str, ids)), 'fields': 'id'})
+        self.assertEqual(response.json()['results'],
+                         [{'id': ApiTests.posts[1].pk},
+                          {'id': ApiTests.posts[0].pk}])
+        for ids in ('²', '9' * 30, '-1', 'x'):
+            with self.subTest(Значение=ids):
+                response = self.guest_client.get(reverse('api:posts'),
+                                                 {'ids': ids})
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(response.json()['results'], [])
+
+    def test_create_and_edit_post(self):
+        """Тест записи через формы постов."""
+        url = reverse('api:posts')
+        self.assertEqual(self.guest_client.post(url, {'text': 'Текст'})
+                         .status_code, HTTPStatus.UNAUTHORIZED)
+        response = self.authorized_client.post(
+            url, {'text': 'Новый', 'group': ApiTests.group.pk},
+            content_type='application/json')
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        post_id = response.json()['id']
+        detail = reverse('api:post_detail', args=[post_id])
+        response = self.authorized_client.patch(
+            detail, {'text': 'Исправленный'},
+            content_type='application/json')
+        self.assertEqual(response.json()['group'], 'slug')
+        self.assertEqual(Post.objects.get(pk=post_id).text, 'Исправленный')
+        response = self.authorized_client.post(url, {'text': ''})
+        self.assertIn('text', response.json()['errors'])
+        reader = Client()
+        reader.force_login(ApiTests.reader)
+        self.assertEqual(reader.delete(detail).status_code,
+                         HTTPStatus.FORBIDDEN)
+        self.assertEqual(self.authorized_client.delete(detail).status_code,
+                         HTTPStatus.NO_CONTENT)
+
+    def test_comments_and_follows(self):
+        """Тест комментариев, подписок и ленты подписок."""
+        post = ApiTests.posts[0]
+        url = reverse('api:comments', args=[post.pk])
+        reader = Client()
+        reader.force_login(ApiTests.reader)
+        response = reader.post(url, {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(Comment.objects.get().author, ApiTests.reader)
+        self.assertEqual(self.guest_client.get(url).json()['results'][0]
+                         ['author'], 'tiger')
+        response = reader.post(reverse('api:follows'), {'author': 'leo'},
+                               content_type='application/json')
+        self.assertEqual(response.json()['author'], 'leo')
+        self.assertTrue(Follow.objects.filter(user=ApiTests.reader).exists())
+        feed = reader.get(reverse('api:follow_feed')).json()
+        self.assertEqual(len(feed['results']), 3)
+        self.assertEqual(
+            reader.delete(reverse('api:follow_delete', args=['leo']))
+            .status_code, HTTPStatus.NO_CONTENT)
+        self.assertEqual(
+            reader.post(reverse('api:follows'), {'author': 'tiger'})
+            .status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_groups(self):
+        """Тест списка и страницы группы."""
+        self.assertEqual(
+            self.guest_client.get(reverse('api:groups')).json()['results'],
+            [{'id': ApiTests.group.pk, 'title': 'Группа', 'slug': 'slug',
+              'description': 'Описание'}])
+        self.assertEqual(self.guest_client.get(
+            reverse('api:group_detail', args=['none'])).status_code,
+            HTTPStatus.NOT_FOUND)
@@ -0,0 +1,17 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.posts, name='posts'),
+    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('posts/<int:post_id>/comments/', views.comments, name='comments'),
+    path('groups/', views.groups, name='groups'),
+    path('groups/<slug:slug>/', views.group_detail, name='group_detail'),
+    path('follow/', views.follow_feed, name='follow_feed'),
+    path('follows/', views.follows, name='follows'),
+    path('follows/<str:username>/', views.follow_delete,
+         name='follow_delete'),
+]
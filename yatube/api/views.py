@@ -0,0 +1,275 @@
+"""JSON API для лент, постов, групп, комментариев и подписок.
+
+Списки листаются курсором (``?cursor=``, размер страницы - ``?limit=``),
+поля выбираются ``?fields=``, несколько объектов сразу отдаёт ``?ids=``.
+Запись проверяется теми же формами, что и HTML-страницы; тело запроса -
+JSON или обычная форма (картинку можно прислать только формой).
+"""
+import json
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_http_methods
+
+from core.db.routers import read_only, replica_reads
+from posts import feeds, thumbnails
+from posts.forms import CommentForm, PostForm
+from posts.models import Follow, Group, Post, User
+from posts.paginator import my_paginator
+from posts.timeline import TimelineFeed
+
+from .serializers import (COMMENT_FIELDS, FOLLOW_FIELDS, GROUP_FIELDS,
+                          POST_FIELDS, FieldsError, select_fields, serialize)
+
+# Самый большой id, который примет база (BIGINT).
+MAX_ID = 2 ** 63 - 1
+
+
+def json_response(data, status=HTTPStatus.OK):
+    return JsonResponse(data, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def error(message, status=HTTPStatus.BAD_REQUEST):
+    return json_response({'errors': message}, status)
+
+
+def api_login_required(view):
+    """Как login_required, но отвечает 401 вместо перенаправления."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error('Нужна авторизация', HTTPStatus.UNAUTHORIZED)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.NUM_POSTS))
+    except ValueError:
+        return settings.NUM_POSTS
+    return min(max(limit, 1), settings.API_MAX_LIMIT)
+
+
+def _ids(request):
+    ids = []
+    for value in request.GET['ids'].split(','):
+        try:
+            pk = int(value)
+        except ValueError:
+            continue
+        if 0 < pk <= MAX_ID:
+            ids.append(pk)
+    return ids[:settings.API_MAX_LIMIT]
+
+
+def listing(request, queryset, table, ordering=None):
+    """Страница по курсору или, с ``?ids=``, объекты по списку id."""
+    try:
+        fields = select_fields(table, request.GET.get('fields'))
+    except FieldsError as exception:
+        return error(str(exception))
+    if 'ids' in request.GET:
+        ids = _ids(request)
+        found = queryset.in_bulk(ids)
+        return json_response({'results': [
+            serialize(found[pk], fields) for pk in ids if pk in found]})
+    return page_response(
+        my_paginator(request, queryset, ordering=ordering,
+                     per_page=_limit(request)), fields)
+
+
+def page_response(page, fields):
+    return json_response({
+        'results': [serialize(obj, fields) for obj in page],
+        'next': page.next_cursor if page.has_next() else None,
+        'previous': (page.previous_cursor if page.has_previous()
+                     else None),
+    })
+
+
+def detail(request, obj, table, status=HTTPStatus.OK):
+    try:
+        fields = select_fields(table, request.GET.get('fields'))
+    except FieldsError as exception:
+        return error(str(exception))
+    return json_response(serialize(obj, fields), status)
+
+
+def _payload(request):
+    """Данные запроса: JSON или поля формы."""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+@read_only
+def post_list(request):
+    queryset = feeds.index_feed()
+    if 'group' in request.GET:
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if 'author' in request.GET:
+        queryset = queryset.filter(author__username=request.GET['author'])
+    return listing(request, queryset, POST_FIELDS)
+
+
+@api_login_required
+def post_create(request):
+    data = _payload(request)
+    if data is None:
+        return error('Некорректный JSON')
+    form = PostForm(data, files=request.FILES or None)
+    if not form.is_valid():
+        return error(form.errors)
+    post = form.save(commit=False)
+    post.author = request.user
+    post.save()
+    thumbnails.schedule(post)
+    return detail(request, post, POST_FIELDS, HTTPStatus.CREATED)
+
+
+@require_http_methods(['GET', 'POST'])
+def posts(request):
+    if request.method == 'POST':
+        return post_create(request)
+    return post_list(request)
+
+
+@api_login_required
+def post_edit(request, post):
+    if post.author_id != request.user.pk:
+        return error('Редактировать может только автор',
+                     HTTPStatus.FORBIDDEN)
+    if request.method == 'DELETE':
+        post.delete()
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+    data = _payload(request)
+    if data is None:
+        return error('Некорректный JSON')
+    if request.method == 'PATCH':
+        data = {**model_to_dict(post, PostForm.Meta.fields), **data}
+    form = PostForm(data, files=request.FILES or None, instance=post)
+    if not form.is_valid():
+        return error(form.errors)
+    if 'image' in form.changed_data:
+        post.thumbnails, post.image_variants = {}, {}
+    post = form.save()
+    if 'image' in form.changed_data:
+        thumbnails.schedule(post)
+    return detail(request, post, POST_FIELDS)
+
+
+@require_http_methods(['GET', 'PUT', 'PATCH', 'DELETE'])
+def post_detail(request, post_id):
+    if request.method == 'GET':
+        with replica_reads():
+            return detail(request, get_object_or_404(
+                feeds.index_feed(), pk=post_id), POST_FIELDS)
+    return post_edit(request, get_object_or_404(feeds.index_feed(),
+                                                pk=post_id))
+
+
+@read_only
+def comment_list(request, post):
+    return listing(request, feeds.comment_feed(post), COMMENT_FIELDS,
+                   ordering=('pub_date', 'id'))
+
+
+@api_login_required
+def comment_create(request, post):
+    data = _payload(request)
+    if data is None:
+        return error('Некорректный JSON')
+    form = CommentForm(data)
+    if not form.is_valid():
+        return error(form.errors)
+    comment = form.save(commit=False)
+    comment.author = request.user
+    comment.post = post
+    comment.save()
+    return detail(request, comment, COMMENT_FIELDS, HTTPStatus.CREATED)
+
+
+@require_http_methods(['GET', 'POST'])
+def comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    if request.method == 'POST':
+        return comment_create(request, post)
+    return comment_list(request, post)
+
+
+@require_http_methods(['GET'])
+@read_only
+def groups(request):
+    return listing(request, Group.objects.all(), GROUP_FIELDS,
+                   ordering=('id',))
+
+
+@require_http_methods(['GET'])
+@read_only
+def group_detail(request, slug):
+    return detail(request, get_object_or_404(Group, slug=slug),
+                  GROUP_FIELDS)
+
+
+@require_http_methods(['GET'])
+@api_login_required
+@read_only
+def follow_feed(request):
+    """Посты авторов, на которых подписан пользователь."""
+    try:
+        fields = select_fields(POST_FIELDS, request.GET.get('fields'))
+    except FieldsError as exception:
+        return error(str(exception))
+    return page_response(
+        my_paginator(request, TimelineFeed(request.user),
+                     per_page=_limit(request)), fields)
+
+
+def _follow_queryset(user):
+    return user.follower.select_related('author', 'user')
+
+
+@api_login_required
+def follow_create(request):
+    data = _payload(request)
+    username = data and data.get('author')
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return error({'author': ['Нет такого автора']})
+    if author == request.user:
+        return error({'author': ['Нельзя подписаться на себя']})
+    follow, created = Follow.objects.get_or_create(author=author,
+                                                   user=request.user)
+    follow = _follow_queryset(request.user).get(pk=follow.pk)
+    return detail(request, follow, FOLLOW_FIELDS,
+                  HTTPStatus.CREATED if created else HTTPStatus.OK)
+
+
+@require_http_methods(['GET', 'POST'])
+@api_login_required
+def follows(request):
+    if request.method == 'POST':
+        return follow_create(request)
+    with replica_reads():
+        return listing(request, _follow_queryset(request.user),
+                       FOLLOW_FIELDS, ordering=('-id',))
+
+
+@require_http_methods(['DELETE'])
+@api_login_required
+def follow_delete(request, username):
+    deleted, _ = Follow.objects.filter(author__username=username,
+                                       user=request.user).delete()
+    if not deleted:
+        return error('Подписки нет', HTTPStatus.NOT_FOUND)
+    return HttpResponse(status=HTTPStatus.NO_CONTENT)
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import metrics, profiling
+        connection_created.connect(metrics.install_query_recorder)
+        connection_created.connect(profiling.install_query_recorder)
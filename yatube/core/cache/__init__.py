@@ -0,0 +1,55 @@
+"""Настройка общего кэша по адресу из окружения.
+
+Адрес задаётся переменной ``YATUBE_CACHE_URL``:
+
+- ``locmem://`` - память процесса (по умолчанию, для разработки);
+- ``file:///путь/к/каталогу`` - файлы, общие для процессов одной машины;
+- ``sqlite:///путь/к/cache.sqlite3`` - файл SQLite, общий для процессов;
+- ``memcached://host:11211[,host2:11211]`` - memcached;
+- ``redis://[[user]:password@]host:6379/0`` - Redis или совместимый по
+  протоколу сервер; пароль передаётся командой AUTH.
+"""
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+BACKENDS = {
+    'locmem': 'core.cache.backends.LocMemCache',
+    'file': 'core.cache.backends.FileBasedCache',
+    'sqlite': 'core.cache.backends.SQLiteCache',
+    'memcached': 'core.cache.backends.PyMemcacheCache',
+    'redis': 'core.cache.backends.RedisCache',
+}
+
+
+def parse_cache_url(url):
+    """Превращает адрес кэша в словарь для ``settings.CACHES``.
+
+    Параметры строки запроса (``?timeout=300&max_entries=10000``)
+    передаются в TIMEOUT и OPTIONS.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in BACKENDS:
+        raise ValueError(f'Неизвестная схема кэша: {parts.scheme!r}')
+    config = {'BACKEND': BACKENDS[parts.scheme]}
+    if parts.scheme in ('file', 'sqlite'):
+        config['LOCATION'] = parts.path
+    elif parts.scheme == 'memcached':
+        config['LOCATION'] = parts.netloc.split(',')
+    elif parts.scheme == 'redis':
+        address = parts.netloc.rpartition('@')[2]
+        config['LOCATION'] = f'{address}{parts.path or "/0"}'
+    else:
+        config['LOCATION'] = parts.netloc or 'default'
+    options = dict(parse_qsl(parts.query))
+    if parts.scheme == 'redis' and parts.password is not None:
+        options['password'] = unquote(parts.password)
+        if parts.username:
+            options['username'] = unquote(parts.username)
+    if 'timeout' in options:
+        config['TIMEOUT'] = int(options.pop('timeout'))
+    if options:
+        config['OPTIONS'] = {
+            key.upper() if key in ('max_entries', 'cull_frequency') else key:
+            int(value) if value.isdigit() else value
+            for key, value in options.items()
+        }
+    return config
@@ -0,0 +1,461 @@
+"""Бэкенды кэша со счётчиками попаданий, промахов и вытеснений."""
+import itertools
+import logging
+import pickle
+import random
+import socket
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.core.cache.backends import filebased, locmem, memcached
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def local_stats():
+    """Счётчики этого процесса по всем кэшам: {место: Counter}."""
+    with _stats_lock:
+        return {name: Counter(counter) for name, counter in _stats.items()}
+
+
+class StatsMixin:
+    """Считает попадания, промахи, записи и вытеснения.
+
+    Django создаёт экземпляр кэша на каждый поток, поэтому счётчики
+    хранятся на уровне модуля и общие для потоков процесса.
+    """
+
+    _sentinel = object()
+
+    def _init_stats(self, name):
+        with _stats_lock:
+            self._stats = _stats.setdefault(name, Counter())
+
+    def _count(self, **deltas):
+        with _stats_lock:
+            self._stats.update(deltas)
+        request_stats = metrics.current()
+        if request_stats is not None:
+            request_stats.cache.update(deltas)
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._sentinel, version)
+        if value is self._sentinel:
+            self._count(misses=1)
+            return default
+        self._count(hits=1)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._count(sets=1)
+        return super().set(key, value, timeout, version)
+
+    def backend_stats(self):
+        """Показатели самого хранилища, общие для всех процессов."""
+        return {}
+
+
+class LocMemCache(StatsMixin, locmem.LocMemCache):
+    """Кэш в памяти процесса: не виден другим воркерам."""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._init_stats(f'locmem:{name}')
+
+    def _cull(self):
+        before = len(self._cache)
+        super()._cull()
+        self._count(evictions=before - len(self._cache))
+
+    def backend_stats(self):
+        return {'entries': len(self._cache), 'max_entries': self._max_entries}
+
+
+class FileBasedCache(StatsMixin, filebased.FileBasedCache):
+    """Файловый кэш, общий для процессов одной машины."""
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._init_stats(f'file:{dir}')
+
+    def _cull(self):
+        # Как у родителя, но с подсчётом вытеснений по тому же списку
+        # файлов: _cull вызывается на каждой записи.
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        if not self._cull_frequency:
+            self.clear()
+        else:
+            filelist = random.sample(
+                filelist, int(len(filelist) / self._cull_frequency))
+            for fname in filelist:
+                self._delete(fname)
+        self._count(evictions=len(filelist))
+
+    def backend_stats(self):
+        return {'entries': len(self._list_cache_files()),
+                'max_entries': self._max_entries}
+
+
+class PyMemcacheCache(StatsMixin, memcached.PyMemcacheCache):
+    """memcached через pymemcache."""
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self._init_stats(f'memcached:{",".join(self._servers)}')
+
+    def backend_stats(self):
+        totals = Counter()
+        clients = getattr(self._cache, 'clients', {}).values()
+        for client in clients or [self._cache]:
+            server_stats = client.stats()
+            for name in ('get_hits', 'get_misses', 'evictions',
+                         'curr_items', 'bytes', 'limit_maxbytes'):
+                totals[name] += int(server_stats.get(name.encode(), 0))
+        return dict(totals)
+
+
+class SQLiteCache(StatsMixin, BaseCache):
+    """Кэш в отдельном файле SQLite, общий для процессов одной машины.
+
+    Файл работает в режиме WAL, поэтому чтения из разных процессов не
+    блокируют друг друга. Вытеснения считаются в самой базе и видны всем
+    процессам. Соединение у каждого потока своё и живёт между запросами.
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._location = location
+        self._local = threading.local()
+        # Считать записи на каждой записи дорого: таблица проверяется
+        # раз в ``cull_every`` записей и может ненадолго превысить
+        # MAX_ENTRIES на столько же строк.
+        self._cull_every = max(int(params.get('OPTIONS', {}).get(
+            'cull_every', 100)), 1)
+        self._writes = itertools.count(1)
+        self._init_stats(f'sqlite:{location}')
+
+    @property
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self._location, timeout=5,
+                                 isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute('CREATE TABLE IF NOT EXISTS cache ('
+                       'key TEXT PRIMARY KEY, value BLOB, expires REAL)')
+            db.execute('CREATE INDEX IF NOT EXISTS cache_expires '
+                       'ON cache (expires)')
+            db.execute('CREATE TABLE IF NOT EXISTS cache_stats ('
+                       'name TEXT PRIMARY KEY, value INTEGER)')
+            self._local.db = db
+        return db
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _load(self, row):
+        value, expires = row
+        if expires is not None and expires <= time.time():
+            return self._sentinel
+        return pickle.loads(value)
+
+    def get(self, key, default=None, version=None):
+        row = self._db.execute(
+            'SELECT value, expires FROM cache WHERE key = ?',
+            (self._key(key, version),)).fetchone()
+        value = self._sentinel if row is None else self._load(row)
+        if value is self._sentinel:
+            self._count(misses=1)
+            return default
+        self._count(hits=1)
+        return value
+
+    def _write(self, verb, key, value, timeout):
+        self._cull()
+        cursor = self._db.execute(
+            f'{verb} INTO cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, self.pickle_protocol),
+             self.get_backend_timeout(timeout)))
+        return cursor.rowcount == 1
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._count(sets=1)
+        self._write('REPLACE', self._key(key, version), value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self._db.execute(
+            'DELETE FROM cache WHERE key = ? AND expires <= ?',
+            (key, time.time()))
+        return self._write('INSERT OR IGNORE', key, value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), self._key(key, version),
+             time.time()))
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute('SELECT value, expires FROM cache WHERE key = ?',
+                             (key,)).fetchone()
+            value = self._sentinel if row is None else self._load(row)
+            if value is self._sentinel:
+                raise ValueError(f"Key '{key}' not found")
+            value += delta
+            db.execute('UPDATE cache SET value = ? WHERE key = ?',
+                       (pickle.dumps(value, self.pickle_protocol), key))
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return value
+
+    def delete(self, key, version=None):
+        cursor = self._db.execute('DELETE FROM cache WHERE key = ?',
+                                  (self._key(key, version),))
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        return self._db.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time())).fetchone() is not None
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def _cull(self):
+        if next(self._writes) % self._cull_every:
+            return
+        db = self._db
+        (entries,) = db.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if entries < self._max_entries:
+            return
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        (entries,) = db.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if entries < self._max_entries:
+            return
+        evicted = db.execute(
+            'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+            'ORDER BY expires IS NULL, expires LIMIT ?)',
+            (max(entries // self._cull_frequency, 1)
+             if self._cull_frequency else entries,)).rowcount
+        db.execute('INSERT INTO cache_stats VALUES (\'evictions\', ?) '
+                   'ON CONFLICT (name) DO UPDATE SET value = value + ?',
+                   (evicted, evicted))
+        self._count(evictions=evicted)
+
+    def backend_stats(self):
+        (entries,) = self._db.execute('SELECT COUNT(*) FROM cache').fetchone()
+        stats = dict(self._db.execute('SELECT name, value FROM cache_stats'))
+        stats.update(entries=entries, max_entries=self._max_entries)
+        return stats
+
+
+class RedisCache(StatsMixin, BaseCache):
+    """Кэш на сервере с протоколом Redis (RESP).
+
+    Клиент встроен, чтобы не тянуть зависимость ради пары команд. Целые
+    числа хранятся как есть, чтобы работал атомарный INCRBY, остальное -
+    в pickle. Пароль (и имя пользователя для ACL) берутся из OPTIONS.
+    Пока сервер недоступен, чтения - промахи, а записи теряются: сайт
+    работает без кэша, а не отвечает ошибкой.
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+    # Проверка ключа и INCRBY одним скриптом: иначе ключ может истечь
+    # между ними, и INCRBY создаст его заново со значением delta.
+    incr_script = ("if redis.call('EXISTS', KEYS[1]) == 0 then "
+                   "return false end "
+                   "return redis.call('INCRBY', KEYS[1], ARGV[1])")
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        address, _, db = location.partition('/')
+        host, _, port = address.partition(':')
+        self._address = (host or 'localhost', int(port or 6379))
+        self._db_number = int(db or 0)
+        options = params.get('OPTIONS', {})
+        self._socket_timeout = options.get('socket_timeout', 1)
+        self._auth = tuple(str(value) for value in (
+            options.get('username'), options.get('password'))
+            if value is not None)
+        self._local = threading.local()
+        self._init_stats(f'redis:{location}')
+
+    def _connect(self):
+        sock = socket.create_connection(self._address,
+                                        self._socket_timeout)
+        self._local.sock = sock
+        self._local.reader = sock.makefile('rb')
+        try:
+            if self._auth:
+                self._command('AUTH', *self._auth)
+            if self._db_number:
+                self._command('SELECT', self._db_number)
+        except Exception:
+            self._disconnect()
+            raise
+
+    def _command(self, *args):
+        if getattr(self._local, 'sock', None) is None:
+            self._connect()
+        payload = [f'*{len(args)}\r\n'.encode()]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            payload.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        try:
+            self._local.sock.sendall(b''.join(payload))
+            return self._read_reply()
+        except OSError:
+            self._disconnect()
+            raise
+
+    def _try(self, fallback, *args):
+        """Команда, для которой недоступный сервер - промах, а не ошибка."""
+        try:
+            return self._command(*args)
+        except OSError as error:
+            logger.warning('Сервер кэша %s:%s недоступен: %s',
+                           *self._address, error)
+            return fallback
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError('Сервер кэша закрыл соединение')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest
+        if kind == b'-':
+            raise ValueError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length == -1:
+                return None
+            return self._local.reader.read(length + 2)[:-2]
+        if kind == b'*':
+            return [self._read_reply() for _ in range(int(rest))]
+        raise ConnectionError(f'Непонятный ответ сервера кэша: {line!r}')
+
+    def _encode(self, value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value).encode()
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def _decode(self, value):
+        try:
+            return int(value)
+        except ValueError:
+            return pickle.loads(value)
+
+    def _expiry_args(self, timeout):
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return ()
+        return ('PX', max(int(timeout * 1000), 1))
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        value = self._try(None, 'GET', self._key(key, version))
+        if value is None:
+            self._count(misses=1)
+            return default
+        self._count(hits=1)
+        return self._decode(value)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._try([None] * len(keys), 'MGET',
+                           *(self._key(key, version) for key in keys))
+        found = {key: self._decode(value)
+                 for key, value in zip(keys, values) if value is not None}
+        self._count(hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._count(sets=1)
+        if timeout == 0:
+            self.delete(key, version)
+            return
+        self._try(None, 'SET', self._key(key, version), self._encode(value),
+                  *self._expiry_args(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout == 0:
+            return False
+        return self._try(
+            None, 'SET', self._key(key, version), self._encode(value),
+            *self._expiry_args(timeout), 'NX') is not None
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        args = self._expiry_args(timeout)
+        if not args:
+            return bool(self._try(0, 'PERSIST', key)) or self.has_key(key)
+        return bool(self._try(0, 'PEXPIRE', key, args[1]))
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        value = self._try(None, 'EVAL', self.incr_script, 1, key,
+                          delta)
+        if value is None:
+            raise ValueError(f"Key '{key}' not found")
+        return value
+
+    def delete(self, key, version=None):
+        return bool(self._try(0, 'DEL', self._key(key, version)))
+
+    def has_key(self, key, version=None):
+        return bool(self._try(0, 'EXISTS', self._key(key, version)))
+
+    def clear(self):
+        self._command('FLUSHDB')
+
+    def backend_stats(self):
+        info = self._command('INFO', 'stats').decode()
+        wanted = ('keyspace_hits', 'keyspace_misses', 'evicted_keys',
+                  'expired_keys')
+        return {
+            name: int(value)
+            for name, _, value in (line.partition(':')
+                                   for line in info.splitlines())
+            if name in wanted
+        }
+
+    def _disconnect(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
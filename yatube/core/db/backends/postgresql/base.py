@@ -0,0 +1,81 @@
+"""PostgreSQL с проверкой постоянных соединений и встроенным пулом.
+
+``CONN_HEALTH_CHECKS``: соединение, пережившее запрос (``CONN_MAX_AGE``),
+перед первым использованием в новом запросе проверяется ``SELECT 1`` и
+при обрыве открывается заново. В Django 3.2 такой настройки ещё нет.
+
+``POOL = {'MIN_SIZE': 1, 'MAX_SIZE': 20}``: соединения берутся из
+``ThreadedConnectionPool`` процесса и возвращаются в него при закрытии,
+так что даже с ``CONN_MAX_AGE = 0`` запрос не платит за подключение.
+``MAX_SIZE`` должен быть не меньше числа потоков процесса.
+"""
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions, extras, pool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_done = False
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def pool(self, conn_params=None):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+        with _pools_lock:
+            if self.alias not in _pools and conn_params is not None:
+                _pools[self.alias] = pool.ThreadedConnectionPool(
+                    options.get('MIN_SIZE', 1), options.get('MAX_SIZE', 10),
+                    **conn_params)
+            return _pools.get(self.alias)
+
+    def get_new_connection(self, conn_params):
+        connections = self.pool(conn_params)
+        if connections is None:
+            return super().get_new_connection(conn_params)
+        connection = connections.getconn()
+        # Дальше - как в родительском классе, только без подключения.
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get('isolation_level',
+                                           connection.isolation_level)
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        extras.register_default_jsonb(conn_or_curs=connection,
+                                      loads=lambda x: x)
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def _close(self):
+        connections = self.pool()
+        if connections is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            broken = bool(self.connection.closed) or self.errors_occurred
+            if not broken and (self.connection.get_transaction_status()
+                               != extensions.TRANSACTION_STATUS_IDLE):
+                self.connection.rollback()
+            connections.putconn(self.connection, close=broken)
+
+    def ensure_connection(self):
+        if (self.connection is not None and self.health_check_enabled
+                and not self.health_check_done and not self.in_atomic_block):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Вызывается в начале и в конце каждого запроса: следующая работа
+        # с базой снова проверит соединение.
+        self.health_check_done = False
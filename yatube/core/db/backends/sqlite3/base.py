@@ -0,0 +1,68 @@
+"""SQLite с WAL, настроенными PRAGMA и повтором при блокировке.
+
+В WAL-журнале читатели не ждут писателя, а писатели ждут друг друга до
+``busy_timeout`` миллисекунд. Транзакции начинаются с ``BEGIN IMMEDIATE``:
+отложенная транзакция, которая сначала читает, а потом пишет, получает
+«database is locked» сразу, минуя ожидание. Одиночный запрос вне
+транзакции при блокировке повторяется с растущей паузой.
+
+PRAGMA переопределяются ключом ``PRAGMAS`` в настройках базы.
+"""
+import time
+
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+RETRIES = 5
+RETRY_DELAY = 0.05
+
+
+def is_locked(error):
+    return 'database is locked' in str(error)
+
+
+class RetryingCursorWrapper(base.SQLiteCursorWrapper):
+    """Повторяет запрос вне транзакции, если база занята."""
+
+    def _retry(self, method, *args):
+        for attempt in range(RETRIES):
+            try:
+                return method(self, *args)
+            except base.Database.OperationalError as error:
+                if (not is_locked(error) or self.connection.in_transaction
+                        or attempt == RETRIES - 1):
+                    raise
+                time.sleep(RETRY_DELAY * 2 ** attempt)
+
+    def execute(self, query, params=None):
+        return self._retry(base.SQLiteCursorWrapper.execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self._retry(base.SQLiteCursorWrapper.executemany, query,
+                           param_list)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pragmas(self):
+        return {**DEFAULT_PRAGMAS, **self.settings_dict.get('PRAGMAS', {})}
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def create_cursor(self, name=None):
+        return self.connection.cursor(factory=RetryingCursorWrapper)
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,45 @@
+import asyncio
+
+from django.conf import settings
+
+from .routers import pinning, replica_configured
+
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaPinningMiddleware:
+    """Прикрепляет к основной базе клиента, который только что писал."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not replica_configured():
+            return self.get_response(request)
+        with pinning(PIN_COOKIE in request.COOKIES) as pin:
+            response = self.get_response(request)
+        return self.pin(request, response, pin)
+
+    async def __acall__(self, request):
+        # Состояние Pin лежит в contextvar и доходит до потока, в котором
+        # работает view-функция.
+        if not replica_configured():
+            return await self.get_response(request)
+        with pinning(PIN_COOKIE in request.COOKIES) as pin:
+            response = await self.get_response(request)
+        return self.pin(request, response, pin)
+
+    def pin(self, request, response, pin):
+        if pin.wrote or request.method not in SAFE_METHODS:
+            response.set_cookie(PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
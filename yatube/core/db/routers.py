@@ -0,0 +1,98 @@
+"""Маршрутизация запросов между основной базой и репликами.
+
+Реплики отстают от основной базы, поэтому по умолчанию все запросы идут
+в ``default``. Чтения уходят в реплику только внутри ``replica_reads`` -
+им помечаются view-функции, которые ничего не пишут (ленты и страница
+поста). Реплика выбирается случайно один раз на блок, чтобы все запросы
+страницы видели один снимок данных.
+
+Чтобы пользователь сразу видел свои записи, запрос с записью в базу
+«прикрепляет» клиента к основной базе: ``ReplicaPinningMiddleware``
+ставит cookie на ``REPLICA_PIN_SECONDS``, и пока она жива, чтения этого
+клиента тоже идут в ``default``.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+REPLICA = 'replica'
+
+_replica = ContextVar('replica', default=None)
+_pin = ContextVar('replica_pin', default=None)
+
+
+class Pin:
+    """Состояние запроса: прикреплён ли клиент и была ли запись."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def replicas():
+    return [alias for alias in settings.DATABASES
+            if alias.startswith(REPLICA)]
+
+
+def replica_configured():
+    return bool(replicas())
+
+
+@contextmanager
+def replica_reads():
+    """Отдаёт чтения внутри блока одной реплике; вложенный блок - той же."""
+    alias = _replica.get()
+    if alias is None:
+        aliases = replicas()
+        alias = random.choice(aliases) if aliases else 'default'
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+@contextmanager
+def pinning(pinned=False):
+    """Отслеживает записи внутри блока; отдаёт состояние Pin."""
+    pin = Pin(pinned)
+    token = _pin.set(pin)
+    try:
+        yield pin
+    finally:
+        _pin.reset(token)
+
+
+def read_only(view):
+    """Отдаёт чтения view-функции репликам."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Чтения в read_only-view идут в реплики, остальное - в основную."""
+
+    def db_for_read(self, model, **hints):
+        pin = _pin.get()
+        if pin is not None and (pin.pinned or pin.wrote):
+            return 'default'
+        return _replica.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        pin = _pin.get()
+        if pin is not None:
+            pin.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики - копии основной базы, объекты из всех совместимы.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,131 @@
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+from core.db.backends.sqlite3.base import DEFAULT_PRAGMAS
+
+# Сравниваемые настройки: стандартный бэкенд Django с журналом отката и
+# бэкенд проекта с WAL.
+PROFILES = {
+    'journal': {'ENGINE': 'django.db.backends.sqlite3'},
+    'wal': {'ENGINE': 'core.db.backends.sqlite3', 'PRAGMAS': DEFAULT_PRAGMAS},
+}
+SCHEMA = (
+    'CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT, '
+    'pub_date REAL, comments INTEGER DEFAULT 0)',
+    'CREATE INDEX post_pub_date ON post (pub_date)',
+    'CREATE TABLE comment (id INTEGER PRIMARY KEY, post_id INTEGER, '
+    'text TEXT, pub_date REAL)',
+    'CREATE INDEX comment_post ON comment (post_id)',
+)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность SQLite с журналом отката и '
+            'с WAL под смешанной нагрузкой чтения и записи.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--write-ratio', type=float, default=0.2)
+        parser.add_argument('--posts', type=int, default=1000)
+
+    def prepare(self, alias, posts):
+        with connections[alias].cursor() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement)
+            cursor.executemany(
+                'INSERT INTO post (text, pub_date) VALUES (%s, %s)',
+                [(f'Пост {number}', number) for number in range(posts)])
+
+    def read(self, cursor, posts):
+        cursor.execute('SELECT id, text FROM post ORDER BY pub_date DESC '
+                       'LIMIT 10')
+        cursor.fetchall()
+        cursor.execute('SELECT count(*) FROM comment WHERE post_id = %s',
+                       [random.randint(1, posts)])
+        cursor.fetchone()
+
+    def write(self, alias, posts):
+        post_id = random.randint(1, posts)
+        with transaction.atomic(using=alias), \
+                connections[alias].cursor() as cursor:
+            cursor.execute('INSERT INTO comment (post_id, text, pub_date) '
+                           'VALUES (%s, %s, %s)',
+                           [post_id, 'Комментарий', time.time()])
+            cursor.execute('UPDATE post SET comments = comments + 1 '
+                           'WHERE id = %s', [post_id])
+
+    def worker(self, alias, options, deadline, stats):
+        latencies, errors = {'read': [], 'write': []}, 0
+        while time.monotonic() < deadline:
+            kind = ('write' if random.random() < options['write_ratio']
+                    else 'read')
+            started = time.monotonic()
+            try:
+                if kind == 'write':
+                    self.write(alias, options['posts'])
+                else:
+                    with connections[alias].cursor() as cursor:
+                        self.read(cursor, options['posts'])
+            except OperationalError:
+                errors += 1
+                continue
+            latencies[kind].append(time.monotonic() - started)
+        connections[alias].close()
+        with stats['lock']:
+            for kind, values in latencies.items():
+                stats[kind].extend(values)
+            stats['errors'] += errors
+
+    def run_profile(self, name, config, directory, options):
+        alias = f'benchmark_{name}'
+        connections.settings[alias] = {
+            **config, 'NAME': os.path.join(directory, f'{name}.sqlite3')}
+        connections.ensure_defaults(alias)
+        connections.prepare_test_settings(alias)
+        try:
+            self.prepare(alias, options['posts'])
+            connections[alias].close()
+            stats = {'lock': threading.Lock(), 'read': [], 'write': [],
+                     'errors': 0}
+            deadline = time.monotonic() + options['seconds']
+            threads = [threading.Thread(
+                target=self.worker,
+                args=(alias, options, deadline, stats))
+                for _ in range(options['threads'])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            del connections.settings[alias]
+        return stats
+
+    def report(self, name, stats, seconds):
+        line = [f'{name:<8}']
+        for kind in ('read', 'write'):
+            values = sorted(stats[kind])
+            p95 = values[int(len(values) * 0.95)] * 1000 if values else 0
+            line.append(f'{kind}: {len(values) / seconds:>8.0f}/с '
+                        f'p95 {p95:>6.1f} мс')
+        line.append(f'ошибок блокировки: {stats["errors"]}')
+        self.stdout.write('  '.join(line))
+        return len(stats['read']) + len(stats['write'])
+
+    def handle(self, *args, **options):
+        seconds = options['seconds']
+        totals = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, config in PROFILES.items():
+                stats = self.run_profile(name, config, directory, options)
+                totals[name] = self.report(name, stats, seconds)
+        if totals['journal']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Операций с WAL в {totals["wal"] / totals["journal"]:.2f} '
+                f'раза больше'))
@@ -0,0 +1,21 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from core.cache.backends import local_stats
+
+
+class Command(BaseCommand):
+    help = ('Показывает попадания, промахи и вытеснения кэшей. Показатели '
+            'хранилища общие для всех процессов, счётчики процесса - '
+            'только для текущего.')
+
+    def handle(self, *args, **options):
+        for alias in caches:
+            cache = caches[alias]
+            backend_stats = getattr(cache, 'backend_stats', dict)()
+            self.stdout.write(f'{alias} ({type(cache).__name__}):')
+            for name, value in sorted(backend_stats.items()):
+                self.stdout.write(f'  {name}: {value}')
+        for name, counter in sorted(local_stats().items()):
+            self.stdout.write(f'процесс {name}: ' + ', '.join(
+                f'{key}={value}' for key, value in sorted(counter.items())))
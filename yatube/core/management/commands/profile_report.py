@@ -0,0 +1,96 @@
+import glob
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import FOLDED_SUFFIX, SQL_SUFFIX
+
+
+def _project_frame(frame):
+    """Кадр из кода проекта, а не из Django или библиотек."""
+    path = frame[frame.rfind('(') + 1:].split(os.sep, 1)[0]
+    return os.path.isdir(os.path.join(settings.BASE_DIR, path))
+
+
+class Command(BaseCommand):
+    help = ('Сводит дампы профилировщика в отчёт о самых горячих функциях, '
+            'путях по коду проекта и SQL-запросах.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=None,
+                            help='Папка с дампами; по умолчанию '
+                                 'PROFILER_DIR.')
+        parser.add_argument('--view', default=None,
+                            help='Только дампы маршрута, например '
+                                 'posts:post_detail.')
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument('--folded', default=None,
+                            help='Записать объединённые стеки для '
+                                 'flamegraph.pl в этот файл.')
+
+    def dumps(self, options):
+        directory = options['dir'] or settings.PROFILER_DIR
+        pattern = '*'
+        if options['view']:
+            pattern = f'*-{options["view"].replace(":", "_")}-*'
+        return sorted(glob.glob(os.path.join(directory,
+                                             pattern + FOLDED_SUFFIX)))
+
+    def load(self, paths):
+        stacks, queries = Counter(), {}
+        for path in paths:
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    stack, _, count = line.rstrip('\n').rpartition(' ')
+                    stacks[stack] += int(count)
+            sql_path = path[:-len(FOLDED_SUFFIX)] + SQL_SUFFIX
+            if not os.path.exists(sql_path):
+                continue
+            with open(sql_path, encoding='utf-8') as file:
+                for line in file:
+                    duration, _, sql = line.rstrip('\n').partition('\t')
+                    count, total = queries.get(sql, (0, 0.0))
+                    queries[sql] = (count + 1, total + float(duration))
+        return stacks, queries
+
+    def aggregate(self, stacks):
+        inclusive, own, paths = Counter(), Counter(), Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(';')
+            for frame in set(frames):
+                inclusive[frame] += count
+            own[frames[-1]] += count
+            project = [frame for frame in frames if _project_frame(frame)]
+            if project:
+                paths[' → '.join(project)] += count
+        return inclusive, own, paths
+
+    def section(self, title, counter, total, top):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, count in counter.most_common(top):
+            self.stdout.write(f'{count / total:>7.1%} {count:>7}  {name}')
+
+    def handle(self, *args, **options):
+        paths = self.dumps(options)
+        if not paths:
+            raise CommandError('Дампов профилировщика не найдено')
+        stacks, queries = self.load(paths)
+        total = sum(stacks.values())
+        top = options['top']
+        self.stdout.write(f'Дампов: {len(paths)}, сэмплов: {total}')
+        inclusive, own, project_paths = self.aggregate(stacks)
+        self.section('Функции, включая вызванные:', inclusive, total, top)
+        self.section('Собственное время функций:', own, total, top)
+        self.section('Горячие пути по коду проекта:', project_paths, total,
+                     top)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            'SQL по суммарному времени:'))
+        for sql, (count, duration) in sorted(
+                queries.items(), key=lambda item: -item[1][1])[:top]:
+            self.stdout.write(f'{duration:>10.1f} мс {count:>6}×  {sql}')
+        if options['folded']:
+            with open(options['folded'], 'w', encoding='utf-8') as file:
+                for stack, count in stacks.most_common():
+                    file.write(f'{stack} {count}\n')
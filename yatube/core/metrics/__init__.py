@@ -0,0 +1,203 @@
+"""Метрики запросов в текстовом формате Prometheus.
+
+``MetricsMiddleware`` замеряет каждый запрос и раскладывает результат по
+имени маршрута (``posts:index``, ``users:login``...): время ответа
+гистограммой, число и время SQL-запросов, попадания и промахи кэша, время
+рендеринга шаблонов и размер ответа. Во время запроса счётчики копятся в
+``RequestStats`` из contextvar (он виден и в потоках ``sync_to_async``) и
+попадают в общий реестр процесса один раз, в конце запроса.
+
+Реестр у каждого процесса свой: Prometheus опрашивает ``/metrics`` всех
+воркеров и суммирует их сам.
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.urls import Resolver404, resolve
+
+# Границы корзин гистограммы времени ответа, секунды.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Имя -> (тип, описание). В этом порядке метрики и выводятся.
+METRICS = {
+    'yatube_request_duration_seconds': ('histogram', 'Время ответа'),
+    'yatube_requests_total': ('counter', 'Ответы по кодам'),
+    'yatube_db_queries_total': ('counter', 'SQL-запросы'),
+    'yatube_db_query_seconds_total': ('counter', 'Время SQL-запросов'),
+    'yatube_cache_hits_total': ('counter', 'Попадания в кэш'),
+    'yatube_cache_misses_total': ('counter', 'Промахи кэша'),
+    'yatube_template_render_seconds_total': (
+        'counter', 'Время рендеринга шаблонов'),
+    'yatube_response_bytes_total': ('counter', 'Размер ответов'),
+}
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestStats:
+    """Счётчики одного запроса."""
+
+    __slots__ = ('queries', 'query_seconds', 'template_seconds', 'cache')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.template_seconds = 0.0
+        self.cache = Counter()
+
+
+def current():
+    """Счётчики текущего запроса или None вне запроса."""
+    return _current.get()
+
+
+@contextmanager
+def recording():
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка ``execute_wrapper`` для всех соединений с базой."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Подключает ``record_query`` к новому соединению (connection_created).
+
+    Обёртка висит на соединении постоянно: ``execute_wrapper`` действует
+    только в своём потоке, а view-функция под ASGI работает в другом.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _format_value(value):
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"'
+                          for name, value in labels) + '}'
+
+
+class Registry:
+    """Счётчики и гистограммы процесса, потокобезопасные."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+
+    def inc(self, name, labels, value=1):
+        labels = tuple(sorted(labels))
+        with self._lock:
+            self._counters[name, labels] += value
+
+    def observe(self, name, labels, value):
+        labels = tuple(sorted(labels))
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[name, labels] = (
+                    [0] * len(BUCKETS) + [0, 0.0])
+            for position, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    histogram[position] += 1
+            histogram[-2] += 1
+            histogram[-1] += value
+
+    def value(self, name, **labels):
+        """Значение счётчика или число наблюдений гистограммы."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key in self._histograms:
+                return self._histograms[key][-2]
+            return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(value)) for key, value
+                                in self._histograms.items())
+        lines = []
+        for name, (kind, description) in METRICS.items():
+            lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+            for (metric, labels), value in counters:
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} '
+                                 f'{_format_value(value)}')
+            for (metric, labels), value in histograms:
+                if metric == name:
+                    lines += self._histogram_lines(name, labels, value)
+        return '\n'.join(lines) + '\n'
+
+    def _histogram_lines(self, name, labels, histogram):
+        lines = []
+        for bound, count in zip(BUCKETS + ('+Inf',), histogram[:-1]):
+            bucket_labels = _format_labels(labels + (('le', bound),))
+            lines.append(f'{name}_bucket{bucket_labels} {count}')
+        lines.append(f'{name}_sum{_format_labels(labels)} '
+                     f'{_format_value(histogram[-1])}')
+        lines.append(f'{name}_count{_format_labels(labels)} {histogram[-2]}')
+        return lines
+
+
+registry = Registry()
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        # Ответ из кэша страниц приходит раньше разбора адреса.
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return 'unresolved'
+    return match.view_name
+
+
+def observe_request(request, response, stats, duration):
+    """Переносит замеры запроса в реестр процесса."""
+    labels = (('view', view_name(request)),)
+    registry.observe('yatube_request_duration_seconds', labels, duration)
+    registry.inc('yatube_requests_total',
+                 labels + (('status', response.status_code),))
+    registry.inc('yatube_db_queries_total', labels, stats.queries)
+    registry.inc('yatube_db_query_seconds_total', labels,
+                 stats.query_seconds)
+    registry.inc('yatube_cache_hits_total', labels, stats.cache['hits'])
+    registry.inc('yatube_cache_misses_total', labels, stats.cache['misses'])
+    registry.inc('yatube_template_render_seconds_total', labels,
+                 stats.template_seconds)
+    if not response.streaming:
+        registry.inc('yatube_response_bytes_total', labels,
+                     len(response.content))
@@ -0,0 +1,34 @@
+import asyncio
+import time
+
+from . import observe_request, recording
+
+
+class MetricsMiddleware:
+    """Замеряет запрос целиком, включая остальные middleware."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with recording() as stats:
+            started = time.perf_counter()
+            response = self.get_response(request)
+        observe_request(request, response, stats,
+                        time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        with recording() as stats:
+            started = time.perf_counter()
+            response = await self.get_response(request)
+        observe_request(request, response, stats,
+                        time.perf_counter() - started)
+        return response
@@ -0,0 +1,38 @@
+"""Шаблонизатор Django, замеряющий время рендеринга для метрик.
+
+Замеряются шаблоны, которые рендерят view-функции (``render``,
+``render_to_string``); вложенные ``{% include %}`` входят в их время.
+"""
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as backend
+
+from . import current
+
+
+class Template(backend.Template):
+    """Шаблон, чьё время рендеринга идёт в счётчики запроса."""
+
+    def render(self, context=None, request=None):
+        stats = current()
+        if stats is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_seconds += time.perf_counter() - started
+
+
+class DjangoTemplates(backend.DjangoTemplates):
+    """Стандартный движок, отдающий замеряемые шаблоны."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            backend.reraise(exc, self)
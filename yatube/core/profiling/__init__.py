@@ -0,0 +1,214 @@
+"""Статистический профилировщик медленных запросов.
+
+Один фоновый поток процесса раз в ``PROFILER_INTERVAL`` секунд снимает
+стеки потоков (``sys._current_frames``), в которых идут отслеживаемые
+запросы. Запрос отслеживается с начала, если попал в выборку
+``PROFILER_SAMPLE_RATE``, или с момента, когда он работает дольше
+``PROFILER_THRESHOLD``, - быстрые запросы почти ничего не стоят.
+
+Снятые стеки пишутся в ``PROFILER_DIR`` в свёрнутом формате
+(``кадр;кадр;кадр число``, его понимают flamegraph.pl и speedscope), а
+рядом - SQL-запросы с временем. Хранятся последние ``PROFILER_MAX_FILES``
+дампов, более старые удаляются при записи нового. Сводку строит
+``profile_report``.
+"""
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+
+from core.metrics import view_name
+
+# Сколько SQL-запросов одного запроса сохранять.
+MAX_QUERIES = 1000
+FOLDED_SUFFIX = '.folded'
+SQL_SUFFIX = '.sql'
+
+_current = ContextVar('profiling_session', default=None)
+_active = set()
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_sampler = None
+_numbers = itertools.count(1)
+# Сколько дампов в PROFILER_DIR по счёту процесса; None - не смотрели.
+_dumps = None
+
+
+class Session:
+    """Отслеживаемый запрос: его потоки, стеки и SQL."""
+
+    __slots__ = ('started', 'always', 'threads', 'stacks', 'queries')
+
+    def __init__(self, always):
+        self.started = time.perf_counter()
+        self.always = always
+        self.threads = set()
+        self.stacks = Counter()
+        self.queries = []
+
+    def due(self, now, threshold):
+        return self.always or now - self.started >= threshold
+
+
+@lru_cache(maxsize=None)
+def _short_path(filename):
+    if filename.startswith(str(settings.BASE_DIR)):
+        return os.path.relpath(filename, settings.BASE_DIR)
+    prefixes = [path for path in sys.path
+                if path and filename.startswith(path + os.sep)]
+    if not prefixes:
+        return filename
+    return os.path.relpath(filename, max(prefixes, key=len))
+
+
+def collapse(frame):
+    """Стек в одну строку от корня к листу.
+
+    Кадр - функция с файлом и строкой её объявления, чтобы сэмплы одной
+    функции складывались вместе.
+    """
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} '
+                     f'({_short_path(code.co_filename)}:'
+                     f'{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def _sample_forever():
+    while True:
+        with _lock:
+            idle = not _active
+        if idle:
+            _wakeup.wait()
+            _wakeup.clear()
+            continue
+        now = time.perf_counter()
+        frames = sys._current_frames()
+        with _lock:
+            for session in _active:
+                if not session.due(now, settings.PROFILER_THRESHOLD):
+                    continue
+                for ident in list(session.threads):
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        session.stacks[collapse(frame)] += 1
+        del frames
+        time.sleep(settings.PROFILER_INTERVAL)
+
+
+def _ensure_sampler():
+    global _sampler
+    if _sampler is None or not _sampler.is_alive():
+        _sampler = threading.Thread(target=_sample_forever,
+                                    name='yatube-profiler', daemon=True)
+        _sampler.start()
+
+
+@contextmanager
+def profiling(always=False, thread=True):
+    """Отслеживает запрос внутри блока.
+
+    ``thread=False`` - не снимать стек текущего потока (цикл событий под
+    ASGI); потоки view-функций добавляются при их SQL-запросах.
+    """
+    session = Session(always)
+    if thread:
+        session.threads.add(threading.get_ident())
+    token = _current.set(session)
+    with _lock:
+        _active.add(session)
+        _ensure_sampler()
+    _wakeup.set()
+    try:
+        yield session
+    finally:
+        with _lock:
+            _active.discard(session)
+        _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка ``execute_wrapper``: SQL отслеживаемого запроса."""
+    session = _current.get()
+    if session is None:
+        return execute(sql, params, many, context)
+    session.threads.add(threading.get_ident())
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if len(session.queries) < MAX_QUERIES:
+            session.queries.append((time.perf_counter() - started, sql))
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def save(session, request):
+    """Пишет стеки и SQL запроса; без сэмплов ничего не пишет.
+
+    Возвращает путь к файлу стеков или None.
+    """
+    if not session.stacks:
+        return None
+    elapsed = time.perf_counter() - session.started
+    name = '-'.join((
+        time.strftime('%Y%m%dT%H%M%S'),
+        view_name(request).replace(':', '_'),
+        f'{elapsed * 1000:.0f}ms', str(os.getpid()), str(next(_numbers))))
+    base = os.path.join(settings.PROFILER_DIR, name)
+    os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+    with open(base + FOLDED_SUFFIX, 'w', encoding='utf-8') as file:
+        for stack, count in session.stacks.most_common():
+            file.write(f'{stack} {count}\n')
+    with open(base + SQL_SUFFIX, 'w', encoding='utf-8') as file:
+        for duration, sql in session.queries:
+            file.write(f'{duration * 1000:.3f}\t{" ".join(sql.split())}\n')
+    _prune(settings.PROFILER_DIR, settings.PROFILER_MAX_FILES)
+    return base + FOLDED_SUFFIX
+
+
+def _prune(directory, keep):
+    """Удаляет дампы сверх ``keep`` последних.
+
+    Каталог просматривается при первой записи процесса и затем, только
+    когда по счёту процесса в нём больше ``keep`` дампов. Дампы других
+    процессов становятся известны при просмотре.
+    """
+    global _dumps
+    with _lock:
+        if _dumps is not None and _dumps < keep:
+            _dumps += 1
+            return
+    # Дампы может одновременно удалять другой процесс.
+    dumps = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(FOLDED_SUFFIX):
+                continue
+            try:
+                dumps.append((entry.stat().st_mtime, entry.name, entry.path))
+            except FileNotFoundError:
+                continue
+    dumps.sort()
+    with _lock:
+        _dumps = min(len(dumps), keep)
+    for _, _, path in dumps[:max(len(dumps) - keep, 0)]:
+        base = path[:-len(FOLDED_SUFFIX)]
+        for name in (path, base + SQL_SUFFIX):
+            try:
+                os.remove(name)
+            except FileNotFoundError:
+                pass
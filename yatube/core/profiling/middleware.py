@@ -0,0 +1,40 @@
+import asyncio
+import random
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import profiling, save
+
+
+class ProfilingMiddleware:
+    """Снимает стеки медленных и попавших в выборку запросов."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not settings.PROFILER_ENABLED:
+            return self.get_response(request)
+        with profiling(self.sampled()) as session:
+            response = self.get_response(request)
+        save(session, request)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.PROFILER_ENABLED:
+            return await self.get_response(request)
+        with profiling(self.sampled(), thread=False) as session:
+            response = await self.get_response(request)
+        await sync_to_async(save, thread_sensitive=False)(session, request)
+        return response
+
+    def sampled(self):
+        return random.random() < settings.PROFILER_SAMPLE_RATE
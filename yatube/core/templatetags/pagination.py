@@ -0,0 +1,17 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def cursor_url(context, param, cursor=None):
+    """Адрес текущей страницы, где заменён только курсор ``param``.
+
+    Без ``cursor`` - ссылка на первую страницу. Остальные параметры
+    запроса (например, курсор другого списка) сохраняются.
+    """
+    query = context['request'].GET.copy()
+    query.pop(param, None)
+    if cursor:
+        query[param] = cursor
+    return f'?{query.urlencode()}'
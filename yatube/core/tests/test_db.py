@@ -0,0 +1,251 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import ResolverMatch
+
+from core.db import database_settings, parse_database_url
+from core.db.backends.sqlite3.base import DatabaseWrapper
+from core.db.middleware import PIN_COOKIE, ReplicaPinningMiddleware
+from core.db.routers import ReplicaRouter, read_only, replica_reads
+from posts import counters, follow_graph, streaming
+from posts.models import AuthorStats, Follow, Group, Post
+from posts.paginator import CursorPaginator
+
+# Маршрутизатору и middleware нужны только имена баз; настоящая вторая
+# база - в ReplicaDatabaseTests.
+REPLICA_DATABASES = database_settings('sqlite:///db.sqlite3',
+                                      'sqlite:///replica.sqlite3')
+
+
+class DatabaseSettingsTests(TestCase):
+    """Тесты настройки баз по адресам."""
+
+    def test_parse_database_url(self):
+        """Тест разбора адресов баз."""
+        cases = {
+            'sqlite:///tmp/db.sqlite3': {
+                'ENGINE': 'core.db.backends.sqlite3',
+                'NAME': '/tmp/db.sqlite3'},
+            'sqlite:///tmp/db.sqlite3?pragma_synchronous=full&timeout=20': {
+                'ENGINE': 'core.db.backends.sqlite3',
+                'NAME': '/tmp/db.sqlite3',
+                'PRAGMAS': {'synchronous': 'full'},
+                'OPTIONS': {'timeout': 20}},
+            'postgres://yatube:p%40ss@db:5432/yatube?conn_max_age=60'
+            '&health_checks=true&pool_max_size=20&sslmode=require': {
+                'ENGINE': 'core.db.backends.postgresql',
+                'NAME': 'yatube', 'USER': 'yatube', 'PASSWORD': 'p@ss',
+                'HOST': 'db', 'PORT': '5432', 'CONN_MAX_AGE': 60,
+                'CONN_HEALTH_CHECKS': True, 'POOL': {'MAX_SIZE': 20},
+                'OPTIONS': {'sslmode': 'require'}},
+        }
+        for url, expected in cases.items():
+            with self.subTest(Адрес=url):
+                self.assertEqual(parse_database_url(url), expected)
+        with self.assertRaises(ValueError):
+            parse_database_url('mysql://db/yatube')
+
+    def test_replica_mirrors_default_in_tests(self):
+        """Тест реплики-зеркала в тестах."""
+        databases = database_settings('sqlite:///a.sqlite3',
+                                      'sqlite:///b.sqlite3,sqlite:///c')
+        self.assertEqual(list(databases), ['default', 'replica', 'replica2'])
+        self.assertEqual(databases['replica2']['TEST'], {'MIRROR': 'default'})
+        self.assertNotIn('replica', database_settings('sqlite:///a'))
+
+    def test_router(self):
+        """Тест чтения из реплики только в read_only-коде."""
+        router = ReplicaRouter()
+        with override_settings(DATABASES=REPLICA_DATABASES):
+            self.assertEqual(router.db_for_read(Post), 'default')
+            with replica_reads():
+                self.assertEqual(router.db_for_read(Post), 'replica')
+                self.assertEqual(router.db_for_write(Post), 'default')
+        with override_settings(DATABASES={
+                'default': REPLICA_DATABASES['default']}), replica_reads():
+            self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_one_replica_per_block(self):
+        """Тест: все чтения блока идут в одну реплику."""
+        replica_urls = ','.join(f'sqlite:///{number}' for number in range(5))
+        databases = database_settings('sqlite:///a', replica_urls)
+        router = ReplicaRouter()
+        with override_settings(DATABASES=databases):
+            for _ in range(5):
+                with replica_reads():
+                    chosen = router.db_for_read(Post)
+                    with replica_reads():
+                        self.assertEqual({router.db_for_read(Post)
+                                          for _ in range(20)}, {chosen})
+
+    def test_sqlite_pragmas(self):
+        """Тест WAL и PRAGMA для файла SQLite."""
+        with tempfile.TemporaryDirectory() as directory:
+            database = DatabaseWrapper({
+                **connection.settings_dict,
+                'NAME': os.path.join(directory, 'wal.sqlite3'),
+                'PRAGMAS': {'synchronous': 'full'}}, alias='wal')
+            try:
+                with database.cursor() as cursor:
+                    for pragma, expected in (('journal_mode', 'wal'),
+                                             ('synchronous', 2),
+                                             ('busy_timeout', 5000)):
+                        with self.subTest(PRAGMA=pragma):
+                            cursor.execute(f'PRAGMA {pragma}')
+                            self.assertEqual(cursor.fetchone()[0], expected)
+            finally:
+                database.close()
+
+
+@override_settings(DATABASES=REPLICA_DATABASES)
+class ReplicaPinningTests(TestCase):
+    """Тесты прикрепления к основной базе после записи."""
+
+    def request(self, method='get', cookies=None, write=False):
+        """Прогоняет запрос через middleware: ответ и база чтения."""
+        used = []
+
+        @read_only
+        def view(request):
+            if write:
+                ReplicaRouter().db_for_write(Post)
+            used.append(ReplicaRouter().db_for_read(Post))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies or {})
+        response = ReplicaPinningMiddleware(view)(request)
+        return response, used[0]
+
+    def test_reads_go_to_replica(self):
+        """Тест чтения из реплики без записей."""
+        response, database = self.request()
+        self.assertEqual(database, 'replica')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_client(self):
+        """Тест чтения своих записей из основной базы."""
+        response, database = self.request(write=True)
+        self.assertEqual(database, 'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response, database = self.request(
+            cookies={PIN_COOKIE: response.cookies[PIN_COOKIE].value})
+        self.assertEqual(database, 'default')
+
+    def test_unsafe_method_pins_client(self):
+        """Тест прикрепления после POST-запроса."""
+        response, _ = self.request(method='post')
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+class ReplicaDatabaseTests(TestCase):
+    """Тесты со второй базой SQLite в роли реплики."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        replica = {**connection.settings_dict,
+                   'NAME': os.path.join(directory.name, 'replica.sqlite3'),
+                   'TEST': {}}
+        connections.settings['replica'] = replica
+        self.addCleanup(self.drop_replica)
+        override = override_settings(
+            DATABASES={**settings.DATABASES, 'replica': replica})
+        override.enable()
+        self.addCleanup(override.disable)
+        with connections['replica'].schema_editor() as editor:
+            for model in (User, Group, Post, Follow, AuthorStats):
+                editor.create_model(model)
+        # Реплика отстала: на ней другой пост, чем в основной базе.
+        author = User(pk=1, username='leo')
+        User.objects.using('replica').bulk_create([author])
+        Post.objects.using('replica').bulk_create(
+            [Post(text='С реплики', author=author)])
+        Post.objects.create(text='С основной', author=User.objects.create(
+            pk=1, username='leo'))
+
+    def drop_replica(self):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+
+    def request(self, method='get', cookies=None, write=False):
+        """Прогоняет запрос через middleware; отдаёт ответ и прочитанное."""
+        texts = []
+
+        @read_only
+        def view(request):
+            if write:
+                Post.objects.filter(pk=0).update(text='Запись')
+            texts.extend(Post.objects.values_list('text', flat=True))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies or {})
+        return ReplicaPinningMiddleware(view)(request), texts
+
+    def test_read_only_view_reads_replica(self):
+        """Тест: read_only-view читает из второй базы."""
+        _, texts = self.request()
+        self.assertEqual(texts, ['С реплики'])
+
+    def test_pinned_reads_go_to_default(self):
+        """Тест: после записи и с cookie чтения идут в основную базу."""
+        response, texts = self.request(method='post', write=True)
+        self.assertEqual(texts, ['С основной'])
+        _, texts = self.request(
+            cookies={PIN_COOKIE: response.cookies[PIN_COOKIE].value})
+        self.assertEqual(texts, ['С основной'])
+
+    @override_settings(
+        STREAMING_PAGES={'posts:post_detail': 5},
+        TEMPLATES=[{
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'OPTIONS': {'loaders': [('django.template.loaders.locmem.Loader', {
+                'page.html': '<main>{{ stream_marker }}</main>',
+                'rows.html': '{% for post in posts %}{{ post.text }}'
+                             '{% endfor %}',
+            })]},
+        }])
+    def test_streamed_list_reads_replica(self):
+        """Тест: список потоковой страницы читается из реплики, хотя его
+        обходят после выхода из read_only-view."""
+        @read_only
+        def view(request):
+            page = CursorPaginator(Post.objects.all(), 5).get_page()
+            return streaming.render(request, 'page.html', {'posts': page},
+                                    'posts', 'rows.html')
+
+        request = RequestFactory().get('/')
+        request.resolver_match = ResolverMatch(
+            view, (), {}, url_name='post_detail', namespaces=['posts'])
+        response = view(request)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content).decode(),
+                         '<main>С реплики</main>')
+
+    def test_follow_graph_filled_from_default(self):
+        """Тест: кэш подписок заполняется из основной базы и в
+        read_only-view, где реплика ещё не видит новую подписку."""
+        cache.clear()
+        author = User.objects.create(pk=2, username='tiger')
+        Follow.objects.create(user_id=1, author=author)
+        with replica_reads():
+            self.assertEqual(follow_graph.is_following(1, [2]), {2})
+        self.assertEqual(follow_graph.is_following(1, [2]), {2})
+
+    def test_missing_stats_built_on_default(self):
+        """Тест: недостающие счётчики собираются в основной базе и в
+        read_only-view."""
+        AuthorStats.objects.all().delete()
+        with replica_reads():
+            stats = counters.stats_for(User.objects.get(pk=1))
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats._state.db, 'default')
+        self.assertFalse(AuthorStats.objects.using('replica').exists())
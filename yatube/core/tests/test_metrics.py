@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..metrics import registry
+
+
+class MetricsTests(TestCase):
+    """Тесты метрик запросов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.guest_client = Client()
+
+    def test_request_metrics_by_view(self):
+        """Тест замеров запроса с меткой маршрута."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        self.guest_client.get(url)
+        view = 'posts:index'
+        self.assertEqual(
+            registry.value('yatube_request_duration_seconds', view=view), 2)
+        self.assertEqual(registry.value('yatube_requests_total', view=view,
+                                        status=200), 2)
+        checks = {
+            'yatube_db_queries_total': 1,
+            'yatube_db_query_seconds_total': 0,
+            'yatube_cache_hits_total': 0,
+            'yatube_cache_misses_total': 0,
+            'yatube_template_render_seconds_total': 0,
+            'yatube_response_bytes_total': 1000,
+        }
+        for name, minimum in checks.items():
+            with self.subTest(Метрика=name):
+                self.assertGreater(registry.value(name, view=view), minimum)
+        self.guest_client.get('/нет-такой-страницы/')
+        self.assertEqual(registry.value('yatube_requests_total',
+                                        view='unresolved', status=404), 1)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint(self):
+        """Тест выдачи метрик в формате Prometheus."""
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        text = response.content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram',
+                      text)
+        self.assertIn('yatube_request_duration_seconds_bucket{view='
+                      '"posts:index",le="+Inf"} 1', text)
+        self.assertIn('yatube_requests_total{status="200",'
+                      'view="posts:index"} 1', text)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        """Тест доступа к метрикам по токену."""
+        url = reverse('metrics')
+        self.assertEqual(self.guest_client.get(url).status_code,
+                         HTTPStatus.UNAUTHORIZED)
+        response = self.guest_client.get(
+            url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_hidden_without_token(self):
+        """Тест: без токена метрики открыты только при DEBUG."""
+        url = reverse('metrics')
+        self.assertEqual(self.guest_client.get(url).status_code,
+                         HTTPStatus.NOT_FOUND)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.guest_client.get(url).status_code,
+                             HTTPStatus.OK)
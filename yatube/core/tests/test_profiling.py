@@ -0,0 +1,107 @@
+import glob
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import profiling as profiler
+from ..profiling import profiling, save
+from ..profiling.middleware import ProfilingMiddleware
+
+PROFILER_DIR = tempfile.mkdtemp()
+
+
+def busy_view(request):
+    """Медленная view-функция: ждёт на процессоре и ходит в базу."""
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    Post.objects.count()
+    return HttpResponse('ok')
+
+
+@override_settings(PROFILER_ENABLED=True, PROFILER_DIR=PROFILER_DIR,
+                   PROFILER_INTERVAL=0.001, PROFILER_THRESHOLD=0.01,
+                   PROFILER_SAMPLE_RATE=0)
+class ProfilingTests(TestCase):
+    """Тесты профилировщика медленных запросов."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(PROFILER_DIR, ignore_errors=True)
+
+    def setUp(self):
+        for path in glob.glob(os.path.join(PROFILER_DIR, '*')):
+            os.remove(path)
+        self.request = RequestFactory().get(
+            reverse('posts:post_detail', args=[1]))
+
+    def test_slow_request_dumped(self):
+        """Тест дампа стеков и SQL медленного запроса."""
+        ProfilingMiddleware(busy_view)(self.request)
+        folded = glob.glob(os.path.join(PROFILER_DIR,
+                                        '*posts_post_detail*.folded'))
+        self.assertEqual(len(folded), 1)
+        with open(folded[0], encoding='utf-8') as file:
+            stacks = file.read()
+        self.assertIn('busy_view (core/tests/test_profiling.py', stacks)
+        with open(folded[0].replace('.folded', '.sql'),
+                  encoding='utf-8') as file:
+            self.assertIn('SELECT COUNT(*)', file.read())
+
+    def test_fast_request_not_dumped(self):
+        """Тест: быстрые запросы вне выборки не пишутся."""
+        with override_settings(PROFILER_THRESHOLD=10):
+            ProfilingMiddleware(busy_view)(self.request)
+        with override_settings(PROFILER_ENABLED=False):
+            ProfilingMiddleware(busy_view)(self.request)
+        self.assertEqual(os.listdir(PROFILER_DIR), [])
+
+    def test_profile_report(self):
+        """Тест сводного отчёта по дампам."""
+        with profiling(always=True) as session:
+            busy_view(self.request)
+        save(session, self.request)
+        out = StringIO()
+        merged = os.path.join(PROFILER_DIR, 'merged.txt')
+        call_command('profile_report', dir=PROFILER_DIR,
+                     view='posts:post_detail', folded=merged, stdout=out)
+        report = out.getvalue()
+        self.assertIn('Дампов: 1', report)
+        self.assertIn('busy_view', report)
+        self.assertIn('SELECT COUNT(*)', report)
+        self.assertTrue(os.path.getsize(merged))
+
+    @override_settings(PROFILER_MAX_FILES=2)
+    def test_old_dumps_removed(self):
+        """Тест: хранятся только последние PROFILER_MAX_FILES дампов."""
+        paths = []
+        for _ in range(3):
+            with profiling(always=True) as session:
+                busy_view(self.request)
+            paths.append(save(session, self.request))
+        self.assertEqual(sorted(os.listdir(PROFILER_DIR)), sorted(
+            os.path.basename(path).replace('.folded', suffix)
+            for path in paths[1:] for suffix in ('.folded', '.sql')))
+
+    def test_prune_skips_vanished_dumps(self):
+        """Тест: дамп, удалённый другим процессом, не мешает очистке, а
+        пока дампов меньше лимита, каталог не просматривается."""
+        os.symlink(os.path.join(PROFILER_DIR, 'нет'),
+                   os.path.join(PROFILER_DIR, 'vanished.folded'))
+        with mock.patch.object(profiler, '_dumps', None):
+            profiler._prune(PROFILER_DIR, 5)
+            self.assertEqual(profiler._dumps, 0)
+            with mock.patch('os.scandir') as scandir:
+                profiler._prune(PROFILER_DIR, 5)
+            scandir.assert_not_called()
@@ -1,6 +1,11 @@
 from http import HTTPStatus
 
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from .metrics import registry
 
 
 def page_not_found(request, exception):
@@ -21,3 +26,21 @@ def permission_denied(request, exception):
 
 def server_error(request):
     return render(request, 'core/500.html', HTTPStatus.INTERNAL_SERVER_ERROR)
+
+
+def metrics(request):
+    """Метрики процесса в текстовом формате Prometheus.
+
+    Без ``METRICS_TOKEN`` адрес открыт только при DEBUG, иначе его будто
+    нет: по метрикам видно устройство сайта.
+    """
+    if not settings.METRICS_TOKEN:
+        if not settings.DEBUG:
+            raise Http404
+    elif not constant_time_compare(
+            request.headers.get('Authorization', ''),
+            f'Bearer {settings.METRICS_TOKEN}'):
+        return HttpResponse(status=HTTPStatus.UNAUTHORIZED)
+    return HttpResponse(registry.render(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
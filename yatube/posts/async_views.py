@@ -0,0 +1,87 @@
+"""Асинхронные версии страниц для чтения, их подключает ASGI.
+
+У ORM и шаблонов Django 3.2 нет асинхронного API, поэтому запросы к
+базе и рендеринг выполняет синхронная view-функция в отдельном потоке,
+а корутина только ждёт ответа. Соединения клиентов держит цикл событий:
+медленный клиент не занимает поток, пока отправляет запрос и читает
+ответ, а попадания в кэш страниц (``AnonymousPageCacheMiddleware``)
+обходятся совсем без потоков.
+
+Каждая view-функция получает свой поток и свои соединения с базой, поэтому
+одновременно их выполняется не больше ``concurrency()``: остальные
+запросы ждут в цикле событий, а не открывают лишние потоки и соединения
+сверх пула.
+"""
+import asyncio
+import weakref
+from functools import wraps
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import views
+
+
+def _close_connections():
+    # Поток запроса живёт столько же, сколько запрос, поэтому его
+    # соединения закрываются здесь же: иначе их не вернуть в пул.
+    # Внутри транзакции (тесты) соединение не трогаем.
+    for connection in connections.all():
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def concurrency():
+    """Предел одновременных view-функций процесса.
+
+    Не больше ``ASYNC_VIEWS_CONCURRENCY`` и не больше ``MAX_SIZE`` пула
+    соединений любой базы: поток держит по соединению с каждой базой.
+    """
+    sizes = [settings.ASYNC_VIEWS_CONCURRENCY]
+    for connection in connections.all():
+        pool = connection.settings_dict.get('POOL')
+        if pool:
+            sizes.append(pool.get('MAX_SIZE', 10))
+    return min(sizes)
+
+
+# Семафор привязан к циклу событий, поэтому у каждого цикла он свой.
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _semaphore():
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(concurrency())
+    return semaphore
+
+
+def _async(view):
+    @wraps(view)
+    def run(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _close_connections()
+
+    run = sync_to_async(run)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # Без своего контекста Django 3.2 выполняет весь синхронный код
+        # в одном общем потоке, и запросы шли бы по очереди.
+        async with _semaphore(), ThreadSensitiveContext():
+            return await run(request, *args, **kwargs)
+    return wrapper
+
+
+index = _async(views.index)
+trending = _async(views.trending)
+group_directory = _async(views.group_directory)
+group_posts = _async(views.group_posts)
+profile = _async(views.profile)
+post_detail = _async(views.post_detail)
+post_search = _async(views.post_search)
+follow_index = _async(views.follow_index)
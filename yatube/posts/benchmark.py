@@ -0,0 +1,171 @@
+"""Набор данных и замеры запросов для всех страниц posts и users.
+
+Используется тестом бюджетов запросов и командой ``benchmark_views``.
+"""
+import random
+import time
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+
+from . import counters, rankings, timeline
+from .models import Comment, Follow, Group, Post, User
+
+# Допустимое число SQL-запросов на один показ страницы с холодным кэшем.
+# Группа, профиль и пост тратят ещё по запросу на ETag (см. conditional).
+# Комментарий и подписка считаются с TASKS_EAGER (тесты, разработка), где
+# фоновые задачи идут в самом запросе; с воркером вместо них - по INSERT
+# задачи в очередь.
+QUERY_BUDGETS = {
+    'posts:index': 1,
+    'posts:trending': 2,
+    'posts:group_directory': 1,
+    'posts:group_list': 3,
+    'posts:profile': 6,
+    'posts:post_detail': 3,
+    'posts:post_create': 3,
+    'posts:post_edit': 5,
+    'posts:add_comment': 7,
+    'posts:search': 2,
+    'posts:follow_index': 4,
+    'posts:profile_follow': 15,
+    'posts:profile_unfollow': 11,
+    'users:signup': 0,
+    'users:login': 0,
+    'users:password_reset_form': 0,
+    'users:logout': 4,
+}
+
+
+def seed(users=1000, groups=20, posts=10000, comments=20000, follows=10000,
+         seed_value=0, batch_size=1000):
+    """Заполняет базу правдоподобными данными через bulk_create."""
+    fake = Faker('ru_RU')
+    Faker.seed(seed_value)
+    rnd = random.Random(seed_value)
+    User.objects.bulk_create(
+        (User(username=f'{fake.user_name()}{i}',
+              first_name=fake.first_name(), last_name=fake.last_name())
+         for i in range(users)), batch_size)
+    Group.objects.bulk_create(
+        (Group(title=fake.sentence(nb_words=3)[:200], slug=f'group-{i}',
+               description=fake.paragraph())
+         for i in range(groups)), batch_size)
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    group_ids = list(Group.objects.values_list('pk', flat=True)) + [None]
+    Post.objects.bulk_create(
+        (Post(text=fake.paragraph(nb_sentences=5),
+              author_id=rnd.choice(user_ids),
+              group_id=rnd.choice(group_ids))
+         for _ in range(posts)), batch_size)
+    start = timezone.now() - timedelta(days=365)
+    Post.objects.bulk_update(
+        [Post(pk=pk, pub_date=start + timedelta(minutes=number))
+         for number, pk in enumerate(
+             Post.objects.order_by('pk').values_list('pk', flat=True))],
+        ['pub_date'], batch_size)
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        (Comment(post_id=rnd.choice(post_ids),
+                 author_id=rnd.choice(user_ids),
+                 text=fake.sentence())
+         for _ in range(comments)), batch_size)
+    pairs = {tuple(rnd.sample(user_ids, 2)) for _ in range(follows)}
+    Follow.objects.bulk_create(
+        (Follow(author_id=author, user_id=user) for author, user in pairs),
+        batch_size, ignore_conflicts=True)
+    counters.reconcile(batch_size=batch_size)
+    for user in User.objects.filter(follower__isnull=False).distinct():
+        timeline.rebuild(user)
+    rankings.update()
+
+
+def routes():
+    """Все маршруты posts.urls и users.urls на засеянных данных.
+
+    Каждый элемент: (имя маршрута, адрес, метод, нужна ли авторизация).
+    """
+    reader = User.objects.order_by('-stats__following_count').first()
+    author = User.objects.exclude(pk=reader.pk).order_by(
+        '-stats__posts_count').first()
+    own_post = (Post.objects.filter(author=reader).first()
+                or Post.objects.create(text='Пост для замеров', author=reader))
+    busy_post = Post.objects.annotate(
+        comments_count=Count('comments')).order_by('-comments_count').first()
+    group = Group.objects.first()
+    return [
+        ('posts:index', reverse('posts:index'), 'get', False),
+        ('posts:trending', reverse('posts:trending'), 'get', False),
+        ('posts:group_directory', reverse('posts:group_directory'), 'get',
+         False),
+        ('posts:group_list',
+         reverse('posts:group_list', args=[group.slug]), 'get', False),
+        ('posts:profile',
+         reverse('posts:profile', args=[author.username]), 'get', True),
+        ('posts:post_detail',
+         reverse('posts:post_detail', args=[busy_post.pk]), 'get', False),
+        ('posts:post_create', reverse('posts:post_create'), 'get', True),
+        ('posts:post_edit',
+         reverse('posts:post_edit', args=[own_post.pk]), 'get', True),
+        ('posts:add_comment',
+         reverse('posts:add_comment', args=[busy_post.pk]), 'post', True),
+        ('posts:search', reverse('posts:search') + '?q=' + quote(
+            busy_post.text.split()[0]), 'get', False),
+        ('posts:follow_index', reverse('posts:follow_index'), 'get', True),
+        ('posts:profile_follow',
+         reverse('posts:profile_follow', args=[author.username]), 'get',
+         True),
+        ('posts:profile_unfollow',
+         reverse('posts:profile_unfollow', args=[author.username]), 'get',
+         True),
+        ('users:signup', reverse('users:signup'), 'get', False),
+        ('users:login', reverse('users:login'), 'get', False),
+        ('users:password_reset_form',
+         reverse('users:password_reset_form'), 'get', True),
+        ('users:logout', reverse('users:logout'), 'get', True),
+    ], reader
+
+
+def measure(client, method, url, data=None):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = getattr(client, method)(url, data or {})
+        elapsed = time.perf_counter() - started
+    return {
+        'status': response.status_code,
+        'queries': len(queries),
+        'time_ms': round(elapsed * 1000, 2),
+        'bytes': len(getattr(response, 'content', b'')),
+    }
+
+
+def run(budgets=QUERY_BUDGETS):
+    """Замеряет каждый маршрут с холодным и тёплым кэшем.
+
+    Возвращает отчёт: список замеров и список превышений бюджета.
+    """
+    route_list, reader = routes()
+    client, guest = Client(), Client()
+    client.force_login(reader)
+    results, violations = [], []
+    for name, url, method, auth in route_list:
+        active = client if auth else guest
+        data = {'text': 'Комментарий'} if method == 'post' else None
+        cache.clear()
+        cold = measure(active, method, url, data)
+        warm = measure(active, method, url, data)
+        results.append({'name': name, 'url': url, 'cold': cold,
+                        'warm': warm, 'budget': budgets.get(name)})
+        if name in budgets and cold['queries'] > budgets[name]:
+            violations.append(
+                f'{name}: {cold["queries"]} запросов при бюджете '
+                f'{budgets[name]}')
+    return {'results': results, 'violations': violations}
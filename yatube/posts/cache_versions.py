@@ -0,0 +1,92 @@
+"""Версии лент для ключей кэша фрагментов.
+
+У каждой ленты есть счётчик-поколение: общий (``index``), по группе и по
+автору. Он входит в ключ ``{% cache %}`` и увеличивается при создании,
+правке и удалении поста, поэтому фрагменты можно хранить часами, а
+устаревают они ровно тогда, когда меняется их лента. Рядом хранится время
+последнего изменения ленты для заголовка Last-Modified.
+"""
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+INDEX = 'index'
+# Страницы из таблиц рейтингов; сдвигается после их пересчёта.
+RANKINGS = 'rankings'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def profile_scope(user_id):
+    """Шапка профиля: счётчики подписчиков и подписок."""
+    return f'profile:{user_id}'
+
+
+def _key(scope):
+    return f'feed-version:{scope}'
+
+
+def _modified_key(scope):
+    return f'feed-modified:{scope}'
+
+
+def _fresh():
+    # Счётчик, выпавший из кэша, начинается с текущего времени, а не с
+    # единицы, чтобы не совпасть со старыми фрагментами.
+    return int(time.time() * 1000)
+
+
+def get_versions(scopes):
+    """Версии нескольких лент одним обращением к кэшу."""
+    versions = cache.get_many([_key(scope) for scope in scopes])
+    return [versions.get(_key(scope)) or get_version(scope)
+            for scope in scopes]
+
+
+def get_version(scope):
+    version = cache.get(_key(scope))
+    if version is None:
+        version = _fresh()
+        if not cache.add(_key(scope), version, None):
+            version = cache.get(_key(scope), version)
+    return version
+
+
+def last_modified(scope):
+    """Время последнего изменения ленты.
+
+    Если оно выпало из кэша, лента считается изменённой сейчас.
+    """
+    now = int(time.time())
+    if not cache.add(_modified_key(scope), now, None):
+        now = cache.get(_modified_key(scope), now)
+    return datetime.fromtimestamp(now, timezone.utc)
+
+
+def bump(*scopes):
+    now = int(time.time())
+    for scope in scopes:
+        try:
+            cache.incr(_key(scope))
+        except ValueError:
+            cache.set(_key(scope), _fresh(), None)
+    cache.set_many({_modified_key(scope): now for scope in scopes}, None)
+
+
+def post_scopes(group_id, author_id):
+    """Ленты, в которых виден пост."""
+    scopes = [INDEX, author_scope(author_id)]
+    if group_id is not None:
+        scopes.append(group_scope(group_id))
+    return scopes
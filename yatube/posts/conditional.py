@@ -0,0 +1,125 @@
+"""Валидаторы ETag и Last-Modified для лент и страницы поста.
+
+Их считают до вызова view-функции (``django.views.decorators.http.
+condition``), и при совпадении с заголовками клиента ответ 304 уходит без
+рендеринга шаблона. Главной ленте хватает версии из кэша (см.
+``cache_versions``), группе и профилю - ещё одного запроса, странице
+поста - одного запроса за временем правки, последним комментарием и
+числом комментариев.
+
+В ETag входят адрес страницы с курсором и cookie сессии и CSRF: шапка и
+формы зависят от того, кто смотрит страницу. Когда клиент присылает
+If-None-Match, Django сверяет только ETag.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.views.decorators.http import condition
+
+from . import cache_versions, follow_graph
+from .models import AuthorStats, Group, Post
+
+
+def make_etag(request, *parts):
+    viewer = (request.COOKIES.get(settings.SESSION_COOKIE_NAME, ''),
+              request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''))
+    payload = repr((request.get_full_path(), viewer) + parts)
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+def _index_etag(request):
+    return make_etag(request,
+                     cache_versions.get_version(cache_versions.INDEX))
+
+
+def _index_last_modified(request):
+    return cache_versions.last_modified(cache_versions.INDEX)
+
+
+index = condition(etag_func=_index_etag,
+                  last_modified_func=_index_last_modified)
+
+
+def _rankings_etag(request):
+    return make_etag(request,
+                     cache_versions.get_version(cache_versions.RANKINGS))
+
+
+def _rankings_last_modified(request):
+    return cache_versions.last_modified(cache_versions.RANKINGS)
+
+
+rankings = condition(etag_func=_rankings_etag,
+                     last_modified_func=_rankings_last_modified)
+
+
+def _group_scope(request, slug):
+    if not hasattr(request, '_group_scope'):
+        group_id = Group.objects.filter(slug=slug).values_list(
+            'pk', flat=True).first()
+        request._group_scope = (
+            group_id and cache_versions.group_scope(group_id))
+    return request._group_scope
+
+
+def _group_etag(request, slug):
+    scope = _group_scope(request, slug)
+    return scope and make_etag(request, cache_versions.get_version(scope))
+
+
+def _group_last_modified(request, slug):
+    scope = _group_scope(request, slug)
+    return scope and cache_versions.last_modified(scope)
+
+
+group_posts = condition(etag_func=_group_etag,
+                        last_modified_func=_group_last_modified)
+
+
+def _profile_etag(request, username):
+    # Подписка и затем отписка возвращают счётчики к прежним значениям,
+    # поэтому в ETag входят версия шапки профиля, которую сдвигает каждая
+    # из них, и сама подписка смотрящего - она видна ему сразу.
+    stats = AuthorStats.objects.filter(user__username=username).values_list(
+        'user_id', 'posts_count', 'followers_count',
+        'following_count').first()
+    if stats is None:
+        return None
+    author_id = stats[0]
+    following = (request.user.is_authenticated and bool(
+        follow_graph.is_following(request.user.pk, [author_id])))
+    return make_etag(request, *cache_versions.get_versions([
+        cache_versions.author_scope(author_id),
+        cache_versions.profile_scope(author_id)]), stats, following)
+
+
+profile = condition(etag_func=_profile_etag)
+
+
+def _post_state(request, post_id):
+    if not hasattr(request, '_post_state'):
+        request._post_state = Post.objects.filter(pk=post_id).order_by(
+        ).annotate(last_comment=Max('comments__pub_date'),
+                   comments_count=Count('comments')).values_list(
+            'updated_at', 'last_comment', 'comments_count',
+            'author__stats__posts_count'
+        ).first()
+    return request._post_state
+
+
+def _post_etag(request, post_id):
+    # Удаление или правка старого комментария не меняют время последнего,
+    # поэтому в ETag входят число комментариев и версия страницы поста.
+    state = _post_state(request, post_id)
+    return state and make_etag(request, state, cache_versions.get_version(
+        cache_versions.post_scope(post_id)))
+
+
+def _post_last_modified(request, post_id):
+    state = _post_state(request, post_id)
+    return state and max(filter(None, state[:2]))
+
+
+post_detail = condition(etag_func=_post_etag,
+                        last_modified_func=_post_last_modified)
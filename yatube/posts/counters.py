@@ -0,0 +1,90 @@
+"""Денормализованные счётчики постов, подписчиков и подписок.
+
+Счётчики меняются сигналами при создании и удалении постов и подписок,
+поэтому страницам профиля и поста не нужны запросы ``COUNT(*)``.
+Расхождения исправляет команда ``reconcile_counters``.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Follow, Post, User
+
+COUNTED = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def increment(user_id, **deltas):
+    """Сдвигает счётчики пользователя, например ``posts_count=1``.
+
+    Отсутствующая строка не создаётся: её соберёт ``stats_for`` при
+    первом чтении.
+    """
+    AuthorStats.objects.filter(user_id=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def step_down(user_id, field, value):
+    """Уменьшает счётчик на единицу, только если он равен ``value``.
+
+    Одно условное UPDATE: из одновременных уменьшений ровно одно увидит
+    переход через ``value``. Возвращает, было ли уменьшение.
+    """
+    return bool(AuthorStats.objects.filter(
+        user_id=user_id, **{field: value}
+    ).update(**{field: F(field) - 1}))
+
+
+def _real_count(field):
+    model, column = COUNTED[field]
+    counts = (model.objects.filter(**{column: OuterRef('pk')})
+              .order_by().values(column)
+              .annotate(total=Count('pk')).values('total'))
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def with_real_counts(users):
+    return users.annotate(**{
+        f'real_{field}': _real_count(field) for field in COUNTED
+    })
+
+
+def reconcile(users=None, batch_size=1000):
+    """Сверяет счётчики с таблицами; возвращает число исправленных строк."""
+    users = with_real_counts(users if users is not None
+                             else User.objects.all())
+    stale, missing = [], []
+    for user in users.select_related('stats').iterator(batch_size):
+        real = {field: getattr(user, f'real_{field}') for field in COUNTED}
+        try:
+            stats = user.stats
+        except AuthorStats.DoesNotExist:
+            missing.append(AuthorStats(user=user, **real))
+            continue
+        if any(getattr(stats, field) != value
+               for field, value in real.items()):
+            for field, value in real.items():
+                setattr(stats, field, value)
+            stale.append(stats)
+    AuthorStats.objects.bulk_update(stale, list(COUNTED), batch_size)
+    AuthorStats.objects.bulk_create(missing, batch_size,
+                                    ignore_conflicts=True)
+    return len(stale) + len(missing)
+
+
+def stats_for(user):
+    """Счётчики пользователя.
+
+    Строку заводит сигнал при регистрации. Если её всё же нет (например,
+    пользователей добавили через ``bulk_create``), она собирается на
+    месте - всегда в основной базе, даже внутри read_only-view: реплика
+    не увидела бы только что созданную строку.
+    """
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        reconcile(User.objects.using('default').filter(pk=user.pk))
+        return AuthorStats.objects.using('default').get(user_id=user.pk)
@@ -0,0 +1,38 @@
+"""Запросы лент, общие для view-функций и проверки индексов."""
+from .models import AuthorRank, GroupRank, Post, PostRank
+
+
+def index_feed():
+    return Post.objects.select_related('author', 'group')
+
+
+def group_feed(group):
+    return group.posts_of_group.select_related('author')
+
+
+def profile_feed(author):
+    return author.posts.select_related('group')
+
+
+def post_detail():
+    return Post.objects.select_related('author__stats', 'group')
+
+
+def comment_feed(post):
+    """Комментарии поста вместе с авторами, от старых к новым."""
+    return post.comments.select_related('author')
+
+
+def trending_feed():
+    """Популярные посты из рейтинга; ключ страниц - ``(-score, -post_id)``."""
+    return PostRank.objects.select_related('post__author', 'post__group')
+
+
+def group_directory():
+    """Группы по рейтингу; ключ страниц - ``(-score, group_id)``."""
+    return GroupRank.objects.select_related('group')
+
+
+def top_authors(limit):
+    return AuthorRank.objects.select_related('author').order_by(
+        '-score', '-author')[:limit]
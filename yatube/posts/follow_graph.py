@@ -0,0 +1,130 @@
+"""Граф подписок в кэше.
+
+Для каждого пользователя в кэше лежит отсортированный массив id авторов,
+на которых он подписан (``array('I')`` в байтах: 4 байта на подписку).
+Списки нескольких пользователей читаются одним ``get_many``, а чего нет
+в кэше, добирается из ``Follow`` одним запросом, поэтому отметить
+подписки у целой страницы авторов стоит не больше одного запроса.
+
+Список подписчика сбрасывается при подписке и отписке (см. сигналы):
+сразу, чтобы он видел свою запись, и после коммита - чтобы чтение из
+другого запроса до коммита не оставило в кэше старый список.
+"""
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import AuthorStats, Follow
+
+
+def _key(user_id):
+    return f'follow-graph:{user_id}'
+
+
+def _encode(author_ids):
+    return array('I', sorted(author_ids)).tobytes()
+
+
+def _decode(data):
+    authors = array('I')
+    authors.frombytes(data)
+    return authors
+
+
+def _contains(authors, author_id):
+    position = bisect_left(authors, author_id)
+    return position < len(authors) and authors[position] == author_id
+
+
+def following(user_ids):
+    """Подписки пользователей: id -> отсортированный массив id авторов."""
+    user_ids = set(user_ids)
+    cached = cache.get_many([_key(user_id) for user_id in user_ids])
+    graph = {user_id: _decode(cached[_key(user_id)])
+             for user_id in user_ids if _key(user_id) in cached}
+    missing = user_ids - graph.keys()
+    if not missing:
+        return graph
+    loaded = {user_id: [] for user_id in missing}
+    # Список живёт в кэше сутки, поэтому читается из основной базы даже
+    # в read_only-view: отставшая реплика закэшировала бы старые подписки.
+    for user_id, author_id in Follow.objects.using('default').filter(
+            user_id__in=missing).values_list('user_id', 'author_id'):
+        loaded[user_id].append(author_id)
+    encoded = {user_id: _encode(authors)
+               for user_id, authors in loaded.items()}
+    cache.set_many({_key(user_id): data
+                    for user_id, data in encoded.items()},
+                   settings.FOLLOW_GRAPH_TIMEOUT)
+    graph.update((user_id, _decode(data))
+                 for user_id, data in encoded.items())
+    return graph
+
+
+def is_following(user_id, author_ids):
+    """Те из ``author_ids``, на кого подписан пользователь."""
+    authors = following([user_id])[user_id]
+    return {author_id for author_id in author_ids
+            if _contains(authors, author_id)}
+
+
+def mutual(user_id, other_ids=None):
+    """Взаимные подписки: кто из ``other_ids`` подписан на пользователя
+    и на кого подписан он сам. Без ``other_ids`` - все его подписки.
+    """
+    authors = following([user_id])[user_id]
+    if other_ids is None:
+        other_ids = authors
+    candidates = [other_id for other_id in other_ids
+                  if _contains(authors, other_id)]
+    graph = following(candidates)
+    return {other_id for other_id in candidates
+            if _contains(graph[other_id], user_id)}
+
+
+def counts(user_ids):
+    """Число подписчиков и подписок: id -> (подписчики, подписки).
+
+    Берутся из денормализованных счётчиков ``AuthorStats`` одним
+    запросом; у кого строки ещё нет, получает нули.
+    """
+    found = {user_id: (followers, follows)
+             for user_id, followers, follows
+             in AuthorStats.objects.filter(user_id__in=user_ids).values_list(
+                 'user_id', 'followers_count', 'following_count')}
+    return {user_id: found.get(user_id, (0, 0)) for user_id in user_ids}
+
+
+def suggestions(user_id, limit=5):
+    """Авторы, на которых подписаны подписки пользователя.
+
+    Чем больше его подписок читают автора, тем он выше. Пока подписок
+    нет, предлагаются авторы с наибольшим числом подписчиков.
+    """
+    authors = following([user_id])[user_id]
+    exclude = set(authors) | {user_id}
+    friends = list(authors)[:settings.FOLLOW_GRAPH_SUGGEST_FROM]
+    ranked = Counter()
+    for friend_authors in following(friends).values():
+        ranked.update(author_id for author_id in friend_authors
+                      if author_id not in exclude)
+    suggested = [author_id for author_id, _ in sorted(
+        ranked.items(), key=lambda item: (-item[1], item[0]))][:limit]
+    if len(suggested) < limit:
+        exclude.update(suggested)
+        popular = AuthorStats.objects.filter(followers_count__gt=0).order_by(
+            '-followers_count', 'user_id').values_list('user_id', flat=True)
+        suggested += [author_id for author_id in popular[:limit + len(exclude)]
+                      if author_id not in exclude][:limit - len(suggested)]
+    return suggested
+
+
+def invalidate(*user_ids):
+    """Сбрасывает списки подписок пользователей."""
+    keys = [_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
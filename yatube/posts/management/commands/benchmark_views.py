@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Засевает временную базу, обходит все страницы posts и users '
+            'и пишет JSON-отчёт о запросах, времени и размере ответов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default='benchmark.json',
+                            help='Файл отчёта; "-" - вывод в консоль.')
+
+    def handle(self, *args, **options):
+        # Замеры идут во временной базе, как в тестах: рабочие данные
+        # не трогаются.
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=False)
+        try:
+            with override_settings(DEBUG=False):
+                benchmark.seed(
+                    users=options['users'], groups=options['groups'],
+                    posts=options['posts'], comments=options['comments'],
+                    follows=options['follows'], seed_value=options['seed'])
+                report = benchmark.run()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        report['dataset'] = {key: options[key] for key in (
+            'users', 'groups', 'posts', 'comments', 'follows', 'seed')}
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(text)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(text)
+        for row in report['results']:
+            self.stdout.write(
+                f'{row["name"]:<28} {row["cold"]["queries"]:>3} запр. '
+                f'{row["cold"]["time_ms"]:>9} мс {row["cold"]["bytes"]:>8} Б')
+        if report['violations']:
+            raise CommandError('Превышены бюджеты запросов:\n'
+                               + '\n'.join(report['violations']))
@@ -0,0 +1,85 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts import feeds
+from posts.models import Follow, Group, Post, User
+from posts.paginator import CursorPaginator
+from posts.timeline import TimelineFeed, celebrities_followed_by
+
+# Признаки плана без подходящего индекса: полный проход по таблице или
+# сортировка во временной структуре.
+BAD_PLANS = {
+    'sqlite': (
+        re.compile(r'\bSCAN (TABLE )?\w+( AS \w+)?$'),
+        re.compile(r'USE TEMP B-TREE'),
+    ),
+    'postgresql': (
+        re.compile(r'Seq Scan'),
+        re.compile(r'(^|->\s*)Sort\b'),
+    ),
+}
+
+
+def feed_queries():
+    """Запросы, которые выполняют view-функции posts/views.py."""
+    author, user, group = User(pk=1), User(pk=2), Group(pk=1)
+    position = [timezone.now(), 1]
+    per_page = 10
+
+    def seek(queryset, ordering=('-pub_date', '-id'), values=position):
+        return CursorPaginator(queryset, per_page,
+                               ordering).page_queryset(values)
+
+    return {
+        'index': seek(feeds.index_feed()),
+        'index (первая страница)': CursorPaginator(
+            feeds.index_feed(), per_page).page_queryset(),
+        'group_list': seek(feeds.group_feed(group)),
+        'profile': seek(feeds.profile_feed(author)),
+        'profile (подписка)': Follow.objects.filter(
+            user_id__in=[user.pk]).values_list('user_id', 'author_id'),
+        'post_detail': feeds.post_detail().filter(pk=1),
+        'post_detail (комментарии)': CursorPaginator(
+            feeds.comment_feed(Post(pk=1)), per_page, ('pub_date', 'id')
+        ).page_queryset(position),
+        'follow_index': TimelineFeed(user).entries_page(position, True,
+                                                        per_page),
+        'follow_index (популярные авторы)': celebrities_followed_by(user),
+        'follow_index (посты популярного автора)': seek(
+            Post.objects.filter(author=author).select_related('author',
+                                                              'group')),
+        'trending': seek(feeds.trending_feed(), ('-score', '-post_id'),
+                         [1.0, 1]),
+        'trending (авторы)': feeds.top_authors(per_page),
+        'group_directory': seek(feeds.group_directory(),
+                                ('-score', 'group_id'), [1.0, 1]),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Выполняет EXPLAIN для запросов лент и завершается ошибкой, '
+            'если какой-то из них не использует индекс.')
+
+    def handle(self, *args, **options):
+        patterns = BAD_PLANS.get(connection.vendor)
+        if patterns is None:
+            raise CommandError(
+                f'Разбор планов для {connection.vendor} не поддерживается.')
+        failed = []
+        for name, queryset in feed_queries().items():
+            plan = queryset.explain()
+            bad = [line for line in plan.splitlines()
+                   if any(pattern.search(line) for pattern in patterns)]
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{name}:\n{plan}\n')
+            if bad:
+                failed.append(name)
+                self.stderr.write(f'{name}: ' + '; '.join(
+                    line.strip() for line in bad))
+        if failed:
+            raise CommandError('Запросы без индекса: ' + ', '.join(failed))
+        self.stdout.write(self.style.SUCCESS('Все запросы лент используют '
+                                             'индексы.'))
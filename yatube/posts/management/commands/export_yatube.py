@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии и подписки '
+            'в каталог NDJSON- или CSV-файлов вместе с картинками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--format', choices=transfer.FORMATS,
+                            default='ndjson')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        totals = transfer.export(
+            options['directory'], fmt=options['format'],
+            batch_size=options['batch_size'], report=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено строк: {sum(totals.values())} за '
+            f'{time.monotonic() - started:.1f} с'))
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Q
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def _generate(post_id):
+    try:
+        thumbnails.generate(post_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = ('Готовит миниатюры и адаптивные варианты для картинок постов, '
+            'у которых их ещё нет.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересобрать миниатюры всех картинок.')
+        parser.add_argument('--workers', type=int,
+                            default=settings.THUMBNAIL_WORKERS)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            posts = posts.filter(Q(thumbnails={}) | Q(image_variants={}))
+        post_ids = posts.values_list('pk', flat=True).iterator()
+        done = 0
+        with ThreadPoolExecutor(options['workers']) as pool:
+            for _ in pool.map(_generate, post_ids):
+                done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Подготовлены миниатюры для постов: {done}'))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Загружает выгрузку export_yatube пачками через bulk_create, '
+            'фиксируя транзакцию каждые несколько пачек.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--batches-per-transaction', type=int,
+                            default=10)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        totals = transfer.import_(
+            options['directory'], batch_size=options['batch_size'],
+            batches_per_transaction=options['batches_per_transaction'],
+            report=self.stdout.write)
+        if not totals:
+            raise CommandError(
+                f'В {options["directory"]} нет файлов выгрузки')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено строк: {sum(totals.values())} за '
+            f'{time.monotonic() - started:.1f} с'))
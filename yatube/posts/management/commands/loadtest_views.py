@@ -0,0 +1,116 @@
+import asyncio
+import importlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import clear_url_caches
+
+from posts import benchmark
+
+# Страницы для чтения, которые под ASGI обслуживают корутины.
+READ_ROUTES = ('posts:index', 'posts:group_list', 'posts:profile',
+               'posts:post_detail', 'posts:search')
+
+
+def _reload_urls():
+    importlib.reload(importlib.import_module('posts.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+class Command(BaseCommand):
+    help = ('Засевает временную базу и сравнивает пропускную способность '
+            'страниц для чтения через WSGI (потоки) и ASGI (корутины).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=32,
+                            help='Одновременных клиентов.')
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Запросов в каждом режиме.')
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=4000)
+        parser.add_argument('--page-cache', action='store_true',
+                            help='Не отключать кэш страниц.')
+
+    def urls(self):
+        route_list, _ = benchmark.routes()
+        return [url for name, url, method, auth in route_list
+                if name in READ_ROUTES]
+
+    def run_wsgi(self, urls, options):
+        latencies, lock = [], threading.Lock()
+        counter = iter(range(options['requests']))
+
+        def worker():
+            client, own = Client(), []
+            for number in counter:
+                started = time.perf_counter()
+                client.get(urls[number % len(urls)])
+                own.append(time.perf_counter() - started)
+            with lock:
+                latencies.extend(own)
+
+        threads = [threading.Thread(target=worker)
+                   for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, time.perf_counter() - started
+
+    async def run_asgi(self, urls, options):
+        latencies = []
+        counter = iter(range(options['requests']))
+
+        async def worker():
+            client = AsyncClient()
+            for number in counter:
+                started = time.perf_counter()
+                await client.get(urls[number % len(urls)])
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker()
+                               for _ in range(options['concurrency'])))
+        return latencies, time.perf_counter() - started
+
+    def report(self, name, latencies, elapsed):
+        values = sorted(latencies)
+        p50 = values[len(values) // 2] * 1000
+        p95 = values[int(len(values) * 0.95)] * 1000
+        rate = len(values) / elapsed
+        self.stdout.write(f'{name:<5} {rate:>8.0f} запр./с  '
+                          f'p50 {p50:>7.1f} мс  p95 {p95:>7.1f} мс')
+        return rate
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=False)
+        page_cache = options['page_cache']
+        try:
+            with override_settings(DEBUG=False,
+                                   PAGE_CACHE_ENABLED=page_cache):
+                benchmark.seed(users=options['users'], groups=10,
+                               posts=options['posts'],
+                               comments=options['comments'],
+                               follows=options['users'] * 5)
+                urls = self.urls()
+                wsgi = self.report('WSGI', *self.run_wsgi(urls, options))
+                try:
+                    with override_settings(ASYNC_VIEWS=True):
+                        _reload_urls()
+                        asgi = self.report('ASGI', *asyncio.run(
+                            self.run_asgi(urls, options)))
+                finally:
+                    _reload_urls()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.stdout.write(self.style.SUCCESS(
+            f'ASGI/WSGI по пропускной способности: {asgi / wsgi:.2f}'))
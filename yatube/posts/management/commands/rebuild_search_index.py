@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = ('Заново строит поисковый индекс постов и комментариев, '
+            'читая их пачками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = search.rebuild(
+            batch_size=options['batch_size'],
+            progress=lambda done: self.stdout.write(
+                f'Проиндексировано: {done}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс перестроен: {total} записей за '
+            f'{time.monotonic() - started:.1f} с'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики постов и подписок с данными и чинит расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = counters.reconcile(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: {fixed}'))
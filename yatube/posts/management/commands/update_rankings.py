@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts import rankings
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинги постов, групп и авторов для страниц '
+            '«Популярное» и каталога групп.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=None,
+                            help='Пересчитывать раз в столько секунд, '
+                                 'а не один раз.')
+
+    def report(self, sizes):
+        self.stdout.write(self.style.SUCCESS(', '.join(
+            f'{name}: {size}' for name, size in sizes.items())))
+
+    def handle(self, *args, **options):
+        if options['every'] is None:
+            self.report(rankings.update())
+            return
+        try:
+            while True:
+                started = time.monotonic()
+                self.report(rankings.update())
+                close_old_connections()
+                time.sleep(max(0, options['every']
+                               - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            pass
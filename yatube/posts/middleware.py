@@ -0,0 +1,84 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+
+from . import page_cache
+
+SAFE_METHODS = ('GET', 'HEAD')
+# Что сделать с ответом view-функции, если страница не нашлась в кэше.
+PASS, PRIVATE = 'pass', 'private'
+
+
+class AnonymousPageCacheMiddleware:
+    """Отдаёт анонимным читателям готовые страницы из кэша.
+
+    Стоит до сессий и аутентификации: попадание в кэш обходится без
+    базы, ORM и шаблонов. Под ASGI работает асинхронно, и попадание
+    не занимает поток.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        cached, plan = self.lookup(request)
+        if cached is not None:
+            return cached
+        return self.finish(request, self.get_response(request), plan)
+
+    async def __acall__(self, request):
+        cached, plan = await sync_to_async(self.lookup)(request)
+        if cached is not None:
+            return cached
+        response = await self.get_response(request)
+        if plan == PASS:
+            return response
+        return await sync_to_async(self.finish)(request, response, plan)
+
+    def lookup(self, request):
+        """Страница из кэша или None и план для ответа view-функции."""
+        if not settings.PAGE_CACHE_ENABLED:
+            return None, PASS
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None, PASS
+        ttl = page_cache.ttl_for(match.view_name)
+        if ttl is None or request.method not in SAFE_METHODS:
+            return None, PASS
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return None, PRIVATE
+        scopes = page_cache.scopes_for(match.view_name, match.kwargs)
+        if scopes is None:
+            return None, PASS
+        key = page_cache.cache_key(request, match.view_name, match.kwargs,
+                                   scopes)
+        cached = page_cache.fetch(key)
+        if cached is not None:
+            cached['X-Page-Cache'] = 'hit'
+            return get_conditional_response(
+                request, etag=cached.get('ETag'), response=cached), None
+        return None, (key, ttl, scopes)
+
+    def finish(self, request, response, plan):
+        if plan == PASS:
+            return response
+        if plan == PRIVATE:
+            page_cache.mark_private(response)
+            return response
+        key, ttl, scopes = plan
+        if page_cache.cacheable(response):
+            page_cache.mark_public(response, ttl, scopes)
+            page_cache.store(key, response, ttl)
+        response['X-Page-Cache'] = 'miss'
+        return response
@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def fill_stats(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    Post = apps.get_model('posts', 'Post')
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+
+    def counts(model, field):
+        return dict(model.objects.order_by().values_list(field)
+                    .annotate(Count('pk')))
+
+    posts = counts(Post, 'author')
+    followers = counts(Follow, 'author')
+    following = counts(Follow, 'user')
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(user_id=pk,
+                     posts_count=posts.get(pk, 0),
+                     followers_count=followers.get(pk, 0),
+                     following_count=following.get(pk, 0))
+         for pk in User.objects.values_list('pk', flat=True).iterator()),
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_authorstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
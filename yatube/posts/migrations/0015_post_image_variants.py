@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-17 22:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Варианты картинки'),
+        ),
+    ]
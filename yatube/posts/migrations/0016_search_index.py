@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Таблица FTS5 создаётся пустой: существующие посты и комментарии
+# индексирует ``manage.py rebuild_search_index`` - пачками и без кода
+# приложения внутри миграции.
+SQLITE_FORWARD = [
+    'CREATE VIRTUAL TABLE IF NOT EXISTS posts_search USING fts5('
+    "post_id UNINDEXED, body, tokenize = 'unicode61')",
+]
+SQLITE_BACKWARD = ['DROP TABLE IF EXISTS posts_search']
+POSTGRES_FORWARD = [
+    'CREATE INDEX IF NOT EXISTS post_text_search ON posts_post '
+    "USING GIN (to_tsvector('russian', text))",
+    'CREATE INDEX IF NOT EXISTS comment_text_search ON posts_comment '
+    "USING GIN (to_tsvector('russian', text))",
+]
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS post_text_search',
+    'DROP INDEX IF EXISTS comment_text_search',
+]
+
+
+FORWARD = {'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}
+BACKWARD = {'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}
+
+
+def execute(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_index(apps, schema_editor):
+    execute(schema_editor, FORWARD)
+
+
+def drop_index(apps, schema_editor):
+    execute(schema_editor, BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.13 on 2026-10-17 22:33
+
+from django.db import migrations, models
+
+
+def copy_pub_date(apps, schema_editor):
+    # Старые посты считаем неизменёнными с момента публикации.
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(updated_at=models.F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(copy_pub_date, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 3.2.13 on 2026-10-17 22:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def date_follows(apps, schema_editor):
+    # Время старых подписок неизвестно; берём дату регистрации
+    # подписчика, чтобы первый пересчёт рейтинга не счёл их новыми.
+    Follow = apps.get_model('posts', 'Follow')
+    User = apps.get_model('auth', 'User')
+    Follow.objects.update(created=models.Subquery(
+        User.objects.filter(pk=models.OuterRef('user')).values(
+            'date_joined')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('posts', '0017_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorRank',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rank', serialize=False, to='auth.user', verbose_name='Автор')),
+                ('score', models.FloatField(verbose_name='Рейтинг')),
+                ('new_followers', models.PositiveIntegerField(verbose_name='Новых подписчиков за период')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг автора',
+                'verbose_name_plural': 'Рейтинги авторов',
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupRank',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rank', serialize=False, to='posts.group', verbose_name='Группа')),
+                ('score', models.FloatField(verbose_name='Рейтинг')),
+                ('posts_count', models.PositiveIntegerField(verbose_name='Постов за период')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг группы',
+                'verbose_name_plural': 'Рейтинги групп',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostRank',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rank', serialize=False, to='posts.post', verbose_name='Пост')),
+                ('score', models.FloatField(verbose_name='Рейтинг')),
+                ('comments_count', models.PositiveIntegerField(verbose_name='Комментариев за период')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг поста',
+                'verbose_name_plural': 'Рейтинги постов',
+            },
+        ),
+        migrations.AddField(
+            model_name='follow',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата подписки'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(date_follows, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['pub_date'], name='comment_pub_date'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['created'], name='follow_created'),
+        ),
+        migrations.AddIndex(
+            model_name='postrank',
+            index=models.Index(fields=['-score', '-post'], name='post_rank_score'),
+        ),
+        migrations.AddIndex(
+            model_name='grouprank',
+            index=models.Index(fields=['-score', 'group'], name='group_rank_score'),
+        ),
+        migrations.AddIndex(
+            model_name='authorrank',
+            index=models.Index(fields=['-score', '-author'], name='author_rank_score'),
+        ),
+    ]
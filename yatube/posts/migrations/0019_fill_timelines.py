@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Значения TIMELINE_* на момент миграции: от настроек при деплое её
+# результат зависеть не должен.
+FANOUT_LIMIT = 1000
+BACKFILL = 100
+BATCH_SIZE = 1000
+
+
+def fill_timelines(apps, schema_editor):
+    # Ленты подписок, которые были до материализованных лент: последние
+    # посты каждого автора раскладываются по его подписчикам, как при
+    # подписке (timeline.backfill). Подписки идут по автору, поэтому в
+    # памяти лежат посты только одного автора.
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    batch_size = BATCH_SIZE
+    follows = Follow.objects.exclude(
+        author__stats__followers_count__gt=FANOUT_LIMIT
+    ).order_by('author_id', 'user_id').values_list('author_id', 'user_id')
+    author_id, posts, entries = None, [], []
+    for follow_author_id, user_id in follows.iterator(batch_size):
+        if follow_author_id != author_id:
+            author_id = follow_author_id
+            posts = list(Post.objects.filter(author_id=author_id).order_by(
+                '-pub_date', '-id').values_list('id', 'pub_date')[
+                :BACKFILL])
+        entries += [TimelineEntry(user_id=user_id, post_id=post_id,
+                                  pub_date=pub_date)
+                    for post_id, pub_date in posts]
+        if len(entries) >= batch_size:
+            TimelineEntry.objects.bulk_create(entries, batch_size,
+                                              ignore_conflicts=True)
+            entries = []
+    TimelineEntry.objects.bulk_create(entries, batch_size,
+                                      ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_rankings'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -41,6 +41,10 @@ class Post(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -62,11 +66,31 @@ class Post(models.Model):
         null=True,
         verbose_name='Картинка'
     )
+    thumbnails = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Готовые миниатюры'
+    )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Варианты картинки'
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date')
+        ]
 
     def __str__(self):
         return self.text[:settings.FIRST_SYMBOLS_OF_POST]
@@ -99,6 +123,11 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['post', 'pub_date', 'id'],
+                         name='comment_post_pub_date'),
+            models.Index(fields=['pub_date'], name='comment_pub_date')
+        ]
 
     def __str__(self):
         return self.text
@@ -118,6 +147,10 @@ class Follow(models.Model):
         related_name='follower',
         verbose_name='Подписчик'
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата подписки'
+    )
 
     class Meta:
         verbose_name = 'Подписка'
@@ -128,6 +161,152 @@ class Follow(models.Model):
             models.CheckConstraint(check=~models.Q(author=models.F('user')),
                                    name='author_not_user')
         ]
+        indexes = [
+            models.Index(fields=['user', 'author'],
+                         name='follow_user_author'),
+            models.Index(fields=['created'], name='follow_created')
+        ]
 
     def __str__(self):
         return f'{self.user.username} подписан на {self.author.username}'
+
+
+class TimelineEntry(models.Model):
+    """Модель материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель ленты'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации поста'
+    )
+
+    class Meta:
+        ordering = ('-pub_date', '-post')
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date')
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} в ленте {self.user_id}'
+
+
+class AuthorStats(models.Model):
+    """Модель счётчиков постов и подписок пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписок'
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return f'Счётчики {self.user_id}'
+
+
+class PostRank(models.Model):
+    """Модель рейтинга постов по свежим комментариям."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rank',
+        verbose_name='Пост'
+    )
+    score = models.FloatField(verbose_name='Рейтинг')
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Комментариев за период'
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг поста'
+        verbose_name_plural = 'Рейтинги постов'
+        indexes = [
+            models.Index(fields=['-score', '-post'], name='post_rank_score')
+        ]
+
+    def __str__(self):
+        return f'Рейтинг поста {self.post_id}: {self.score:.2f}'
+
+
+class GroupRank(models.Model):
+    """Модель рейтинга групп по числу свежих постов."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rank',
+        verbose_name='Группа'
+    )
+    score = models.FloatField(verbose_name='Рейтинг')
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Постов за период'
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг группы'
+        verbose_name_plural = 'Рейтинги групп'
+        indexes = [
+            models.Index(fields=['-score', 'group'], name='group_rank_score')
+        ]
+
+    def __str__(self):
+        return f'Рейтинг группы {self.group_id}: {self.score:.2f}'
+
+
+class AuthorRank(models.Model):
+    """Модель рейтинга авторов по приросту подписчиков."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rank',
+        verbose_name='Автор'
+    )
+    score = models.FloatField(verbose_name='Рейтинг')
+    new_followers = models.PositiveIntegerField(
+        verbose_name='Новых подписчиков за период'
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг автора'
+        verbose_name_plural = 'Рейтинги авторов'
+        indexes = [
+            models.Index(fields=['-score', '-author'],
+                         name='author_rank_score')
+        ]
+
+    def __str__(self):
+        return f'Рейтинг автора {self.author_id}: {self.score:.2f}'
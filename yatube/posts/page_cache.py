@@ -0,0 +1,151 @@
+"""Кэш целых страниц для анонимных читателей.
+
+Кэшируются только маршруты из ``settings.PAGE_CACHE_TTLS``, каждый со
+своим временем жизни. Страница помечается суррогатными ключами - лентами
+из ``cache_versions``, которые она показывает. Их версии входят в ключ
+кэша, поэтому сброс точечный: запись поста, комментария или подписки
+увеличивает версии своих лент, и устаревают только страницы с ними. Те же
+ключи уходят в заголовке ``Surrogate-Key``, чтобы CDN мог держать и
+сбрасывать страницы так же.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.translation import get_language_from_request
+
+from . import cache_versions
+from .models import Group, User
+
+# Параметры запроса, от которых зависит страница.
+VARY_PARAMS = ('cursor', 'comments', 'page')
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control',
+                  'Surrogate-Key', 'Vary')
+
+
+def _lookup_key(name):
+    return f'page-cache-id:{name}'
+
+
+def _lookup(name, queryset, ttl):
+    """id по slug или имени с кэшированием, None - если объекта нет.
+
+    Промах не кэшируется: группу или пользователя могут создать сразу
+    после него.
+    """
+    key = _lookup_key(name)
+    pk = cache.get(key)
+    if pk is None:
+        pk = queryset.values_list('pk', flat=True).first()
+        if pk is not None:
+            cache.set(key, pk, ttl)
+    return pk
+
+
+def forget_ids(*names):
+    """Сбрасывает id, закэшированные по ``group:<slug>`` и
+    ``user:<имя>``: после переименования и удаления."""
+    keys = [_lookup_key(name) for name in names]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _index_scopes(ttl):
+    return [cache_versions.INDEX]
+
+
+def _rankings_scopes(ttl):
+    return [cache_versions.RANKINGS]
+
+
+def _group_scopes(ttl, slug):
+    group_id = _lookup(f'group:{slug}', Group.objects.filter(slug=slug), ttl)
+    return group_id and [cache_versions.group_scope(group_id)]
+
+
+def _profile_scopes(ttl, username):
+    user_id = _lookup(f'user:{username}',
+                      User.objects.filter(username=username), ttl)
+    return user_id and [cache_versions.author_scope(user_id),
+                        cache_versions.profile_scope(user_id)]
+
+
+def _post_scopes(ttl, post_id):
+    # Число постов автора на странице поста обновляется по TTL.
+    return [cache_versions.post_scope(post_id)]
+
+
+SCOPES = {
+    'posts:index': _index_scopes,
+    'posts:group_list': _group_scopes,
+    'posts:profile': _profile_scopes,
+    'posts:post_detail': _post_scopes,
+    'posts:trending': _rankings_scopes,
+    'posts:group_directory': _rankings_scopes,
+}
+
+
+def ttl_for(view_name):
+    return settings.PAGE_CACHE_TTLS.get(view_name)
+
+
+def scopes_for(view_name, kwargs):
+    """Суррогатные ключи страницы или None, если её нельзя кэшировать."""
+    ttl = ttl_for(view_name)
+    if ttl is None or view_name not in SCOPES:
+        return None
+    return SCOPES[view_name](ttl, **kwargs) or None
+
+
+def cache_key(request, view_name, kwargs, scopes):
+    params = [(name, request.GET.get(name)) for name in VARY_PARAMS
+              if name in request.GET]
+    payload = repr((view_name, sorted(kwargs.items()), params,
+                    get_language_from_request(request),
+                    cache_versions.get_versions(scopes)))
+    return 'page:' + hashlib.md5(payload.encode()).hexdigest()
+
+
+def fetch(key):
+    stored = cache.get(key)
+    if stored is None:
+        return None
+    status, headers, content = stored
+    response = HttpResponse(content, status=status)
+    for name, value in headers:
+        response[name] = value
+    return response
+
+
+def cacheable(response):
+    """Только полные ответы 200 без cookie: в них нет чужих данных."""
+    return (response.status_code == 200 and not response.streaming
+            and not response.cookies)
+
+
+def store(key, response, ttl):
+    headers = [(name, response[name]) for name in STORED_HEADERS
+               if response.has_header(name)]
+    cache.set(key, (response.status_code, headers, response.content), ttl)
+
+
+def mark_public(response, ttl, scopes):
+    patch_cache_control(response, public=True, max_age=ttl)
+    patch_vary_headers(response, ('Cookie', 'Accept-Language'))
+    response['Surrogate-Key'] = ' '.join(scopes)
+
+
+def mark_private(response):
+    patch_cache_control(response, private=True)
+    patch_vary_headers(response, ('Cookie',))
+
+
+def purge_posts(*post_ids):
+    cache_versions.bump(*map(cache_versions.post_scope, post_ids))
+
+
+def purge_profiles(*user_ids):
+    cache_versions.bump(*map(cache_versions.profile_scope, user_ids))
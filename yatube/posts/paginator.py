@@ -1,9 +1,262 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import hashlib
+import json
+from collections.abc import Sequence
+
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+FORWARD = 'n'
+BACKWARD = 'p'
+# Типы значений, которые может содержать курсор.
+SCALARS = (str, int, float)
+
+
+def encode_cursor(values, direction):
+    """Упаковывает позицию в ленте в непрозрачный токен."""
+    payload = json.dumps([direction] + [
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in values
+    ], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен; для испорченного токена возвращает None."""
+    if not token:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, *values = json.loads(payload)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if direction not in (FORWARD, BACKWARD):
+        return None
+    return direction, values
+
+
+class CursorPage(Sequence):
+    """Страница ленты, полученная по ключу, а не по смещению.
+
+    Запрос выполняется при первом обращении к записям, поэтому страница,
+    чей фрагмент уже лежит в кэше, не ходит в базу.
+    """
+
+    def __init__(self, paginator, cursor, values, forward):
+        self.paginator = paginator
+        self.cursor = cursor or ''
+        self._values = values
+        self._forward = forward
+        self._object_list = None
+        self._edges = None
+
+    def __repr__(self):
+        return f'<CursorPage {self.cursor or "first"}>'
+
+    def _fetch(self):
+        if self._object_list is not None:
+            return
+        rows = self.paginator.fetch(self._values, self._forward)
+        has_more = len(rows) > self.paginator.per_page
+        rows = rows[:self.paginator.per_page]
+        if self._forward:
+            self._has_next = has_more
+            self._has_previous = self._values is not None
+        else:
+            rows.reverse()
+            self._has_next, self._has_previous = True, has_more
+        self._object_list = rows
+        self._edges = (rows[0], rows[-1]) if rows else ()
+
+    def _resolve(self):
+        """Соседние страницы известны после запроса или обхода chunks."""
+        if self._edges is None:
+            self._fetch()
+
+    @property
+    def object_list(self):
+        self._fetch()
+        return self._object_list
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        self._resolve()
+        return self._has_next
+
+    def has_previous(self):
+        self._resolve()
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.cursor_for(self._edges[-1], FORWARD)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.cursor_for(self._edges[0], BACKWARD)
+
+    def chunks(self, size):
+        """Записи страницы пачками по ``size``.
+
+        Страница вперёд по QuerySet читается итератором курсора базы и не
+        собирается в список: после обхода она помнит только крайние
+        записи, по которым строятся ссылки на соседние страницы. База
+        определяется в момент вызова ``chunks()``, а не при обходе
+        генератора, поэтому вызывать его нужно внутри ``replica_reads``:
+        обходят пачки, когда view-функция уже вернула ответ.
+        """
+        if (self._object_list is not None or not self._forward
+                or hasattr(self.paginator.object_list, 'seek')):
+            return self._list_chunks(size)
+        queryset = self.paginator.page_queryset(self._values)
+        return self._stream_chunks(queryset.using(queryset.db), size)
+
+    def _list_chunks(self, size):
+        rows = self.object_list
+        for start in range(0, len(rows), size):
+            yield rows[start:start + size]
+
+    def _stream_chunks(self, queryset, size):
+        per_page = self.paginator.per_page
+        chunk, count, first, last = [], 0, None, None
+        for row in queryset.iterator(chunk_size=size):
+            count += 1
+            if count > per_page:
+                break
+            first, last = first or row, row
+            chunk.append(row)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+        self._has_next = count > per_page
+        self._has_previous = self._values is not None
+        self._edges = (first, last) if last is not None else ()
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу (keyset/seek pagination).
+
+    Каждая страница - это один запрос вида
+    ``WHERE (pub_date, id) < (...) ORDER BY pub_date DESC, id DESC LIMIT n``,
+    поэтому глубокие страницы стоят столько же, сколько первая, а общий
+    ``COUNT(*)`` не выполняется вовсе. Вместо QuerySet можно передать
+    источник с методом ``seek(values, forward, per_page)``.
+    """
+
+    def __init__(self, object_list, per_page,
+                 ordering=('-pub_date', '-id')):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = tuple(field.lstrip('-') for field in self.ordering)
+
+    def cursor_for(self, obj, direction):
+        return encode_cursor(
+            [getattr(obj, field) for field in self.fields], direction)
+
+    def _seek_filter(self, values, forward):
+        """Условие "строго после позиции" для составного ключа.
+
+        Лишнее условие на первый ключ задаёт границу диапазона, по которой
+        СУБД ищет в индексе, а не фильтрует его целиком.
+        """
+        condition = None
+        for position in reversed(range(len(self.fields))):
+            field, value = self.fields[position], values[position]
+            lookup = self._lookup(position, forward)
+            step = Q(**{f'{field}__{lookup}': value})
+            if condition is not None:
+                step |= Q(**{field: value}) & condition
+            condition = step
+        if len(self.fields) > 1:
+            condition &= Q(**{
+                f'{self.fields[0]}__{self._lookup(0, forward)}e': values[0]
+            })
+        return condition
+
+    def _lookup(self, position, forward):
+        descending = self.ordering[position].startswith('-')
+        return 'lt' if descending == forward else 'gt'
+
+    def _parse_values(self, values):
+        """Значения ключа из курсора; для подделанного курсора - None.
+
+        Курсор приходит от клиента, поэтому принимаются только скаляры
+        по одному на поле ключа.
+        """
+        if len(values) != len(self.fields) or not all(
+                isinstance(value, SCALARS) for value in values):
+            return None
+        opts = self.object_list.model._meta
+        try:
+            return [opts.get_field(field).to_python(value)
+                    for field, value in zip(self.fields, values)]
+        except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+            return None
+
+    def page_queryset(self, values=None, forward=True):
+        """Запрос одной страницы (с одной лишней строкой-признаком)."""
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, forward))
+        ordering = self.ordering if forward else tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        )
+        return queryset.order_by(*ordering)[:self.per_page + 1]
+
+    def get_page(self, cursor=None):
+        """Возвращает страницу по токену; неверный токен - первая страница."""
+        decoded = decode_cursor(cursor)
+        values = decoded and self._parse_values(decoded[1])
+        if not values:
+            cursor = None
+            forward, values = True, None
+        else:
+            forward = decoded[0] == FORWARD
+        return CursorPage(self, cursor, values, forward)
+
+    def fetch(self, values, forward):
+        """Строки страницы в порядке обхода, с одной лишней."""
+        seek = getattr(self.object_list, 'seek', None)
+        if seek is not None:
+            return list(seek(values, forward, self.per_page))
+        return list(self.page_queryset(values, forward))
+
+    @property
+    def count(self):
+        """Общее число записей, закэшированное на PAGINATOR_COUNT_TIMEOUT.
+
+        Ленты его не запрашивают; свойство нужно там, где итог
+        действительно показывается.
+        """
+        query = str(getattr(self.object_list, 'query',
+                            self.object_list)).encode()
+        key = 'paginator-count:' + hashlib.md5(query).hexdigest()
+        return cache.get_or_set(key, self.object_list.count,
+                                settings.PAGINATOR_COUNT_TIMEOUT)
 
 
-def my_paginator(request, post_list):
-    paginator = Paginator(post_list, settings.NUM_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+def my_paginator(request, post_list, param='cursor', ordering=None,
+                 per_page=None):
+    paginator = CursorPaginator(post_list, per_page or settings.NUM_POSTS,
+                                ordering or ('-pub_date', '-id'))
+    page_obj = paginator.get_page(request.GET.get(param))
     return page_obj
@@ -0,0 +1,90 @@
+"""Рейтинги для страниц «Популярное» и каталога групп.
+
+Считать популярность агрегатами по ``Comment`` и ``Follow`` на каждый
+запрос слишком дорого, поэтому её раз в несколько минут пересчитывает
+``manage.py update_rankings`` и кладёт в таблицы ``PostRank``,
+``GroupRank`` и ``AuthorRank``. Страницы читают их по индексу
+``(-score, id)`` ключевой пагинацией - столько строк, сколько на
+странице.
+
+Событие за последние ``RANKING_WINDOW`` секунд весит ``0.5 ** (возраст /
+RANKING_HALF_LIFE)``: у поста событие - комментарий, у группы - новый
+пост, у автора - новый подписчик. Так свежая активность важнее
+накопленной, а старые посты уходят из рейтинга сами.
+"""
+import heapq
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache_versions
+from .models import (AuthorRank, Comment, Follow, Group, GroupRank, Post,
+                     PostRank, User)
+
+
+def decay(age):
+    """Вес события возрастом ``age`` секунд."""
+    return 0.5 ** (max(age, 0) / settings.RANKING_HALF_LIFE)
+
+
+def scores(events, now):
+    """Сумма весов и число событий по ключу из пар ``(ключ, время)``."""
+    totals, counts = defaultdict(float), Counter()
+    for key, moment in events:
+        totals[key] += decay((now - moment).total_seconds())
+        counts[key] += 1
+    return totals, counts
+
+
+def _top(totals, limit):
+    return heapq.nlargest(limit, totals, key=lambda key: (totals[key], key))
+
+
+def _events(queryset, key, moment, since):
+    return queryset.filter(**{f'{moment}__gte': since}).values_list(
+        key, moment).iterator(chunk_size=settings.RANKING_BATCH_SIZE)
+
+
+def _replace(model, rows):
+    model.objects.all().delete()
+    model.objects.bulk_create(rows, batch_size=settings.RANKING_BATCH_SIZE)
+
+
+def update(now=None):
+    """Пересчитывает все рейтинги; возвращает число строк в каждом."""
+    now = now or timezone.now()
+    since = now - timedelta(seconds=settings.RANKING_WINDOW)
+    limit = settings.RANKING_LIMIT
+    post_scores, comments = scores(
+        _events(Comment.objects, 'post_id', 'pub_date', since), now)
+    group_scores, posts = scores(
+        _events(Post.objects.filter(group__isnull=False), 'group_id',
+                'pub_date', since), now)
+    author_scores, followers = scores(
+        _events(Follow.objects, 'author_id', 'created', since), now)
+    top_posts = _top(post_scores, limit)
+    top_authors = _top(author_scores, limit)
+    with transaction.atomic():
+        # Пока шёл подсчёт, пост или автора могли удалить.
+        post_ids = set(Post.objects.filter(pk__in=top_posts).values_list(
+            'pk', flat=True))
+        author_ids = set(User.objects.filter(
+            pk__in=top_authors).values_list('pk', flat=True))
+        _replace(PostRank, [
+            PostRank(post_id=pk, score=post_scores[pk],
+                     comments_count=comments[pk])
+            for pk in top_posts if pk in post_ids])
+        _replace(GroupRank, [
+            GroupRank(group_id=pk, score=group_scores.get(pk, 0.0),
+                      posts_count=posts[pk])
+            for pk in Group.objects.values_list('pk', flat=True)])
+        _replace(AuthorRank, [
+            AuthorRank(author_id=pk, score=author_scores[pk],
+                       new_followers=followers[pk])
+            for pk in top_authors if pk in author_ids])
+    cache_versions.bump(cache_versions.RANKINGS)
+    return {model._meta.verbose_name_plural: model.objects.count()
+            for model in (PostRank, GroupRank, AuthorRank)}
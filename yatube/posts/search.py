@@ -0,0 +1,186 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+На SQLite индекс хранится в виртуальной таблице FTS5 ``posts_search``:
+в неё пишутся основы слов (см. ``stemmer``), поэтому «котами» находит
+«кот». Строка поста имеет rowid ``2 * id``, комментария ``2 * id + 1``,
+так что обновление и удаление идут по первичному ключу. Индекс
+поддерживают сигналы, а ``rebuild_search_index`` заполняет его заново.
+
+На PostgreSQL используется встроенный ``to_tsvector('russian', ...)`` с
+GIN-индексами по выражению: они обновляются самой базой, и сигналы там
+ничего не делают.
+
+Результат поиска - id постов по убыванию релевантности; совпадение в
+комментарии весит вдвое меньше совпадения в тексте поста.
+"""
+from itertools import chain, islice
+
+from django.db import connections, router, transaction
+
+from .models import Comment, Post
+from .stemmer import stems
+
+TABLE = 'posts_search'
+COMMENT_WEIGHT = 0.5
+MAX_TERMS = 10
+
+
+def post_rowid(post_id):
+    return post_id * 2
+
+
+def comment_rowid(comment_id):
+    return comment_id * 2 + 1
+
+
+def _terms(query):
+    return stems(query)[:MAX_TERMS]
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class SQLiteIndex:
+    """Индекс в таблице FTS5 с ранжированием bm25."""
+
+    def __init__(self, using):
+        self.using = using
+
+    INSERT = (f'INSERT OR REPLACE INTO {TABLE}(rowid, post_id, body) '
+              f'VALUES (%s, %s, %s)')
+
+    def add(self, rowid, post_id, text):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(self.INSERT, [rowid, post_id,
+                                         ' '.join(stems(text))])
+
+    def remove(self, rowid):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [rowid])
+
+    def search(self, query, limit, offset=0):
+        terms = _terms(query)
+        if not terms:
+            return []
+        # Каждая основа - префиксный запрос: «кот»* найдёт и «котёнок».
+        match = ' '.join(f'"{term}"*' for term in terms)
+        # LIMIT -1 не даёт SQLite встроить подзапрос в агрегат: bm25()
+        # можно вызывать только в самом запросе с MATCH.
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id, min(score) AS best FROM ('
+                f'SELECT post_id, bm25({TABLE}) * CASE rowid %% 2 '
+                f'WHEN 1 THEN {COMMENT_WEIGHT} ELSE 1 END AS score '
+                f'FROM {TABLE} WHERE {TABLE} MATCH %s LIMIT -1'
+                f') hits GROUP BY post_id ORDER BY best, post_id DESC '
+                f'LIMIT %s OFFSET %s',
+                [match, limit, offset])
+            return [row[0] for row in cursor.fetchall()]
+
+    def _rows(self):
+        posts = Post.objects.order_by().values_list('pk', 'text')
+        comments = Comment.objects.order_by().values_list(
+            'pk', 'post_id', 'text')
+        return chain(
+            ((post_rowid(pk), pk, text)
+             for pk, text in posts.iterator()),
+            ((comment_rowid(pk), post_id, text)
+             for pk, post_id, text in comments.iterator()))
+
+    def rebuild(self, batch_size=1000, progress=None):
+        total = 0
+        with transaction.atomic(using=self.using), \
+                connections[self.using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+            for batch in _batches(self._rows(), batch_size):
+                cursor.executemany(self.INSERT, [
+                    (rowid, post_id, ' '.join(stems(text)))
+                    for rowid, post_id, text in batch])
+                total += len(batch)
+                if progress:
+                    progress(total)
+            cursor.execute(
+                f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+        return total
+
+
+class PostgresIndex:
+    """Поиск по tsvector; GIN-индексы по выражению ведёт сама база."""
+
+    def __init__(self, using):
+        self.using = using
+
+    VECTOR = "to_tsvector('russian', {table}.text)"
+
+    def add(self, rowid, post_id, text):
+        pass
+
+    def remove(self, rowid):
+        pass
+
+    def search(self, query, limit, offset=0):
+        if not _terms(query):
+            return []
+        post_vector = self.VECTOR.format(table=Post._meta.db_table)
+        comment_vector = self.VECTOR.format(table=Comment._meta.db_table)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id, max(score) AS best FROM ('
+                f'SELECT id AS post_id, ts_rank({post_vector}, query) '
+                f'AS score FROM {Post._meta.db_table}, '
+                f"plainto_tsquery('russian', %s) query "
+                f'WHERE {post_vector} @@ query '
+                f'UNION ALL '
+                f'SELECT post_id, ts_rank({comment_vector}, query) '
+                f'* {COMMENT_WEIGHT} FROM {Comment._meta.db_table}, '
+                f"plainto_tsquery('russian', %s) query "
+                f'WHERE {comment_vector} @@ query'
+                f') hits GROUP BY post_id ORDER BY best DESC, post_id DESC '
+                f'LIMIT %s OFFSET %s',
+                [query, query, limit, offset])
+            return [row[0] for row in cursor.fetchall()]
+
+    def rebuild(self, batch_size=1000, progress=None):
+        return 0
+
+
+BACKENDS = {
+    'sqlite': SQLiteIndex,
+    'postgresql': PostgresIndex,
+}
+
+
+def backend(write=True):
+    """Индекс базы для записи или, при write=False, для чтения."""
+    using = (router.db_for_write(Post) if write
+             else router.db_for_read(Post))
+    return BACKENDS[connections[using].vendor](using)
+
+
+def index_post(post):
+    backend().add(post_rowid(post.pk), post.pk, post.text)
+
+
+def index_comment(comment):
+    backend().add(comment_rowid(comment.pk), comment.post_id, comment.text)
+
+
+def remove_post(post_id):
+    backend().remove(post_rowid(post_id))
+
+
+def remove_comment(comment_id):
+    backend().remove(comment_rowid(comment_id))
+
+
+def search(query, limit, offset=0):
+    """id постов, подходящих под запрос, от самых релевантных."""
+    return backend(write=False).search(query, limit, offset)
+
+
+def rebuild(batch_size=1000, progress=None):
+    """Переиндексирует все посты и комментарии пачками по batch_size."""
+    return backend().rebuild(batch_size, progress)
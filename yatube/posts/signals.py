@@ -0,0 +1,193 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (cache_versions, counters, follow_graph, page_cache, tasks,
+               thumbnails)
+from .models import (AuthorStats, Comment, Follow, Group, GroupRank, Post,
+                     User)
+
+
+@receiver(post_save, sender=Post)
+def fanout_new_post(sender, instance, created, raw=False, **kwargs):
+    """Раскладывает новый пост по лентам подписчиков."""
+    if created and not raw:
+        tasks.fanout_posts.delay(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    """Дополняет ленту постами автора после подписки."""
+    if created and not raw:
+        tasks.backfill_timeline.delay(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    """Чистит ленту после отписки."""
+    tasks.prune_timeline.delay(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=User)
+def create_stats(sender, instance, created, raw=False, **kwargs):
+    """Заводит счётчики новому пользователю."""
+    if created and not raw:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Group)
+@receiver(pre_save, sender=User)
+def remember_page_cache_name(sender, instance, update_fields=None,
+                             **kwargs):
+    """Запоминает прежние slug группы и имя пользователя."""
+    field = 'slug' if sender is Group else 'username'
+    instance._old_page_cache_name = None
+    if instance.pk is not None and (update_fields is None
+                                    or field in update_fields):
+        instance._old_page_cache_name = sender.objects.filter(
+            pk=instance.pk).values_list(field, flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=User)
+def forget_page_cache_ids(sender, instance, **kwargs):
+    """Сбрасывает id группы или пользователя в кэше страниц по старому и
+    новому slug или имени."""
+    prefix, field = ('group', 'slug') if sender is Group else (
+        'user', 'username')
+    names = {getattr(instance, field),
+             getattr(instance, '_old_page_cache_name', None)} - {None}
+    page_cache.forget_ids(*(f'{prefix}:{name}' for name in names))
+
+
+@receiver(post_save, sender=Group)
+def rank_new_group(sender, instance, created, raw=False, **kwargs):
+    """Показывает новую группу в каталоге до пересчёта рейтингов."""
+    if created and not raw:
+        GroupRank.objects.get_or_create(
+            group=instance, defaults={'score': 0.0, 'posts_count': 0})
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.increment(instance.author_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.increment(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.increment(instance.author_id, followers_count=1)
+        counters.increment(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    # Автор, опустившийся до порога раскладки, снова раскладывает посты,
+    # и его последние посты нужно разложить по лентам подписчиков.
+    if counters.step_down(instance.author_id, 'followers_count',
+                          settings.TIMELINE_FANOUT_LIMIT + 1):
+        tasks.fanout_recent_posts.delay(instance.author_id)
+    else:
+        counters.increment(instance.author_id, followers_count=-1)
+    counters.increment(instance.user_id, following_count=-1)
+
+
+@receiver(pre_save, sender=Post)
+def remember_feeds(sender, instance, raw=False, **kwargs):
+    """Запоминает ленты, в которых пост был виден до правки, и его
+    прежнюю картинку с вариантами."""
+    instance._old_feeds, instance._old_image = [], None
+    if instance.pk is None or raw:
+        return
+    old = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', 'author_id', 'image', 'image_variants').first()
+    if old:
+        instance._old_feeds = cache_versions.post_scopes(*old[:2])
+        instance._old_image = old[2], thumbnails.variant_names(old[3])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_feed_versions(sender, instance, **kwargs):
+    """Сбрасывает кэш фрагментов лент, где пост был или стал виден."""
+    scopes = cache_versions.post_scopes(instance.group_id, instance.author_id)
+    scopes += getattr(instance, '_old_feeds', [])
+    cache_versions.bump(*set(scopes))
+
+
+@receiver(post_save, sender=Post)
+def discard_old_image(sender, instance, raw=False, **kwargs):
+    """Удаляет миниатюры и варианты сменённой картинки поста."""
+    old = getattr(instance, '_old_image', None)
+    if old and not raw and old[0] != instance.image.name and any(old):
+        thumbnails.discard.delay(*old)
+
+
+@receiver(post_delete, sender=Post)
+def discard_image(sender, instance, **kwargs):
+    """Удаляет миниатюры и варианты картинки удалённого поста."""
+    if instance.image:
+        thumbnails.discard.delay(
+            instance.image.name,
+            thumbnails.variant_names(instance.image_variants))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    """Обновляет пост в поисковом индексе."""
+    if not raw:
+        tasks.sync_search.delay('post', instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def index_comment(sender, instance, raw=False, **kwargs):
+    """Обновляет комментарий в поисковом индексе."""
+    if not raw:
+        tasks.sync_search.delay('comment', instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_post_page(sender, instance, **kwargs):
+    """Сбрасывает кэш страницы поста после правки поста или комментария."""
+    tasks.purge_post_pages.delay(getattr(instance, 'post_id', instance.pk))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_graph(sender, instance, **kwargs):
+    """Сбрасывает список подписок подписчика."""
+    follow_graph.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def purge_profile_pages(sender, instance, **kwargs):
+    """Сбрасывает кэш профилей, где изменились счётчики подписок."""
+    tasks.purge_profile_pages.delay(instance.author_id, instance.user_id)
+
+
+@receiver(post_save, sender=Comment)
+def notify_comment(sender, instance, created, raw=False, **kwargs):
+    """Сообщает автору поста о новом комментарии."""
+    if created and not raw:
+        tasks.notify_comments.delay(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def notify_follow(sender, instance, created, raw=False, **kwargs):
+    """Сообщает автору о новом подписчике."""
+    if created and not raw:
+        tasks.notify_follows.delay(instance.pk)
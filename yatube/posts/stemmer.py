@@ -0,0 +1,116 @@
+"""Стеммер русского языка по алгоритму Snowball (Портер для русского).
+
+Нужен поиску на SQLite: токенизатор FTS5 умеет только английский
+стемминг, поэтому текст и запрос приводятся к основам здесь.
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им',
+    'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая',
+    'яя', 'ою', 'ею',
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ('ся', 'сь')
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и',
+    'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о',
+    'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я',
+)
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _longest(word, endings):
+    for ending in sorted(endings, key=len, reverse=True):
+        if word.endswith(ending):
+            return ending
+    return None
+
+
+def _remove(word, start, endings, after_a=False):
+    """Отрезает самое длинное окончание, целиком лежащее после start.
+
+    Для окончаний первой группы перед ними должна стоять «а» или «я»,
+    которая остаётся в слове.
+    """
+    ending = _longest(word, endings)
+    if ending is None or len(word) - len(ending) < start:
+        return None
+    stem = word[:-len(ending)]
+    if after_a and (len(stem) <= start or stem[-1] not in 'ая'):
+        return None
+    return stem
+
+
+def _remove_grouped(word, start, groups):
+    first, second = groups
+    candidates = [stem for stem in (_remove(word, start, first, True),
+                                    _remove(word, start, second))
+                  if stem is not None]
+    return min(candidates, key=len) if candidates else None
+
+
+def _regions(word):
+    """Начала областей RV и R2."""
+    rv = next((i + 1 for i, char in enumerate(word) if char in VOWELS),
+              len(word))
+
+    def after_vowel_consonant(start):
+        for i in range(start + 1, len(word)):
+            if word[i] not in VOWELS and word[i - 1] in VOWELS:
+                return i + 1
+        return len(word)
+
+    return rv, after_vowel_consonant(after_vowel_consonant(0))
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    # Шаг 1: деепричастие, иначе возвратность и прилагательное/глагол/сущ.
+    result = _remove_grouped(word, rv, PERFECTIVE_GERUND)
+    if result is None:
+        word = _remove(word, rv, REFLEXIVE) or word
+        result = _remove(word, rv, ADJECTIVE)
+        if result is not None:
+            result = _remove_grouped(result, rv, PARTICIPLE) or result
+        else:
+            result = (_remove_grouped(word, rv, VERB)
+                      or _remove(word, rv, NOUN))
+    word = result if result is not None else word
+    # Шаг 2: конечная «и».
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    # Шаг 3: словообразовательное окончание в R2.
+    word = _remove(word, r2, DERIVATIONAL) or word
+    # Шаг 4: превосходная степень, двойная «н», мягкий знак.
+    word = _remove(word, rv, SUPERLATIVE) or word
+    if word.endswith('нн') and len(word) - 1 >= rv:
+        word = word[:-1]
+    elif word.endswith('ь') and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
+
+
+def stems(text):
+    """Основы всех слов текста по порядку."""
+    return [stem(word) for word in WORD_RE.findall(text)]
@@ -0,0 +1,71 @@
+"""Потоковый рендеринг длинных страниц.
+
+Обычный ``render`` собирает страницу целиком, прежде чем отправить первый
+байт. В потоковом режиме шаблон страницы рендерится без списка - на его
+месте стоит ``stream_marker`` - и всё до маркера (шапка ``base.html`` и
+начало страницы) уходит клиенту сразу. Затем записи списка читаются из
+курсора базы пачками (``CursorPage.chunks``) и отправляются по мере
+рендеринга, а за ними - шаблоны после списка и конец страницы.
+
+Режим включается для каждого маршрута отдельно в
+``settings.STREAMING_PAGES``: маршрут -> записей на странице. Под ASGI
+Django 3.2 обходит потоковый ответ в цикле событий, где ORM недоступен,
+поэтому там страница рендерится обычным способом.
+"""
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.shortcuts import render as render_page
+from django.template import loader
+from django.utils.safestring import mark_safe
+
+MARKER = '<!-- stream -->'
+
+
+def enabled(request):
+    match = request.resolver_match
+    return (match is not None and match.view_name in settings.STREAMING_PAGES
+            and not isinstance(request, ASGIRequest))
+
+
+def per_page(request, default):
+    """Размер страницы списка: в потоковом режиме - свой."""
+    if not enabled(request):
+        return default
+    return settings.STREAMING_PAGES[request.resolver_match.view_name]
+
+
+def render(request, template_name, context, name, chunk_template,
+           after=()):
+    """Отдаёт страницу потоком, если маршрут это разрешает.
+
+    ``context[name]`` - страница записей, каждую пачку рендерит
+    ``chunk_template`` с ней же в переменной ``name``. ``after`` - пары
+    (шаблон, контекст), которые идут сразу после списка.
+    """
+    if not enabled(request):
+        return render_page(request, template_name, context)
+    page = context[name]
+    # Каркас рендерится сразу, а не при обходе ответа: так до ответа
+    # middleware узнают о сессии и CSRF-токене формы.
+    shell = loader.render_to_string(
+        template_name, {**context, 'stream_marker': mark_safe(MARKER)},
+        request)
+    head, tail = shell.split(MARKER, 1)
+    chunk = loader.get_template(chunk_template)
+    after = [(loader.get_template(template), extra)
+             for template, extra in after]
+
+    # Пачки обходят, когда view-функция уже вернула ответ и блок
+    # read_only закрыт, поэтому база для них выбирается здесь.
+    chunks = page.chunks(settings.STREAMING_CHUNK_SIZE)
+
+    def content():
+        yield head
+        for rows in chunks:
+            yield chunk.render({**context, name: rows}, request)
+        for template, extra in after:
+            yield template.render({**context, **extra}, request)
+        yield tail
+
+    return StreamingHttpResponse(content())
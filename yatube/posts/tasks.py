@@ -0,0 +1,122 @@
+"""Фоновые задачи после записи постов, комментариев и подписок.
+
+Сигналы только ставят задачи (см. ``tasks.queue``). Задачи берут из базы
+текущее состояние, а не то, что было при постановке: если пост удалён
+или подписку успели отменить, задача ничего не делает, и порядок
+выполнения пачек не важен.
+"""
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.urls import reverse
+
+from tasks.queue import task
+
+from . import page_cache, search, timeline
+from .models import Comment, Follow, Post, User
+
+
+def _ids(batch):
+    return {args[0] for args in batch}
+
+
+def _absolute(viewname, *args):
+    """Полный адрес страницы для письма."""
+    return settings.SITE_URL.rstrip('/') + reverse(viewname, args=args)
+
+
+@task(batch=100)
+def fanout_posts(batch):
+    """Раскладывает новые посты по лентам подписчиков."""
+    for post in Post.objects.filter(pk__in=_ids(batch)):
+        timeline.fanout_post(post)
+
+
+@task(batch=100)
+def fanout_recent_posts(batch):
+    """Раскладывает последние посты авторов, переставших быть популярными."""
+    for author_id in _ids(batch):
+        timeline.fanout_recent(author_id)
+
+
+def _following(user_id, author_id):
+    return Follow.objects.filter(user_id=user_id,
+                                 author_id=author_id).exists()
+
+
+@task()
+def backfill_timeline(user_id, author_id):
+    """Дополняет ленту постами автора, если подписка ещё есть."""
+    users = User.objects.in_bulk([user_id, author_id])
+    if len(users) == 2 and _following(user_id, author_id):
+        timeline.backfill(users[user_id], users[author_id])
+
+
+@task()
+def prune_timeline(user_id, author_id):
+    """Чистит ленту после отписки, если пользователь не подписался снова."""
+    if not _following(user_id, author_id):
+        timeline.prune(user_id, author_id)
+
+
+@task(batch=200)
+def sync_search(batch):
+    """Приводит поисковый индекс к текущим постам и комментариям.
+
+    Аргументы задачи - ``('post', id)`` или ``('comment', id)``; чего
+    уже нет в базе, удаляется из индекса.
+    """
+    post_ids = {pk for kind, pk in batch if kind == 'post'}
+    comment_ids = {pk for kind, pk in batch if kind == 'comment'}
+    posts = Post.objects.only('text').in_bulk(post_ids)
+    comments = Comment.objects.only('post_id', 'text').in_bulk(comment_ids)
+    for pk in post_ids:
+        if pk in posts:
+            search.index_post(posts[pk])
+        else:
+            search.remove_post(pk)
+    for pk in comment_ids:
+        if pk in comments:
+            search.index_comment(comments[pk])
+        else:
+            search.remove_comment(pk)
+
+
+@task(batch=500)
+def purge_post_pages(batch):
+    """Сбрасывает кэш страниц постов."""
+    page_cache.purge_posts(*_ids(batch))
+
+
+@task(batch=500)
+def purge_profile_pages(batch):
+    """Сбрасывает кэш профилей, где изменились счётчики подписок."""
+    page_cache.purge_profiles(*{pk for args in batch for pk in args})
+
+
+@task(batch=50)
+def notify_comments(batch):
+    """Пишет авторам постов о новых комментариях."""
+    comments = Comment.objects.filter(pk__in=_ids(batch)).exclude(
+        post__author__email='').select_related('author', 'post__author')
+    send_mass_mail([
+        ('Новый комментарий к вашему посту',
+         f'{comment.author.username} пишет: {comment.text}\n\n'
+         + _absolute('posts:post_detail', comment.post_id),
+         None, [comment.post.author.email])
+        for comment in comments
+        if comment.author_id != comment.post.author_id
+    ])
+
+
+@task(batch=50)
+def notify_follows(batch):
+    """Пишет авторам о новых подписчиках."""
+    follows = Follow.objects.filter(pk__in=_ids(batch)).exclude(
+        author__email='').select_related('author', 'user')
+    send_mass_mail([
+        ('У вас новый подписчик',
+         f'На ваши посты подписался {follow.user.username}\n\n'
+         + _absolute('posts:profile', follow.user.username),
+         None, [follow.author.email])
+        for follow in follows
+    ])
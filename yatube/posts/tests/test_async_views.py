@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .. import async_views, views
+from ..middleware import AnonymousPageCacheMiddleware
+from ..models import Group, Post, User
+
+
+class AsyncViewsTests(TestCase):
+    """Тесты асинхронных страниц для чтения."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(title='Группа', slug='slug',
+                                         description='Описание')
+        cls.post = Post.objects.create(text='Пост', author=cls.author,
+                                       group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def get(self, url):
+        request = self.factory.get(url)
+        request.user = AnonymousUser()
+        return request
+
+    def test_async_views_render_same_pages(self):
+        """Тест: корутины отдают те же страницы, что и view-функции."""
+        pages = {
+            'index': ((), reverse('posts:index')),
+            'group_posts': ((AsyncViewsTests.group.slug,),
+                            reverse('posts:group_list',
+                                    args=[AsyncViewsTests.group.slug])),
+            'profile': ((AsyncViewsTests.author.username,),
+                        reverse('posts:profile',
+                                args=[AsyncViewsTests.author])),
+            'post_detail': ((AsyncViewsTests.post.pk,),
+                            reverse('posts:post_detail',
+                                    args=[AsyncViewsTests.post.pk])),
+        }
+        for name, (args, url) in pages.items():
+            with self.subTest(Имя=name):
+                view = getattr(async_views, name)
+                self.assertTrue(asyncio.iscoroutinefunction(view))
+                response = async_to_sync(view)(self.get(url), *args)
+                expected = getattr(views, name)(self.get(url), *args)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, expected.content)
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_page_cache_middleware_async(self):
+        """Тест: попадание в кэш под ASGI обходится без view-функции."""
+        calls = []
+
+        async def get_response(request):
+            calls.append(request.path)
+            return await async_views.index(request)
+
+        middleware = AnonymousPageCacheMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        url = reverse('posts:index')
+        first = async_to_sync(middleware)(self.get(url))
+        second = async_to_sync(middleware)(self.get(url))
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(calls), 1)
+
+    def test_concurrency_capped_by_pool(self):
+        """Тест: view-функций одновременно не больше размера пула."""
+        self.addCleanup(connection.settings_dict.pop, 'POOL', None)
+        connection.settings_dict['POOL'] = {'MAX_SIZE': 2}
+        lock = threading.Lock()
+        running, peak = [0], [0]
+
+        def slow(request):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return HttpResponse()
+
+        view = async_views._async(slow)
+
+        async def burst():
+            return await asyncio.gather(*(
+                view(self.get('/')) for _ in range(7)))
+
+        # Не через async_to_sync: внутри него весь синхронный код идёт в
+        # одном потоке, как и без ограничения.
+        responses = asyncio.run(burst())
+        self.assertEqual([response.status_code for response in responses],
+                         [200] * 7)
+        self.assertEqual(async_views.concurrency(), 2)
+        self.assertEqual(peak[0], 2)
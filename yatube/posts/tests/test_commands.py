@@ -0,0 +1,14 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class CommandsTests(TestCase):
+    """Тесты management-команд приложения posts."""
+
+    def test_feed_queries_use_indexes(self):
+        """Тест планов запросов лент."""
+        out = StringIO()
+        call_command('check_feed_indexes', stdout=out, stderr=StringIO())
+        self.assertIn('используют индексы', out.getvalue())
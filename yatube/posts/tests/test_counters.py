@@ -0,0 +1,53 @@
+from django.test import TestCase
+
+from .. import counters
+from ..models import User, Post, Follow, AuthorStats
+
+
+class CountersTests(TestCase):
+    """Тесты денормализованных счётчиков."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.reader = User.objects.create_user(username='tiger')
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_posts_count(self):
+        """Тест счётчика постов при создании и удалении."""
+        post = Post.objects.create(text='Текст', author=CountersTests.author)
+        self.assertEqual(self.stats(CountersTests.author).posts_count, 1)
+        post.delete()
+        self.assertEqual(self.stats(CountersTests.author).posts_count, 0)
+
+    def test_follow_counts(self):
+        """Тест счётчиков подписчиков и подписок."""
+        follow = Follow.objects.create(author=CountersTests.author,
+                                       user=CountersTests.reader)
+        self.assertEqual(self.stats(CountersTests.author).followers_count, 1)
+        self.assertEqual(self.stats(CountersTests.reader).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.stats(CountersTests.author).followers_count, 0)
+        self.assertEqual(self.stats(CountersTests.reader).following_count, 0)
+
+    def test_reconcile_fixes_drift(self):
+        """Тест исправления расхождений и недостающих строк."""
+        Post.objects.create(text='Текст', author=CountersTests.author)
+        AuthorStats.objects.filter(user=CountersTests.author).update(
+            posts_count=42)
+        AuthorStats.objects.filter(user=CountersTests.reader).delete()
+        self.assertEqual(counters.reconcile(), 2)
+        self.assertEqual(self.stats(CountersTests.author).posts_count, 1)
+        self.assertTrue(
+            AuthorStats.objects.filter(user=CountersTests.reader).exists())
+        self.assertEqual(counters.reconcile(), 0)
+
+    def test_stats_for_missing_row(self):
+        """Тест сборки счётчиков при первом чтении."""
+        Post.objects.create(text='Текст', author=CountersTests.author)
+        AuthorStats.objects.filter(user=CountersTests.author).delete()
+        author = User.objects.get(pk=CountersTests.author.pk)
+        self.assertEqual(counters.stats_for(author).posts_count, 1)
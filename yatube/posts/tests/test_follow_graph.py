@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import follow_graph
+from ..models import Follow, User
+
+
+class FollowGraphTests(TestCase):
+    """Тесты графа подписок в кэше."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.leo, cls.tiger, cls.lynx, cls.puma = (
+            User.objects.create_user(username=name)
+            for name in ('leo', 'tiger', 'lynx', 'puma'))
+        for user, author in ((cls.leo, cls.tiger), (cls.leo, cls.lynx),
+                             (cls.tiger, cls.leo), (cls.tiger, cls.puma),
+                             (cls.lynx, cls.puma)):
+            Follow.objects.create(user=user, author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_batched_lookups(self):
+        """Тест пакетных ответов без запроса на каждого автора."""
+        cls = FollowGraphTests
+        ids = [cls.tiger.pk, cls.lynx.pk, cls.puma.pk, cls.leo.pk]
+        with self.assertNumQueries(2):
+            self.assertEqual(follow_graph.is_following(cls.leo.pk, ids),
+                             {cls.tiger.pk, cls.lynx.pk})
+            self.assertEqual(follow_graph.mutual(cls.leo.pk), {cls.tiger.pk})
+        with self.assertNumQueries(1):
+            self.assertEqual(follow_graph.mutual(cls.tiger.pk, ids),
+                             {cls.leo.pk})
+        with self.assertNumQueries(1):
+            self.assertEqual(follow_graph.counts([cls.puma.pk, cls.leo.pk]),
+                             {cls.puma.pk: (2, 0), cls.leo.pk: (1, 2)})
+
+    def test_suggestions(self):
+        """Тест подбора авторов по подпискам подписок."""
+        cls = FollowGraphTests
+        self.assertEqual(follow_graph.suggestions(cls.leo.pk),
+                         [cls.puma.pk])
+        newcomer = User.objects.create_user(username='cub')
+        self.assertEqual(follow_graph.suggestions(newcomer.pk, limit=2),
+                         [cls.puma.pk, cls.leo.pk])
+
+    def test_invalidated_on_follow_and_unfollow(self):
+        """Тест сброса списка при подписке и отписке."""
+        cls = FollowGraphTests
+        self.client.force_login(cls.puma)
+        profile = reverse('posts:profile', args=[cls.leo.username])
+        self.assertFalse(self.client.get(profile).context['following'])
+        self.client.get(reverse('posts:profile_follow',
+                                args=[cls.leo.username]))
+        self.assertTrue(self.client.get(profile).context['following'])
+        self.assertEqual(follow_graph.mutual(cls.puma.pk), set())
+        self.client.get(reverse('posts:profile_unfollow',
+                                args=[cls.leo.username]))
+        self.assertFalse(self.client.get(profile).context['following'])
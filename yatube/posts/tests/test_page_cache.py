@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+    """Тесты кэша страниц для анонимных читателей."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.reader = User.objects.create_user(username='tiger')
+        cls.group = Group.objects.create(title='Группа', slug='slug',
+                                         description='Описание')
+        cls.post = Post.objects.create(text='Пост', author=cls.author,
+                                       group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def assertHit(self, url, hit=True, **params):
+        response = self.guest_client.get(url, params)
+        self.assertEqual(response['X-Page-Cache'], 'hit' if hit else 'miss')
+        return response
+
+    def test_pages_cached_with_headers(self):
+        """Тест попадания в кэш и заголовков для CDN."""
+        pages = {
+            reverse('posts:index'): 'index',
+            reverse('posts:group_list', args=[PageCacheTests.group.slug]):
+                f'group:{PageCacheTests.group.pk}',
+            reverse('posts:profile', args=[PageCacheTests.author]):
+                f'author:{PageCacheTests.author.pk} '
+                f'profile:{PageCacheTests.author.pk}',
+            reverse('posts:post_detail', args=[PageCacheTests.post.pk]):
+                f'post:{PageCacheTests.post.pk}',
+        }
+        for url, surrogate_keys in pages.items():
+            with self.subTest(Адрес=url):
+                response = self.assertHit(url, hit=False)
+                self.assertEqual(response['Surrogate-Key'], surrogate_keys)
+                self.assertIn('public', response['Cache-Control'])
+                with self.assertNumQueries(0):
+                    self.assertHit(url)
+                self.assertHit(url, hit=False, cursor='другая-страница')
+
+    def test_targeted_purge(self):
+        """Тест сброса только затронутых страниц."""
+        index = reverse('posts:index')
+        detail = reverse('posts:post_detail', args=[PageCacheTests.post.pk])
+        profile = reverse('posts:profile', args=[PageCacheTests.author])
+        for url in (index, detail, profile):
+            self.assertHit(url, hit=False)
+        Comment.objects.create(post=PageCacheTests.post,
+                               author=PageCacheTests.reader,
+                               text='Комментарий')
+        self.assertHit(index)
+        self.assertContains(self.assertHit(detail, hit=False), 'Комментарий')
+        Follow.objects.create(author=PageCacheTests.author,
+                              user=PageCacheTests.reader)
+        self.assertHit(index)
+        self.assertHit(profile, hit=False)
+        Post.objects.create(text='Новый пост', author=PageCacheTests.author)
+        self.assertContains(self.assertHit(index, hit=False), 'Новый пост')
+
+    def test_ids_follow_new_and_renamed_objects(self):
+        """Тест: промах по slug не кэшируется, переименование сбрасывает
+        id по имени."""
+        url = reverse('posts:group_list', args=['new'])
+        self.assertEqual(self.guest_client.get(url).status_code, 404)
+        group = Group.objects.create(title='Новая', slug='new',
+                                     description='Описание')
+        self.assertEqual(self.assertHit(url, hit=False)['Surrogate-Key'],
+                         f'group:{group.pk}')
+        profile = reverse('posts:profile', args=['lion'])
+        self.assertEqual(self.guest_client.get(profile).status_code, 404)
+        PageCacheTests.author.username = 'lion'
+        PageCacheTests.author.save()
+        self.assertEqual(
+            self.assertHit(profile, hit=False)['Surrogate-Key'],
+            f'author:{PageCacheTests.author.pk} '
+            f'profile:{PageCacheTests.author.pk}')
+        self.assertHit(profile)
+        PageCacheTests.author.username = 'leo'
+        PageCacheTests.author.save()
+        other = User.objects.create_user(username='lion')
+        self.assertEqual(
+            self.assertHit(profile, hit=False)['Surrogate-Key'],
+            f'author:{other.pk} profile:{other.pk}')
+
+    def test_logged_in_not_cached(self):
+        """Тест страниц авторизованного пользователя мимо кэша."""
+        client = Client()
+        client.force_login(PageCacheTests.reader)
+        response = client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertIn('private', response['Cache-Control'])
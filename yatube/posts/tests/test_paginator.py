@@ -3,6 +3,7 @@ from django.test import TestCase, Client
 from django.urls import reverse
 
 from ..models import Post, Group, User
+from ..paginator import encode_cursor
 
 
 class PaginatorViewsTests(TestCase):
@@ -44,9 +45,63 @@ class PaginatorViewsTests(TestCase):
         )
         for name in names:
             with self.subTest(Имя=name):
+                first_page = self.authorized_client.get(name).context[
+                    'page_obj']
                 response = self.authorized_client.get(
-                    reverse('posts:index') + '?page=2')
+                    name, {'cursor': first_page.next_cursor})
                 self.assertEqual(
                     len(response.context['page_obj']),
                     settings.COUNT_OF_CREATE_POSTS - settings.NUM_POSTS
                 )
+
+    def test_previous_cursor_returns_first_page(self):
+        """Тест возврата на предыдущую страницу по курсору."""
+        name = reverse('posts:index')
+        first_page = self.authorized_client.get(name).context['page_obj']
+        second_page = self.authorized_client.get(
+            name, {'cursor': first_page.next_cursor}).context['page_obj']
+        self.assertFalse(second_page.has_next())
+        self.assertTrue(second_page.has_previous())
+        response = self.authorized_client.get(
+            name, {'cursor': second_page.previous_cursor})
+        self.assertEqual(list(response.context['page_obj']),
+                         list(first_page))
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_links_keep_other_parameters(self):
+        """Тест: ссылки меняют только свой курсор."""
+        name = reverse('posts:index')
+        first_page = self.guest_client.get(name).context['page_obj']
+        response = self.guest_client.get(
+            name, {'cursor': first_page.next_cursor, 'lang': 'ru'})
+        page = response.context['page_obj']
+        self.assertContains(response, 'href="?lang=ru"')
+        self.assertContains(
+            response, f'href="?lang=ru&amp;cursor={page.previous_cursor}"')
+
+    def test_broken_cursor_returns_first_page(self):
+        """Тест испорченного курсора."""
+        response = self.authorized_client.get(reverse('posts:index'),
+                                              {'cursor': 'не-курсор'})
+        self.assertEqual(len(response.context['page_obj']),
+                         settings.NUM_POSTS)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_tampered_cursor_returns_first_page(self):
+        """Тест курсоров с подменённой структурой значений."""
+        tokens = [encode_cursor(values, 'n') for values in (
+            [None, None], [{'a': 1}, 1], [[1], 1], ['2022-01-01', {'a': 1}],
+            [1], [1, 2, 3], ['не-дата', 1])]
+        names = (reverse('posts:index'), reverse('posts:follow_index'),
+                 reverse('posts:trending'), reverse('api:posts'))
+        for name in names:
+            for token in tokens:
+                with self.subTest(Имя=name, Курсор=token):
+                    response = self.authorized_client.get(name,
+                                                          {'cursor': token})
+                    self.assertEqual(response.status_code, 200)
+        response = self.authorized_client.get(reverse('posts:index'),
+                                              {'cursor': tokens[0]})
+        self.assertFalse(response.context['page_obj'].has_previous())
+        self.assertEqual(len(response.context['page_obj']),
+                         settings.NUM_POSTS)
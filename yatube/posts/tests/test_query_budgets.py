@@ -0,0 +1,20 @@
+from django.test import TestCase
+
+from .. import benchmark
+
+
+class QueryBudgetsTests(TestCase):
+    """Тесты бюджетов SQL-запросов для всех страниц."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        benchmark.seed(users=30, groups=3, posts=120, comments=300,
+                       follows=120)
+
+    def test_routes_within_budget(self):
+        """Тест числа запросов каждой страницы с холодным кэшем."""
+        report = benchmark.run()
+        self.assertEqual(len(report['results']),
+                         len(benchmark.QUERY_BUDGETS))
+        self.assertEqual(report['violations'], [])
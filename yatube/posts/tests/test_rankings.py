@@ -0,0 +1,84 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import rankings
+from ..models import (AuthorRank, Comment, Follow, Group, GroupRank, Post,
+                      PostRank, User)
+
+
+class RankingsTests(TestCase):
+    """Тесты рейтингов и страниц из них."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.reader = User.objects.create_user(username='tiger')
+        cls.quiet = Group.objects.create(title='Тихая', slug='quiet',
+                                         description='Описание')
+        cls.busy = Group.objects.create(title='Шумная', slug='busy',
+                                        description='Описание')
+        cls.old, cls.fresh, cls.silent = (
+            Post.objects.create(text=text, author=cls.author, group=cls.busy)
+            for text in ('Старый', 'Свежий', 'Без комментариев'))
+        now = timezone.now()
+        for post, hours in ((cls.old, 60), (cls.old, 50), (cls.fresh, 1),
+                            (cls.old, 24 * 30)):
+            comment = Comment.objects.create(post=post, author=cls.reader,
+                                             text='Комментарий')
+            Comment.objects.filter(pk=comment.pk).update(
+                pub_date=now - timedelta(hours=hours))
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_decayed_scores(self):
+        """Тест весов: свежее событие важнее двух старых."""
+        sizes = rankings.update()
+        self.assertEqual(list(sizes.values()), [2, 2, 1])
+        cls = RankingsTests
+        ranks = list(PostRank.objects.order_by('-score'))
+        self.assertEqual([rank.post_id for rank in ranks],
+                         [cls.fresh.pk, cls.old.pk])
+        self.assertEqual(ranks[1].comments_count, 2)
+        self.assertAlmostEqual(rankings.decay(settings.RANKING_HALF_LIFE),
+                               0.5)
+        self.assertEqual(GroupRank.objects.get(group=cls.quiet).score, 0)
+        self.assertEqual(GroupRank.objects.get(group=cls.busy).posts_count,
+                         3)
+        self.assertEqual(AuthorRank.objects.get().author, cls.author)
+
+    def test_new_group_listed(self):
+        """Тест: новая группа видна в каталоге до пересчёта."""
+        self.assertEqual(
+            set(GroupRank.objects.values_list('group__slug', flat=True)),
+            {'quiet', 'busy'})
+
+    @override_settings(NUM_POSTS=1)
+    def test_pages_read_from_rankings(self):
+        """Тест страниц «Популярное» и каталога групп."""
+        call_command('update_rankings', stdout=StringIO())
+        cls = RankingsTests
+        for name, first, second in (
+                ('posts:trending', cls.fresh.pk, cls.old.pk),
+                ('posts:group_directory', cls.busy.pk, cls.quiet.pk)):
+            with self.subTest(Имя=name):
+                response = self.client.get(reverse(name))
+                page = response.context['page_obj']
+                self.assertEqual(getattr(page[0], page.paginator.fields[1]),
+                                 first)
+                response = self.client.get(
+                    reverse(name), {'cursor': page.next_cursor})
+                page = response.context['page_obj']
+                self.assertEqual(getattr(page[0], page.paginator.fields[1]),
+                                 second)
+        response = self.client.get(reverse('posts:trending'))
+        self.assertContains(response, 'Набирают подписчиков')
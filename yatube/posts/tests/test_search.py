@@ -0,0 +1,65 @@
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post, User
+from ..stemmer import stem
+
+
+class SearchTests(TestCase):
+    """Тесты полнотекстового поиска."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.cats = Post.objects.create(
+            text='Рыжие коты спали на тёплой крыше', author=cls.author)
+        cls.dogs = Post.objects.create(
+            text='Собаки гуляли в парке', author=cls.author)
+
+    def test_stemmer(self):
+        """Тест приведения словоформ к одной основе."""
+        for word, expected in (('коты', 'кот'), ('котами', 'кот'),
+                               ('красивая', 'красив'),
+                               ('красивые', 'красив'), ('ёлка', 'елк')):
+            with self.subTest(Слово=word):
+                self.assertEqual(stem(word), expected)
+
+    def test_finds_word_forms(self):
+        """Тест поиска по другой форме слова."""
+        self.assertEqual(search.search('кот', 10), [SearchTests.cats.pk])
+        self.assertEqual(search.search('тёплая крыша', 10),
+                         [SearchTests.cats.pk])
+        self.assertEqual(search.search('', 10), [])
+
+    def test_index_follows_changes(self):
+        """Тест обновления индекса при правке и удалении."""
+        post = Post.objects.create(text='Жираф', author=SearchTests.author)
+        self.assertEqual(search.search('жирафы', 10), [post.pk])
+        post.text = 'Слон'
+        post.save()
+        self.assertEqual(search.search('жираф', 10), [])
+        self.assertEqual(search.search('слоны', 10), [post.pk])
+        post.delete()
+        self.assertEqual(search.search('слон', 10), [])
+
+    def test_comments_rank_below_posts(self):
+        """Тест поиска по комментариям с меньшим весом."""
+        Comment.objects.create(post=SearchTests.dogs,
+                               author=SearchTests.author, text='А где коты?')
+        self.assertEqual(search.search('коты', 10),
+                         [SearchTests.cats.pk, SearchTests.dogs.pk])
+
+    def test_rebuild_command(self):
+        """Тест перестройки индекса командой."""
+        search.remove_post(SearchTests.dogs.pk)
+        call_command('rebuild_search_index', batch_size=1, stdout=None)
+        self.assertEqual(search.search('собака', 10), [SearchTests.dogs.pk])
+
+    def test_search_page(self):
+        """Тест страницы поиска."""
+        response = Client().get(reverse('posts:search'), {'q': 'собаки'})
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(response.context['posts'], [SearchTests.dogs])
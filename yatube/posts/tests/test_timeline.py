@@ -0,0 +1,68 @@
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from ..models import User, Post, Follow, TimelineEntry
+
+
+class TimelineTests(TestCase):
+    """Тесты материализованной ленты подписок."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='leo')
+        cls.author = User.objects.create_user(username='tiger')
+        cls.client_reader = Client()
+        cls.client_reader.force_login(cls.reader)
+
+    def follow_page(self):
+        response = TimelineTests.client_reader.get(
+            reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_new_post_fanned_out_to_followers(self):
+        """Тест раскладки нового поста по лентам подписчиков."""
+        Follow.objects.create(author=TimelineTests.author,
+                              user=TimelineTests.reader)
+        post = Post.objects.create(text='Текст', author=TimelineTests.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=TimelineTests.reader, post=post).exists())
+        self.assertEqual(self.follow_page(), [post])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Тест дополнения ленты при подписке и очистки при отписке."""
+        post = Post.objects.create(text='Текст', author=TimelineTests.author)
+        TimelineTests.client_reader.get(
+            reverse('posts:profile_follow',
+                    kwargs={'username': TimelineTests.author.username}))
+        self.assertEqual(self.follow_page(), [post])
+        TimelineTests.client_reader.get(
+            reverse('posts:profile_unfollow',
+                    kwargs={'username': TimelineTests.author.username}))
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=TimelineTests.reader).exists())
+        self.assertEqual(self.follow_page(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_celebrity_posts_read_on_demand(self):
+        """Тест чтения постов популярного автора без раскладки."""
+        Follow.objects.create(author=TimelineTests.author,
+                              user=TimelineTests.reader)
+        post = Post.objects.create(text='Текст', author=TimelineTests.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.follow_page(), [post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_posts_fanned_out_when_author_drops_below_limit(self):
+        """Тест раскладки постов автора, переставшего быть популярным."""
+        other = User.objects.create_user(username='lion')
+        Follow.objects.create(author=TimelineTests.author,
+                              user=TimelineTests.reader)
+        follow = Follow.objects.create(author=TimelineTests.author,
+                                       user=other)
+        post = Post.objects.create(text='Текст', author=TimelineTests.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        follow.delete()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=TimelineTests.reader, post=post).exists())
+        self.assertEqual(self.follow_page(), [post])
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from tasks.models import Job
+
+from .. import search, thumbnails, transfer
+from ..models import AuthorStats, Comment, Follow, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TransferTests(TestCase):
+    """Тесты выгрузки и загрузки данных."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.export_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(cls.export_dir, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_superuser(username='leo')
+        self.reader = User.objects.create_user(username='tiger')
+        self.group = Group.objects.create(title='Группа', slug='slug',
+                                          description='Описание')
+        self.post = Post.objects.create(
+            text='Пост с "кавычками",\nзапятой и переносом',
+            author=self.author, group=self.group,
+            image=SimpleUploadedFile(name='small.gif', content=(
+                b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21'
+                b'\xf9\x04\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00'
+                b'\x01\x00\x00\x02\x02\x4c\x01\x00\x3b'),
+                content_type='image/gif'))
+        thumbnails.generate(self.post.pk)
+        Post.objects.filter(pk=self.post.pk).update(
+            updated_at=self.post.pub_date + timedelta(days=1))
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        Follow.objects.create(author=self.author, user=self.reader)
+
+    def snapshot(self):
+        return (list(Post.objects.values_list('pk', 'text', 'pub_date',
+                                              'updated_at', 'author_id',
+                                              'group_id')),
+                list(Comment.objects.values_list('pk', 'text', 'pub_date')),
+                list(Follow.objects.values_list('author_id', 'user_id',
+                                                'created')),
+                list(User.objects.values_list('username', 'password',
+                                              'is_staff', 'is_superuser')))
+
+    def test_round_trip(self):
+        """Тест выгрузки и загрузки в обоих форматах."""
+        before = self.snapshot()
+        for fmt in ('ndjson', 'csv'):
+            with self.subTest(Формат=fmt):
+                directory = os.path.join(TransferTests.export_dir, fmt)
+                call_command('export_yatube', directory, format=fmt,
+                             stdout=StringIO())
+                self.assertTrue(os.path.exists(os.path.join(
+                    directory, 'media', self.post.image.name)))
+                User.objects.all().delete()
+                Group.objects.all().delete()
+                os.remove(os.path.join(TEMP_MEDIA_ROOT,
+                                       self.post.image.name))
+                call_command('import_yatube', directory, batch_size=1,
+                             batches_per_transaction=2, stdout=StringIO())
+                self.assertEqual(self.snapshot(), before)
+                post = Post.objects.get(pk=self.post.pk)
+                self.assertTrue(os.path.exists(post.image.path))
+                self.assertTrue(post.thumbnails)
+                for variant in post.image_variants['files']:
+                    self.assertTrue(os.path.exists(os.path.join(
+                        TEMP_MEDIA_ROOT, variant['name'])))
+                self.assertEqual(AuthorStats.objects.get(
+                    user=self.author).followers_count, 1)
+                self.assertEqual(self.reader.timeline.count(), 1)
+                self.assertEqual(search.search('кавычки', 10), [post.pk])
+
+    @override_settings(TASKS_EAGER=False)
+    def test_thumbnails_requeued(self):
+        """Тест постановки миниатюр в очередь после загрузки."""
+        with self.captureOnCommitCallbacks(execute=True):
+            transfer.rebuild_derived()
+        self.assertTrue(Job.objects.filter(name='posts.thumbnails.generate',
+                                           args=[self.post.pk]).exists())
@@ -1,15 +1,25 @@
+import io
+import re
 import shutil
 import tempfile
+from http import HTTPStatus
 
 from django import forms
 from django.conf import settings
 from django.core.cache import cache
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
 
-from ..models import User, Group, Post, Follow
+from tasks import queue
+from tasks.models import Job
+
+from .. import thumbnails
+from ..models import User, Group, Post, Follow, Comment
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -44,6 +54,7 @@ class ViewsTests(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        cache.clear()
         self.small_gif = (
             b'\x47\x49\x46\x38\x39\x61\x02\x00'
             b'\x01\x00\x80\x00\x00\x00\x00\x00'
@@ -167,14 +178,35 @@ class ViewsTests(TestCase):
 
     def test_cash_index(self):
         """Тест кэша главной страницы."""
-        post = Post.objects.create(text='Test cash', author=ViewsTests.user)
         response_before = ViewsTests.guest_client.get(reverse('posts:index'))
-        post.delete()
+        # bulk_create не шлёт сигналов, поэтому версия ленты не меняется.
+        Post.objects.bulk_create([Post(text='Test cash',
+                                       author=ViewsTests.user)])
+        response_cached = ViewsTests.guest_client.get(reverse('posts:index'))
+        self.assertEqual(response_before.content, response_cached.content)
+        post = Post.objects.create(text='Новый пост', author=ViewsTests.user)
         response_after = ViewsTests.guest_client.get(reverse('posts:index'))
-        self.assertEqual(response_before.content, response_after.content)
-        cache.clear()
-        response_after_2 = ViewsTests.guest_client.get(reverse('posts:index'))
-        self.assertNotEqual(response_before.content, response_after_2.content)
+        self.assertContains(response_after, post.text)
+        post.delete()
+        response_deleted = ViewsTests.guest_client.get(
+            reverse('posts:index'))
+        self.assertNotContains(response_deleted, post.text)
+
+    def test_group_cache_follows_edited_post(self):
+        """Тест сброса кэша обеих групп при переносе поста."""
+        old_url = reverse('posts:group_list',
+                          kwargs={'slug': ViewsTests.group.slug})
+        new_url = reverse('posts:group_list',
+                          kwargs={'slug': ViewsTests.group_another.slug})
+        ViewsTests.guest_client.get(old_url)
+        ViewsTests.guest_client.get(new_url)
+        self.post.text = 'Перенесённый пост'
+        self.post.group = ViewsTests.group_another
+        self.post.save()
+        self.assertNotContains(ViewsTests.guest_client.get(old_url),
+                               self.post.text)
+        self.assertContains(ViewsTests.guest_client.get(new_url),
+                            self.post.text)
 
     def test_create_follow_authorized(self):
         """Тест создания подписок авторизованным пользователем."""
@@ -218,3 +250,199 @@ class ViewsTests(TestCase):
         """Тест подписки на самого себя."""
         with self.assertRaisesMessage(IntegrityError, 'author_not_user'):
             Follow.objects.create(author=ViewsTests.user, user=ViewsTests.user)
+
+    def test_post_detail_comments_constant_queries(self):
+        """Тест числа запросов post_detail при росте комментариев."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                ViewsTests.authorized_client.get(url)
+            return len(context)
+
+        Comment.objects.create(post=self.post, author=ViewsTests.user,
+                               text='Комментарий')
+        one_comment = count_queries()
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=ViewsTests.another_user,
+                    text=f'Комментарий {i}')
+            for i in range(5)
+        )
+        self.assertEqual(count_queries(), one_comment)
+
+    @override_settings(NUM_COMMENTS=2)
+    def test_post_detail_comments_paged(self):
+        """Тест постраничного вывода комментариев."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=ViewsTests.user,
+                    text=f'Комментарий {i}')
+            for i in range(3)
+        )
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        first = ViewsTests.guest_client.get(url).context['comments']
+        self.assertEqual([c.text for c in first],
+                         ['Комментарий 0', 'Комментарий 1'])
+        second = ViewsTests.guest_client.get(
+            url, {'comments': first.next_cursor}).context['comments']
+        self.assertEqual([c.text for c in second], ['Комментарий 2'])
+
+    @override_settings(STREAMING_PAGES={'posts:post_detail': 3},
+                       STREAMING_CHUNK_SIZE=2)
+    def test_post_detail_streamed(self):
+        """Тест потоковой страницы поста с комментариями."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=ViewsTests.user,
+                    text=f'Комментарий {i}')
+            for i in range(4)
+        )
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        response = ViewsTests.authorized_client.get(url)
+        self.assertTrue(response.streaming)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertIn('<head>', chunks[0])
+        self.assertNotIn('Комментарий 0', chunks[0])
+        page = ''.join(chunks)
+        self.assertIn('csrfmiddlewaretoken', page)
+        for number in range(3):
+            self.assertIn(f'Комментарий {number}', page)
+        self.assertNotIn('Комментарий 3', page)
+        self.assertTrue(page.rstrip().endswith('</html>'))
+        cursor = re.search(r'\?comments=([\w-]+)', page).group(1)
+        second = b''.join(ViewsTests.authorized_client.get(
+            url, {'comments': cursor}).streaming_content).decode()
+        self.assertIn('Комментарий 3', second)
+        self.assertNotIn('Комментарий 2', second)
+
+    @override_settings(TASKS_EAGER=False)
+    def test_thumbnails_prepared_in_background(self):
+        """Тест подготовки миниатюр вне запроса."""
+        with self.captureOnCommitCallbacks(execute=True):
+            ViewsTests.authorized_client.post(
+                reverse('posts:post_create'),
+                data={'text': 'Пост с картинкой',
+                      'image': SimpleUploadedFile(
+                          name='new.gif', content=self.small_gif,
+                          content_type='image/gif')})
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertTrue(Job.objects.filter(name=thumbnails.generate.name,
+                                           args=[post.pk]).exists())
+        self.assertEqual(post.thumbnails, {})
+        queue.run_pending()
+        post.refresh_from_db()
+        self.assertIn('feed', post.thumbnails)
+        variants = post.image_variants
+        self.assertEqual(variants['files'][-1]['format'], 'jpg')
+        self.assertTrue(variants['placeholder'].startswith('data:image/'))
+        self.assertTrue(all(variant['bytes'] > 0
+                            for variant in variants['files']))
+        response = ViewsTests.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, variants['srcset'])
+
+    def test_old_image_files_deleted(self):
+        """Тест удаления миниатюр и вариантов сменённой картинки."""
+        thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        old_files = thumbnails.variant_names(self.post.image_variants) + [
+            url[len(settings.MEDIA_URL):]
+            for url in self.post.thumbnails.values()]
+        ViewsTests.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': self.post.text,
+                  'image': SimpleUploadedFile(
+                      name='other.gif', content=self.small_gif,
+                      content_type='image/gif')})
+        self.post.refresh_from_db()
+        new_files = thumbnails.variant_names(self.post.image_variants)
+        self.assertTrue(new_files)
+        for name in old_files:
+            with self.subTest(Файл=name):
+                self.assertFalse(default_storage.exists(name))
+        for name in new_files:
+            with self.subTest(Файл=name):
+                self.assertTrue(default_storage.exists(name))
+
+    def transparent_variant(self, extension):
+        """Вариант полностью прозрачной красной картинки в формате."""
+        buffer = io.BytesIO()
+        Image.new('RGBA', (4, 4), (255, 0, 0, 0)).save(buffer, 'PNG')
+        post = Post.objects.create(
+            text='Прозрачная картинка', author=ViewsTests.user,
+            image=SimpleUploadedFile(name='clear.png',
+                                     content=buffer.getvalue(),
+                                     content_type='image/png'))
+        thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        name = next(variant['name']
+                    for variant in post.image_variants['files']
+                    if variant['format'] == extension)
+        with default_storage.open(name) as file, Image.open(file) as image:
+            image.load()
+            return image
+
+    def test_transparency_flattened_in_jpeg(self):
+        """Тест: в JPEG прозрачность заливается белым."""
+        image = self.transparent_variant('jpg')
+        self.assertEqual(image.mode, 'RGB')
+        self.assertEqual(image.getpixel((0, 0)), (255, 255, 255))
+
+    def test_transparency_kept_in_webp(self):
+        """Тест: в WebP прозрачность остаётся."""
+        if ('WEBP', 'image/webp', 'webp') not in thumbnails.variant_formats():
+            self.skipTest('Pillow собран без WebP')
+        image = self.transparent_variant('webp')
+        self.assertEqual(image.mode, 'RGBA')
+        self.assertEqual(image.getpixel((0, 0))[3], 0)
+
+    def test_conditional_get(self):
+        """Тест ответа 304 без рендеринга и сброса валидаторов правкой."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list',
+                    kwargs={'slug': ViewsTests.group.slug}),
+            reverse('posts:profile', kwargs={'username': ViewsTests.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        etags = {url: ViewsTests.guest_client.get(url)['ETag']
+                 for url in urls}
+        for url in urls:
+            with self.subTest(Адрес=url):
+                response = ViewsTests.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response.templates, [])
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        for url in urls:
+            with self.subTest(Адрес=url):
+                response = ViewsTests.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertContains(response, self.post.text)
+
+    def test_etag_changes_with_old_comment_and_follow(self):
+        """Тест нового ETag после удаления старого комментария и после
+        подписки с отпиской."""
+        older = Comment.objects.create(post=self.post, author=self.user,
+                                       text='Первый')
+        Comment.objects.create(post=self.post, author=self.user,
+                               text='Второй')
+        client = ViewsTests.another_authorized_client
+        post_url = reverse('posts:post_detail',
+                           kwargs={'post_id': self.post.pk})
+        profile_url = reverse('posts:profile',
+                              kwargs={'username': ViewsTests.user})
+        # Первый ответ ставит cookie CSRF, а она входит в ETag.
+        client.get(post_url)
+        etags = {url: client.get(url)['ETag']
+                 for url in (post_url, profile_url)}
+        older.delete()
+        follow = Follow.objects.create(user=ViewsTests.another_user,
+                                       author=ViewsTests.user)
+        follow.delete()
+        for url, etag in etags.items():
+            with self.subTest(Адрес=url):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,177 @@
+"""Фоновая подготовка миниатюр и адаптивных вариантов картинок постов.
+
+Миниатюры всех размеров из ``THUMBNAIL_PRESETS`` и набор вариантов по
+ширине (``IMAGE_VARIANT_WIDTHS``) в AVIF/WebP/JPEG строит фоновая задача
+после коммита. Адреса и описание вариантов сохраняются в ``Post``, а
+шаблоны только читают готовые данные и не ресайзят картинки в запросе.
+
+Прозрачность сохраняется в AVIF и WebP; в JPEG картинка ложится на белый
+фон. Когда картинку поста меняют или пост удаляют, её миниатюры и
+варианты удаляет задача ``discard``.
+"""
+import base64
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from sorl.thumbnail import delete, get_thumbnail
+
+from tasks.queue import task
+
+from . import cache_versions
+from .models import Post
+
+
+def build(image):
+    """Строит все миниатюры картинки и возвращает их адреса."""
+    return {
+        preset: get_thumbnail(image, geometry, **options).url
+        for preset, (geometry, options) in settings.THUMBNAIL_PRESETS.items()
+    }
+
+
+# Современные форматы пишутся, только если их поддерживает сборка Pillow;
+# JPEG нужен всегда как запасной вариант для <img>.
+MODERN_FORMATS = (
+    ('AVIF', 'image/avif', 'avif'),
+    ('WEBP', 'image/webp', 'webp'),
+)
+FALLBACK_FORMAT = ('JPEG', 'image/jpeg', 'jpg')
+
+
+def variant_formats():
+    # До Image.init() в Image.SAVE только форматы из preinit(): без вызова
+    # свежий воркер не увидел бы WebP и AVIF.
+    Image.init()
+    return [fmt for fmt in MODERN_FORMATS if fmt[0] in Image.SAVE]
+
+
+def _encode(image, pil_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def _open(image):
+    """Картинка в RGB, а если в ней есть прозрачность - в RGBA."""
+    image.open()
+    with Image.open(image) as opened:
+        source = ImageOps.exif_transpose(opened)
+        transparent = (source.mode in ('RGBA', 'LA', 'PA')
+                       or 'transparency' in source.info)
+        return source.convert('RGBA' if transparent else 'RGB')
+
+
+def _flatten(image):
+    """Картинка без прозрачности для JPEG: на белом фоне."""
+    if image.mode != 'RGBA':
+        return image
+    flat = Image.new('RGB', image.size, 'white')
+    flat.paste(image, mask=image.getchannel('A'))
+    return flat
+
+
+def _placeholder(image):
+    """Крошечное размытое превью (LQIP) в виде data URI."""
+    tiny = image.copy()
+    tiny.thumbnail((16, 16))
+    data = _encode(_flatten(tiny), 'JPEG', quality=40)
+    return 'data:image/jpeg;base64,' + base64.b64encode(data).decode()
+
+
+def _resized(source):
+    """Уменьшенные копии под каждую ширину, без увеличения оригинала."""
+    box_width, box_height = settings.IMAGE_VARIANT_BOX
+    sizes = {}
+    for width in settings.IMAGE_VARIANT_WIDTHS:
+        copy = source.copy()
+        copy.thumbnail((width, round(width * box_height / box_width)))
+        sizes.setdefault(copy.size, copy)
+    return sorted(sizes.values(), key=lambda image: image.width)
+
+
+def build_variants(image):
+    """Пишет варианты картинки разной ширины и возвращает их описание."""
+    source = _open(image)
+    stem = os.path.splitext(os.path.basename(image.name))[0]
+    files, sources = [], {}
+    for resized in _resized(source):
+        for pil_format, mime, extension in (variant_formats()
+                                            + [FALLBACK_FORMAT]):
+            data = _encode(
+                _flatten(resized) if pil_format == 'JPEG' else resized,
+                pil_format, quality=settings.IMAGE_VARIANT_QUALITY)
+            name = default_storage.save(
+                f'posts/variants/{stem}-{resized.width}.{extension}',
+                ContentFile(data))
+            url = default_storage.url(name)
+            files.append({'name': name, 'format': extension,
+                          'width': resized.width, 'height': resized.height,
+                          'bytes': len(data)})
+            sources.setdefault(mime, []).append(f'{url} {resized.width}w')
+    largest = files[-1]
+    return {
+        'width': largest['width'],
+        'height': largest['height'],
+        'placeholder': _placeholder(source),
+        'src': default_storage.url(largest['name']),
+        'srcset': ', '.join(sources.pop(FALLBACK_FORMAT[1])),
+        'sources': [{'type': mime, 'srcset': ', '.join(srcset)}
+                    for mime, srcset in sources.items()],
+        'files': files,
+    }
+
+
+def variant_names(variants):
+    """Имена файлов вариантов из описания ``build_variants``."""
+    return [variant['name'] for variant in (variants or {}).get('files', [])]
+
+
+def _delete_files(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+@task()
+def generate(post_id):
+    """Готовит миниатюры поста, если картинка не сменилась за это время.
+
+    Варианты прошлой сборки той же картинки удаляются.
+    """
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'image_variants', 'group_id', 'author_id').first()
+    if post is None or not post.image:
+        return
+    urls = build(post.image)
+    variants = build_variants(post.image)
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=urls, image_variants=variants)
+    if not updated:
+        # Картинку сменили или пост удалили, пока шла сборка.
+        discard(post.image.name, variant_names(variants))
+        return
+    _delete_files(set(variant_names(post.image_variants))
+                  - set(variant_names(variants)))
+    cache_versions.bump(
+        cache_versions.post_scope(post_id),
+        *cache_versions.post_scopes(post.group_id, post.author_id))
+
+
+@task()
+def discard(image_name, names):
+    """Удаляет миниатюры и варианты картинки, которая посту уже не нужна.
+
+    Сам файл картинки остаётся.
+    """
+    if image_name:
+        delete(image_name, delete_file=False)
+    _delete_files(names)
+
+
+def schedule(post):
+    """Ставит подготовку миниатюр в очередь после коммита транзакции."""
+    if post.image:
+        generate.delay(post.pk)
@@ -0,0 +1,137 @@
+"""Материализованные ленты подписок (fan-out on write).
+
+Новый пост автора раскладывается по лентам его подписчиков, и чтение
+``follow_index`` становится одним проходом по индексу
+``(user, -pub_date, -post)``. Посты авторов, у которых подписчиков больше
+``TIMELINE_FANOUT_LIMIT``, не раскладываются, а подмешиваются при
+чтении (fan-out on read). Когда автор опускается до порога, его последние
+посты раскладываются по лентам всех подписчиков (``fanout_recent``):
+написанные выше порога иначе не попали бы ни в одну ленту.
+"""
+from django.conf import settings
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .paginator import CursorPaginator
+
+
+def is_celebrity(author_id):
+    return AuthorStats.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).exists()
+
+
+def celebrities_followed_by(user):
+    """Авторы из подписок, посты которых читаются без раскладки."""
+    return Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).values('author')
+
+
+def _bulk_add(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True)
+
+
+def fanout_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    _bulk_add(
+        TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in follower_ids.iterator()
+    )
+
+
+def _recent_posts(author_id):
+    return Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id').values_list(
+        'id', 'pub_date')[:settings.TIMELINE_BACKFILL]
+
+
+def fanout_recent(author_id):
+    """Раскладывает последние посты автора по лентам всех подписчиков."""
+    if is_celebrity(author_id):
+        return
+    posts = list(_recent_posts(author_id))
+    follower_ids = Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+    entries = []
+    for user_id in follower_ids.iterator():
+        entries += [TimelineEntry(user_id=user_id, post_id=post_id,
+                                  pub_date=pub_date)
+                    for post_id, pub_date in posts]
+        if len(entries) >= settings.TIMELINE_BATCH_SIZE:
+            _bulk_add(entries)
+            entries = []
+    _bulk_add(entries)
+
+
+def backfill(user, author):
+    """Добавляет в ленту последние посты автора после подписки."""
+    if is_celebrity(author.pk):
+        return
+    _bulk_add(
+        TimelineEntry(user=user, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in _recent_posts(author.pk)
+    )
+
+
+def prune(user, author):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+
+
+def rebuild(user):
+    """Пересобирает ленту пользователя с нуля."""
+    TimelineEntry.objects.filter(user=user).delete()
+    for follow in Follow.objects.filter(user=user).select_related('author'):
+        backfill(user, follow.author)
+
+
+class TimelineFeed:
+    """Лента подписок как источник для CursorPaginator."""
+
+    model = Post
+
+    def __init__(self, user):
+        self.user = user
+
+    def __str__(self):
+        return f'timeline:{self.user.pk}'
+
+    def count(self):
+        return Post.objects.filter(author__following__user=self.user).count()
+
+    def seek(self, values, forward, per_page):
+        """Страница ленты: материализованная часть плюс fan-out on read.
+
+        Посты каждого популярного автора читаются отдельным запросом по
+        индексу ``(author, -pub_date, -id)`` и сливаются с лентой.
+        """
+        posts = {
+            entry.post_id: entry.post
+            for entry in self.entries_page(values, forward, per_page)
+        }
+        for author_id in celebrities_followed_by(self.user).values_list(
+                'author', flat=True):
+            pulled = CursorPaginator(
+                Post.objects.filter(author_id=author_id)
+                .select_related('author', 'group'),
+                per_page
+            ).page_queryset(values, forward)
+            posts.update((post.id, post) for post in pulled)
+        return sorted(posts.values(), key=lambda post: (post.pub_date,
+                                                        post.id),
+                      reverse=forward)[:per_page + 1]
+
+    def entries_page(self, values, forward, per_page):
+        return CursorPaginator(
+            TimelineEntry.objects.filter(user=self.user)
+            .select_related('post__author', 'post__group'),
+            per_page, ('-pub_date', '-post_id')
+        ).page_queryset(values, forward)
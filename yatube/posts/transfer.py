@@ -0,0 +1,264 @@
+"""Потоковая выгрузка и загрузка данных Yatube.
+
+Каждая таблица пишется в свой файл ``<имя>.ndjson`` или ``<имя>.csv`` в
+каталоге выгрузки, картинки постов - в ``media/`` рядом с ними. Строки
+читаются и пишутся по одной, а в базу уходят пачками через
+``bulk_create``, так что память не растёт с размером данных.
+
+Выгружаются все столбцы моделей (``_meta.concrete_fields``), включая
+флаги администраторов, даты правки и описания вариантов картинок; файлы
+вариантов копируются вместе с оригиналами. ``bulk_create`` не вызывает
+сигналы, поэтому после загрузки счётчики, ленты подписок, поисковый
+индекс и рейтинги пересобираются целиком, а миниатюры ставятся в очередь.
+"""
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+
+from . import counters, rankings, search, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, User
+
+# Таблицы в порядке загрузки: сначала те, на кого ссылаются.
+TABLES = {
+    'users': User,
+    'groups': Group,
+    'posts': Post,
+    'comments': Comment,
+    'follows': Follow,
+}
+FORMATS = ('ndjson', 'csv')
+MEDIA_DIR = 'media'
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Progress:
+    """Считает строки и скорость, сообщая о каждой пачке."""
+
+    def __init__(self, table, report=None):
+        self.table = table
+        self.report = report
+        self.done = 0
+        self.started = time.monotonic()
+
+    @property
+    def rate(self):
+        return self.done / max(time.monotonic() - self.started, 1e-9)
+
+    def add(self, count):
+        self.done += count
+        if self.report:
+            self.report(f'{self.table}: {self.done} строк, '
+                        f'{self.rate:.0f} строк/с')
+
+
+def columns(model):
+    """Поля таблицы в выгрузке: все столбцы модели."""
+    return model._meta.concrete_fields
+
+
+def _dates(model):
+    """Поля, которые ``bulk_create`` заполнит текущим временем."""
+    return [field.attname for field in columns(model)
+            if getattr(field, 'auto_now', False)
+            or getattr(field, 'auto_now_add', False)]
+
+
+def _plain(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _csv_value(field, value):
+    # В CSV нет вложенных структур, JSON пишется строкой.
+    if isinstance(field, models.JSONField):
+        return json.dumps(value, ensure_ascii=False)
+    return '' if value is None else _plain(value)
+
+
+def _write_rows(file, fmt, fields, rows):
+    names = [field.attname for field in fields]
+    if fmt == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(names)
+        for row in rows:
+            writer.writerow(_csv_value(field, value)
+                            for field, value in zip(fields, row))
+            yield
+    else:
+        for row in rows:
+            file.write(json.dumps(
+                dict(zip(names, map(_plain, row))), ensure_ascii=False))
+            file.write('\n')
+            yield
+
+
+def _copy_image(name, directory):
+    target = os.path.join(directory, MEDIA_DIR, name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with default_storage.open(name) as source, open(target, 'wb') as copy:
+        for chunk in source.chunks():
+            copy.write(chunk)
+
+
+def _media(post):
+    """Файлы поста: оригинал картинки и её варианты."""
+    if not post.image:
+        return []
+    return [post.image.name] + [
+        variant['name'] for variant in post.image_variants.get('files', [])]
+
+
+def _exported_rows(model, fields, directory, batch_size):
+    rows = model.objects.order_by('pk').values_list(
+        *[field.attname for field in fields]).iterator(chunk_size=batch_size)
+    for row in rows:
+        if model is Post:
+            post = Post(**dict(zip((field.attname for field in fields), row)))
+            for name in _media(post):
+                if default_storage.exists(name):
+                    _copy_image(name, directory)
+        yield row
+
+
+def export(directory, fmt='ndjson', batch_size=1000, report=None):
+    """Выгружает все таблицы в каталог; возвращает число строк по таблицам."""
+    os.makedirs(directory, exist_ok=True)
+    totals = {}
+    for table, model in TABLES.items():
+        fields = columns(model)
+        progress = Progress(table, report)
+        path = os.path.join(directory, f'{table}.{fmt}')
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            rows = _exported_rows(model, fields, directory, batch_size)
+            for batch in _batches(_write_rows(file, fmt, fields, rows),
+                                  batch_size):
+                progress.add(len(batch))
+        totals[table] = progress.done
+    return totals
+
+
+def _read_rows(path, fmt):
+    with open(path, encoding='utf-8', newline='') as file:
+        if fmt == 'csv':
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _instance(model, row, fmt):
+    values = {}
+    for name, value in row.items():
+        field = model._meta.get_field(name)
+        if fmt == 'csv' and isinstance(field, models.JSONField):
+            value = json.loads(value)
+        elif value == '' and field.null:
+            value = None
+        values[field.attname] = field.to_python(value)
+    return model(**values)
+
+
+def _restore(name, directory):
+    """Кладёт файл из выгрузки в хранилище; возвращает его новое имя."""
+    source = os.path.join(directory, MEDIA_DIR, name)
+    if not os.path.exists(source):
+        return name
+    with open(source, 'rb') as file:
+        return default_storage.save(name, File(file))
+
+
+def _restore_media(post, directory):
+    if not post.image:
+        return
+    for variant in post.image_variants.get('files', []):
+        _restore(variant['name'], directory)
+    post.image = _restore(post.image.name, directory)
+
+
+def _create(model, batch):
+    """``bulk_create`` с датами из выгрузки, а не текущим временем.
+
+    Флаги ``auto_now`` полей не трогаем - они общие для всего процесса;
+    даты возвращаются отдельным ``bulk_update`` той же пачки.
+    """
+    dates = _dates(model)
+    kept = [[getattr(obj, name) for name in dates] for obj in batch]
+    model.objects.bulk_create(batch)
+    if not dates:
+        return
+    for obj, values in zip(batch, kept):
+        for name, value in zip(dates, values):
+            if value is not None:
+                setattr(obj, name, value)
+    model.objects.bulk_update(batch, dates)
+
+
+def _find(directory, table):
+    for fmt in FORMATS:
+        path = os.path.join(directory, f'{table}.{fmt}')
+        if os.path.exists(path):
+            return path, fmt
+    return None, None
+
+
+def _load(model, rows, fmt, directory, batch_size, batches_per_transaction,
+          progress):
+    instances = (_instance(model, row, fmt) for row in rows)
+    for chunk in _batches(_batches(instances, batch_size),
+                          batches_per_transaction):
+        with transaction.atomic():
+            for batch in chunk:
+                if model is Post:
+                    for post in batch:
+                        _restore_media(post, directory)
+                _create(model, batch)
+                progress.add(len(batch))
+
+
+def rebuild_derived(report=None):
+    """Пересобирает то, что обычно ведут сигналы."""
+    with connection.cursor() as cursor:
+        for statement in connection.ops.sequence_reset_sql(
+                no_style(), list(TABLES.values())):
+            cursor.execute(statement)
+    counters.reconcile()
+    for user in User.objects.filter(follower__isnull=False).distinct():
+        timeline.rebuild(user)
+    search.rebuild()
+    rankings.update()
+    # Миниатюры sorl-thumbnail в выгрузку не входят, а имена вариантов
+    # могли смениться при загрузке: всё строится заново в фоне.
+    for post_id in Post.objects.exclude(image='').exclude(
+            image__isnull=True).values_list('pk', flat=True).iterator():
+        thumbnails.generate.delay(post_id)
+    if report:
+        report('Счётчики, ленты, поисковый индекс и рейтинги пересобраны, '
+               'миниатюры поставлены в очередь')
+
+
+def import_(directory, batch_size=1000, batches_per_transaction=10,
+            report=None):
+    """Загружает таблицы из каталога; возвращает число строк по таблицам."""
+    totals = {}
+    for table, model in TABLES.items():
+        path, fmt = _find(directory, table)
+        if path is None:
+            continue
+        progress = Progress(table, report)
+        _load(model, _read_rows(path, fmt), fmt, directory, batch_size,
+              batches_per_transaction, progress)
+        totals[table] = progress.done
+    rebuild_derived(report)
+    return totals
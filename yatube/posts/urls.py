@@ -1,19 +1,26 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
+
+# Под ASGI страницы для чтения обслуживают корутины, см. async_views.
+reads = async_views if settings.ASYNC_VIEWS else views
 
 app_name = 'posts'
 
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('group/<slug:slug>/', views.group_posts, name='group_list'),
-    path('profile/<str:username>/', views.profile, name='profile'),
-    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('', reads.index, name='index'),
+    path('trending/', reads.trending, name='trending'),
+    path('groups/', reads.group_directory, name='group_directory'),
+    path('group/<slug:slug>/', reads.group_posts, name='group_list'),
+    path('profile/<str:username>/', reads.profile, name='profile'),
+    path('posts/<int:post_id>/', reads.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
-    path('follow/', views.follow_index, name='follow_index'),
+    path('search/', reads.post_search, name='search'),
+    path('follow/', reads.follow_index, name='follow_index'),
     path('profile/<str:username>/follow/', views.profile_follow,
          name='profile_follow'),
     path('profile/<str:username>/unfollow/', views.profile_unfollow,
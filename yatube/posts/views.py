@@ -1,59 +1,117 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 
+from core.db.routers import read_only
+
+from . import (cache_versions, conditional, counters, feeds, follow_graph,
+               search, streaming, thumbnails)
 from .models import User, Post, Group, Follow
 from .forms import PostForm, CommentForm
 from .paginator import my_paginator
+from .timeline import TimelineFeed
 
 
+@read_only
+@conditional.index
 def index(request):
     """Главная страница."""
-    post_list = Post.objects.select_related('author', 'group').all()
-    page_obj = my_paginator(request, post_list)
+    page_obj = my_paginator(request, feeds.index_feed())
     context = {
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'feed_version': cache_versions.get_version(cache_versions.INDEX),
+        'feed_cache_timeout': settings.FEED_CACHE_TIMEOUT
     }
     return render(request, 'posts/index.html', context)
 
 
+@read_only
+@conditional.rankings
+def trending(request):
+    """Популярные посты и авторы."""
+    page_obj = my_paginator(request, feeds.trending_feed(),
+                            ordering=('-score', '-post_id'))
+    context = {
+        'page_obj': page_obj,
+        'authors': feeds.top_authors(settings.TRENDING_AUTHORS),
+        'feed_version': cache_versions.get_version(cache_versions.RANKINGS),
+        'feed_cache_timeout': settings.FEED_CACHE_TIMEOUT
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+@read_only
+@conditional.rankings
+def group_directory(request):
+    """Каталог групп, самые активные - первыми."""
+    page_obj = my_paginator(request, feeds.group_directory(),
+                            ordering=('-score', 'group_id'))
+    context = {
+        'page_obj': page_obj,
+        'feed_version': cache_versions.get_version(cache_versions.RANKINGS),
+        'feed_cache_timeout': settings.FEED_CACHE_TIMEOUT
+    }
+    return render(request, 'posts/group_directory.html', context)
+
+
+@read_only
+@conditional.group_posts
 def group_posts(request, slug):
     """Страница постов по группам."""
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts_of_group.select_related('author').all()
-    page_obj = my_paginator(request, post_list)
+    page_obj = my_paginator(request, feeds.group_feed(group))
     context = {
         'group': group,
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'feed_version': cache_versions.get_version(
+            cache_versions.group_scope(group.pk)),
+        'feed_cache_timeout': settings.FEED_CACHE_TIMEOUT
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@read_only
+@conditional.profile
 def profile(request, username):
     """Страница профиля автора поста."""
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('group').all()
-    page_obj = my_paginator(request, post_list)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        author=author, user=request.user).exists()
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    page_obj = my_paginator(request, feeds.profile_feed(author))
+    following = request.user.is_authenticated and bool(
+        follow_graph.is_following(request.user.pk, [author.pk]))
     context = {
         'author': author,
+        'stats': counters.stats_for(author),
         'following': following,
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'feed_version': cache_versions.get_version(
+            cache_versions.author_scope(author.pk)),
+        'feed_cache_timeout': settings.FEED_CACHE_TIMEOUT
     }
     return render(request, 'posts/profile.html', context)
 
 
+@read_only
+@conditional.post_detail
 def post_detail(request, post_id):
     """Страница поста."""
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(feeds.post_detail(), id=post_id)
+    comments = my_paginator(
+        request, feeds.comment_feed(post), param='comments',
+        ordering=('pub_date', 'id'),
+        per_page=streaming.per_page(request, settings.NUM_COMMENTS))
     form = CommentForm()
     context = {
         'post': post,
+        'author_stats': counters.stats_for(post.author),
         'form': form,
         'comments': comments
     }
-    return render(request, 'posts/post_detail.html', context)
+    return streaming.render(
+        request, 'posts/post_detail.html', context, 'comments',
+        'posts/includes/comments.html',
+        after=[('posts/includes/paginator.html',
+                {'page_obj': comments, 'cursor_param': 'comments'})])
 
 
 @login_required
@@ -64,6 +122,7 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        thumbnails.schedule(post)
         return redirect('posts:profile', request.user)
     context = {
         'form': form
@@ -80,7 +139,11 @@ def post_edit(request, post_id):
     form = PostForm(request.POST or None, files=request.FILES or None,
                     instance=post)
     if form.is_valid():
-        form.save()
+        if 'image' in form.changed_data:
+            post.thumbnails, post.image_variants = {}, {}
+        post = form.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect('posts:post_detail', post_id)
     context = {
         'is_edit': True,
@@ -103,12 +166,37 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def _page_number(request):
+    try:
+        number = int(request.GET.get('page', 1))
+    except ValueError:
+        return 1
+    return min(max(number, 1), settings.SEARCH_MAX_PAGES)
+
+
+@read_only
+def post_search(request):
+    """Поиск по текстам постов и комментариев."""
+    query = request.GET.get('q', '').strip()
+    number = _page_number(request)
+    per_page = settings.NUM_POSTS
+    ids = search.search(query, per_page + 1, (number - 1) * per_page)
+    found = feeds.index_feed().in_bulk(ids[:per_page])
+    context = {
+        'query': query,
+        'posts': [found[pk] for pk in ids[:per_page] if pk in found],
+        'number': number,
+        'has_next': (len(ids) > per_page
+                     and number < settings.SEARCH_MAX_PAGES)
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@read_only
 def follow_index(request):
     """Посты авторов, на которых подписан текущий пользователь."""
-    post_list = Post.objects.filter(
-        author__following__user=request.user).select_related('author', 'group')
-    page_obj = my_paginator(request, post_list)
+    page_obj = my_paginator(request, TimelineFeed(request.user))
     context = {
         'page_obj': page_obj
     }
@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'attempts', 'run_at',
+                    'created',)
+    search_fields = ('name', 'last_error',)
+    list_filter = ('status', 'name',)
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tasks import queue
+
+
+class Command(BaseCommand):
+    help = ('Воркер очереди фоновых задач: выполняет готовые задачи и ждёт '
+            'новых.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить готовые задачи и выйти.')
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Пауза при пустой очереди, секунды.')
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        try:
+            while True:
+                jobs = queue.claim()
+                if not jobs:
+                    if options['once']:
+                        break
+                    close_old_connections()
+                    time.sleep(options['poll'])
+                    continue
+                if queue.execute(jobs):
+                    done += len(jobs)
+                else:
+                    failed += len(jobs)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f'Выполнено задач: {done}, с ошибкой: {failed}')
@@ -0,0 +1,62 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Модель фоновой задачи в очереди."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    name = models.CharField(
+        max_length=100,
+        verbose_name='Задача'
+    )
+    args = models.JSONField(
+        default=list,
+        verbose_name='Аргументы'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Выполнить не раньше'
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Занята воркером до'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Поставлена'
+    )
+
+    class Meta:
+        ordering = ('run_at', 'id')
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=['status', 'run_at', 'id'],
+                         name='job_status_run_at')
+        ]
+
+    def __str__(self):
+        return f'{self.name}{tuple(self.args)}'
@@ -0,0 +1,156 @@
+"""Очередь фоновых задач в таблице базы.
+
+Побочные эффекты записи (раскладка по лентам, поисковый индекс,
+миниатюры, сброс кэша страниц, письма) ставятся задачами ``Job`` после
+коммита и выполняются воркером ``manage.py run_tasks``, а запрос
+отвечает сразу.
+
+Задача - функция с декоратором ``@task``, аргументы хранятся в JSON.
+Задачу с ``batch`` воркер забирает пачкой до ``batch`` штук одного вида
+и вызывает функцию один раз со списком аргументов. Упавшая задача
+повторяется с экспоненциальной задержкой, а после ``max_attempts``
+попыток остаётся в таблице со статусом failed. При ``TASKS_EAGER``
+задачи выполняются сразу в процессе - так работают разработка и тесты.
+"""
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class Task:
+    """Зарегистрированная задача; вызов напрямую выполняет её сразу."""
+
+    def __init__(self, func, name, batch, max_attempts):
+        self.func = func
+        self.name = name
+        self.batch = batch
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+    def delay(self, *args):
+        """Ставит задачу в очередь после коммита текущей транзакции."""
+        args = list(args)
+        if settings.TASKS_EAGER:
+            self.run([args])
+            return
+        transaction.on_commit(
+            lambda: Job.objects.create(name=self.name, args=args))
+
+    def run(self, batch):
+        """Выполняет задачи со списком аргументов ``batch``."""
+        if self.batch:
+            self.func(batch)
+            return
+        for args in batch:
+            self.func(*args)
+
+
+def task(name=None, batch=None, max_attempts=None):
+    """Регистрирует функцию как фоновую задачу.
+
+    Имя по умолчанию - ``модуль.функция``. С ``batch`` функция принимает
+    один аргумент: список списков аргументов задач пачки.
+    """
+    def register(func):
+        registered = Task(func, name or f'{func.__module__}.{func.__name__}',
+                          batch, max_attempts or settings.TASKS_MAX_ATTEMPTS)
+        _registry[registered.name] = registered
+        return registered
+    return register
+
+
+def backoff(attempt):
+    """Задержка перед повтором: растёт вдвое, с разбросом от рывков."""
+    delay = settings.TASKS_RETRY_DELAY * 2 ** (attempt - 1)
+    return timedelta(seconds=min(delay, settings.TASKS_MAX_RETRY_DELAY)
+                     * random.uniform(0.5, 1.5))
+
+
+def _ready(now):
+    # Задачи упавшего воркера снова доступны, когда истекает их срок.
+    return Job.objects.filter(
+        Q(status=Job.QUEUED, run_at__lte=now)
+        | Q(status=Job.RUNNING, locked_until__lt=now))
+
+
+def claim(now=None):
+    """Забирает пачку готовых задач одного вида; [] - если их нет.
+
+    На PostgreSQL строки занятых другими воркерами задач пропускаются
+    (SKIP LOCKED), SQLite выполняет транзакции записи по одной.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        ready = _ready(now).order_by('run_at', 'id')
+        if connections[ready.db].features.has_select_for_update_skip_locked:
+            ready = ready.select_for_update(skip_locked=True)
+        first = ready.only('name').first()
+        if first is None:
+            return []
+        registered = _registry.get(first.name)
+        limit = (registered.batch or 1) if registered else 1
+        jobs = list(ready.filter(name=first.name)[:limit])
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=Job.RUNNING, attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=settings.TASKS_LEASE))
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+def _fail(jobs, max_attempts, error):
+    now = timezone.now()
+    for job in jobs:
+        if job.attempts >= max_attempts:
+            changes = {'status': Job.FAILED}
+        else:
+            changes = {'status': Job.QUEUED,
+                       'run_at': now + backoff(job.attempts)}
+        Job.objects.filter(pk=job.pk).update(
+            locked_until=None, last_error=error, **changes)
+
+
+def execute(jobs):
+    """Выполняет пачку из ``claim``; True, если всё прошло успешно."""
+    registered = _registry.get(jobs[0].name)
+    try:
+        if registered is None:
+            raise LookupError(f'Неизвестная задача {jobs[0].name}')
+        registered.run([job.args for job in jobs])
+    except Exception:
+        logger.exception('Задача %s упала', jobs[0].name)
+        _fail(jobs, registered.max_attempts if registered else 1,
+              traceback.format_exc())
+        return False
+    Job.objects.filter(pk__in=[job.pk for job in jobs]).delete()
+    return True
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи, пока они есть; возвращает их число."""
+    done = 0
+    while limit is None or done < limit:
+        jobs = claim()
+        if not jobs:
+            break
+        execute(jobs)
+        done += len(jobs)
+    return done
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts import search
+from posts.models import Comment, Post, User
+
+from .. import queue
+from ..models import Job
+
+calls = []
+
+
+@queue.task(name='tests.record', batch=10)
+def record(batch):
+    calls.append(batch)
+
+
+@queue.task(name='tests.explode', max_attempts=2)
+def explode(value):
+    raise ValueError(value)
+
+
+@override_settings(TASKS_EAGER=False)
+class QueueTests(TestCase):
+    """Тесты очереди фоновых задач."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_after_commit(self):
+        """Тест постановки задачи только после коммита."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            record.delay(1)
+            self.assertFalse(Job.objects.exists())
+        for callback in callbacks:
+            callback()
+        job = Job.objects.get()
+        self.assertEqual((job.name, job.args), ('tests.record', [1]))
+        with override_settings(TASKS_EAGER=True):
+            record.delay(2)
+        self.assertEqual(calls, [[[2]]])
+
+    def test_batch_of_same_kind(self):
+        """Тест пачки задач одного вида за один вызов."""
+        Job.objects.bulk_create(
+            [Job(name='tests.record', args=[number]) for number in range(3)]
+            + [Job(name='tests.explode', args=['x'])])
+        jobs = queue.claim()
+        self.assertEqual([job.args for job in jobs], [[0], [1], [2]])
+        self.assertTrue(queue.execute(jobs))
+        self.assertEqual(calls, [[[0], [1], [2]]])
+        self.assertEqual(list(Job.objects.values_list('name', flat=True)),
+                         ['tests.explode'])
+
+    def test_retry_with_backoff(self):
+        """Тест повтора с задержкой и отказа после всех попыток."""
+        Job.objects.create(name='tests.explode', args=['boom'])
+        self.assertEqual(queue.run_pending(), 1)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('ValueError: boom', job.last_error)
+        self.assertEqual(queue.claim(), [])
+        later = timezone.now() + timedelta(days=1)
+        self.assertFalse(queue.execute(queue.claim(now=later)))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(queue.claim(now=later + timedelta(days=1)), [])
+
+    def test_expired_lease_reclaimed(self):
+        """Тест: задачи упавшего воркера снова берутся в работу."""
+        Job.objects.create(name='tests.record', args=[1])
+        self.assertEqual(len(queue.claim()), 1)
+        self.assertEqual(queue.claim(), [])
+        later = timezone.now() + timedelta(hours=1)
+        jobs = queue.claim(now=later)
+        self.assertEqual(jobs[0].attempts, 2)
+
+    def test_side_effects_drain_in_worker(self):
+        """Тест: побочные эффекты записи выполняет воркер."""
+        author = User.objects.create_user(username='leo',
+                                          email='leo@example.com')
+        reader = User.objects.create_user(username='tiger')
+        post = Post.objects.create(text='Пост', author=author)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=post, author=reader,
+                                   text='Котёнок')
+        self.assertEqual(search.search('котёнок', 10), [])
+        self.assertEqual(mail.outbox, [])
+        out = StringIO()
+        call_command('run_tasks', once=True, stdout=out)
+        self.assertIn('с ошибкой: 0', out.getvalue())
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(search.search('котёнок', 10), [post.pk])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['leo@example.com'])
+        self.assertIn(f'{settings.SITE_URL}/posts/{post.pk}/',
+                      mail.outbox[0].body)
@@ -8,6 +8,9 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from core.cache import parse_cache_url
+from core.db import database_settings
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -44,12 +47,18 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
+    'tasks.apps.TasksConfig',
     'sorl.thumbnail',
     'debug_toolbar'
 ]
 
 MIDDLEWARE = [
+    'core.metrics.middleware.MetricsMiddleware',
+    'core.profiling.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.db.middleware.ReplicaPinningMiddleware',
+    'posts.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -66,7 +75,8 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.templates.DjangoTemplates',
+        'NAME': 'django',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -86,12 +96,13 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
-}
+# Базы задаются адресами, см. core/db/__init__.py
+DATABASES = database_settings(
+    os.environ.get('YATUBE_DATABASE_URL',
+                   'sqlite://' + os.path.join(BASE_DIR, 'db.sqlite3')),
+    os.environ.get('YATUBE_REPLICA_URL'))
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -138,13 +149,15 @@ LOGIN_REDIRECT_URL = 'posts:index'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+# Адрес сайта для ссылок в письмах: задачи идут вне запроса
+SITE_URL = os.environ.get('YATUBE_SITE_URL', 'http://localhost:8000')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Общий кэш задаётся адресом, см. core/cache/__init__.py
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': parse_cache_url(
+        os.environ.get('YATUBE_CACHE_URL', 'locmem://'))
 }
 
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
@@ -153,3 +166,71 @@ DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 NUM_POSTS: int = 10
 FIRST_SYMBOLS_OF_POST: int = 15
 COUNT_OF_CREATE_POSTS: int = 13
+PAGINATOR_COUNT_TIMEOUT: int = 300
+TIMELINE_FANOUT_LIMIT: int = 1000
+TIMELINE_BACKFILL: int = 100
+TIMELINE_BATCH_SIZE: int = 1000
+NUM_COMMENTS: int = 50
+FEED_CACHE_TIMEOUT: int = 6 * 60 * 60
+THUMBNAIL_WORKERS: int = 2
+# Размеры миниатюр: имя -> (геометрия sorl-thumbnail, опции)
+THUMBNAIL_PRESETS = {
+    'feed': ('960x339', {'upscale': True}),
+}
+# Адаптивные варианты картинок: ширины, рамка пропорций и качество
+IMAGE_VARIANT_WIDTHS = (320, 640, 960)
+IMAGE_VARIANT_BOX = (960, 339)
+IMAGE_VARIANT_QUALITY: int = 80
+SEARCH_MAX_PAGES: int = 10
+REPLICA_PIN_SECONDS: int = 10
+# Кэш страниц для анонимных читателей: маршрут -> время жизни, секунды
+PAGE_CACHE_ENABLED: bool = not DEBUG
+PAGE_CACHE_TTLS = {
+    'posts:index': 60,
+    'posts:group_list': 120,
+    'posts:profile': 120,
+    'posts:post_detail': 60,
+    'posts:trending': 300,
+    'posts:group_directory': 300,
+}
+API_MAX_LIMIT: int = 100
+# Асинхронные страницы для чтения; включает yatube/asgi.py
+ASYNC_VIEWS: bool = os.environ.get('YATUBE_ASYNC_VIEWS') == '1'
+# Сколько view-функций процесс выполняет одновременно под ASGI
+ASYNC_VIEWS_CONCURRENCY: int = int(
+    os.environ.get('YATUBE_ASYNC_CONCURRENCY', 20))
+# Потоковый рендеринг: маршрут -> записей списка на странице
+STREAMING_PAGES = {}
+STREAMING_CHUNK_SIZE: int = 100
+# Доступ к /metrics по заголовку "Authorization: Bearer <токен>"; без
+# токена /metrics отвечает 404, если не включён DEBUG
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN')
+# Профилировщик медленных запросов, см. core/profiling
+PROFILER_ENABLED: bool = os.environ.get('YATUBE_PROFILER') == '1'
+PROFILER_THRESHOLD: float = float(
+    os.environ.get('YATUBE_PROFILER_THRESHOLD', 1.0))
+PROFILER_SAMPLE_RATE: float = float(
+    os.environ.get('YATUBE_PROFILER_SAMPLE_RATE', 0.0))
+PROFILER_INTERVAL: float = 0.005
+PROFILER_DIR = os.environ.get('YATUBE_PROFILER_DIR',
+                              os.path.join(BASE_DIR, 'profiles'))
+PROFILER_MAX_FILES: int = int(
+    os.environ.get('YATUBE_PROFILER_MAX_FILES', 500))
+# Фоновые задачи: сразу в процессе или через воркер run_tasks
+TASKS_EAGER: bool = os.environ.get(
+    'YATUBE_TASKS_EAGER', '1' if DEBUG else '0') == '1'
+TASKS_MAX_ATTEMPTS: int = 5
+TASKS_RETRY_DELAY: int = 10
+TASKS_MAX_RETRY_DELAY: int = 60 * 60
+TASKS_LEASE: int = 5 * 60
+# Граф подписок в кэше: время жизни списков и сколько подписок
+# пользователя смотреть при подборе авторов
+FOLLOW_GRAPH_TIMEOUT: int = 24 * 60 * 60
+FOLLOW_GRAPH_SUGGEST_FROM: int = 200
+# Рейтинги, см. posts/rankings.py: период, за который учитываются
+# события, и время, за которое вес события падает вдвое, - в секундах
+RANKING_WINDOW: int = 7 * 24 * 60 * 60
+RANKING_HALF_LIFE: int = 24 * 60 * 60
+RANKING_LIMIT: int = 1000
+RANKING_BATCH_SIZE: int = 1000
+TRENDING_AUTHORS: int = 5